@@ -0,0 +1,48 @@
+"""
+Điểm vào dòng lệnh duy nhất: python cli.py <lệnh> [tham số của lệnh]
+Chỉ module của lệnh được chọn mới được import (torch / pandas / matplotlib theo nhu cầu của lệnh đó),
+các tham số còn lại được chuyển nguyên cho argparse của module.
+"""
+import runpy
+import sys
+
+# lệnh -> (module, mô tả)
+COMMANDS = {
+    "compare": ("main", "Một lần chạy QGA vs PSO và biểu đồ hội tụ"),
+    "experiments": ("run_experiments", "Thí nghiệm nhiều seed trên mọi kịch bản"),
+    "scalability": ("run_scalability", "Thời gian / chi phí theo số UE"),
+    "tradeoff": ("run_tradeoff", "Đánh đổi độ trễ - năng lượng theo trọng số"),
+    "sweep": ("run_sweep", "Quét siêu tham số QGA / PSO"),
+    "online": ("run_online", "Tái tối ưu trực tuyến qua các epoch"),
+    "service": ("run_service", "Dịch vụ quyết định offload cục bộ"),
+    "trace": ("run_trace", "Tái tối ưu theo epoch từ trace UE thực"),
+    "bench": ("utils.benchmark", "Benchmark từng kernel"),
+    "plot": ("utils.plotter", "Vẽ lại hình thí nghiệm từ kho kết quả"),
+    "plot-scalability": ("utils.plot_scalability", "Vẽ lại hình khả năng mở rộng"),
+    "env-cache": ("core.env_cache", "Dựng trước (warm) hoặc xóa (clear) snapshot env"),
+}
+
+
+def usage():
+    lines = ["usage: python cli.py <command> [args...]", "", "commands:"]
+    lines += [f"  {name:<18}{description}" for name, (_, description) in COMMANDS.items()]
+    lines += ["", "python cli.py <command> --help shows the options of a command."]
+    return "\n".join(lines)
+
+
+def main(argv):
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0
+    command, args = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"unknown command {command!r}\n\n{usage()}", file=sys.stderr)
+        return 2
+    module = COMMANDS[command][0]
+    sys.argv = [module] + args
+    runpy.run_module(module, run_name="__main__", alter_sys=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,8 +1,23 @@
 # config.py
-import torch
+import os
+
+# Thư mục gốc của repo: đường dẫn cache neo vào đây, không phụ thuộc thư mục làm việc của process
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+class _DefaultDevice:
+    """DEVICE mặc định được chọn ở lần truy cập đầu: import config không kéo theo import torch"""
+    def __init__(self):
+        self.value = None
+
+    def __get__(self, instance, owner):
+        if self.value is None:
+            import torch
+            self.value = "cuda:0" if torch.cuda.is_available() else "cpu"
+        return self.value
+
 
 class BaseConfig:
-    DEVICE = "cuda:0" if torch.cuda.is_available() else "cpu"
+    DEVICE = _DefaultDevice()
     
     # --- Thông số Vật lý ---
     C_LIGHT = 3e8
@@ -30,9 +45,40 @@ class BaseConfig:
     UAV_HEIGHT = 200
     LEO_HEIGHT = 600000
 
+    # --- Chòm vệ tinh LEO ---
+    # LEO_MODE = "static": một vệ tinh đứng yên trên tâm vùng; "constellation": NUM_LEO vệ tinh
+    # Walker-delta chia đều trên LEO_PLANES mặt phẳng, vị trí tra theo epoch (env.set_epoch)
+    LEO_MODE = "static"
+    LEO_PLANES = 1
+    LEO_PHASING = 1
+    LEO_INCLINATION = 53.0
+    LEO_MIN_ELEVATION = 25.0
+    LEO_REF_LATLON = (21.03, 105.85)
+    LEO_HORIZON = 360           # số epoch trong bảng ephemeris
+    LEO_EPOCH_SECONDS = 10.0
+    LEO_OUTAGE_PENALTY = 1e3    # độ trễ (s) khi UE chọn LEO nhưng không thấy vệ tinh nào
+
+    # --- Liên kết UE -> UAV ---
+    # Từ UAV_INDEX_MIN_UAV UAV trở lên, mỗi UE chỉ xét UAV_ASSOC_K UAV gần nhất tìm qua lưới ô UAV_GRID_CELL (m)
+    # UAV_GRID_CELL = None: tự chọn sao cho trung bình khoảng một UAV mỗi ô
+    UAV_ASSOC_K = 3
+    UAV_GRID_CELL = None
+    UAV_INDEX_MIN_UAV = 32
+
     # --- Tối ưu hóa ---
     POPULATION_SIZE = 100
 
+    # --- Cache snapshot env (core.env_cache.load_env), None: luôn dựng lại env từ seed ---
+    ENV_CACHE_DIR = os.path.join(REPO_ROOT, "cache", "envs")
+
+    # --- Dừng sớm (models.anytime.EarlyStopping), None: tắt tiêu chí ---
+    # Dừng khi best cost không giảm quá EARLY_STOP_REL_TOL (tương đối) trong EARLY_STOP_PATIENCE thế hệ,
+    # khi mọi theta của QGA cách biên clamp <= EARLY_STOP_THETA_EPS, hoặc khi bầy PSO co về gbest (<= EARLY_STOP_SWARM_TOL)
+    EARLY_STOP_PATIENCE = None
+    EARLY_STOP_REL_TOL = 0.0
+    EARLY_STOP_THETA_EPS = None
+    EARLY_STOP_SWARM_TOL = None
+
     # Đưa SCENARIOS vào đây
     SCENARIOS = {
         "urban_iot": {
@@ -54,3 +100,11 @@ class BaseConfig:
             "w_energy": 0.1
         }
     }
+
+    def override_scenario(self, name, **params):
+        """
+        Ghi đè tham số của một kịch bản chỉ trên instance này, ví dụ config.override_scenario("urban_iot", num_ue=1000).
+        SCENARIOS của lớp (dùng chung cho mọi BaseConfig khác) không bị thay đổi.
+        """
+        self.SCENARIOS = {**self.SCENARIOS, name: {**self.SCENARIOS[name], **params}}
+        return self
@@ -0,0 +1,100 @@
+import torch
+from core.env_cache import load_env
+
+
+class BatchedSAGINEnv:
+    """
+    Gom S môi trường SAGIN (S seeds của cùng một kịch bản) thành một batch.
+    Vị trí: [S, num_ue, 3], task: [S, num_ue], bảng chi phí: [S, num_ue, 3]
+    """
+    def __init__(self, config, scenario_name="urban_iot", seeds=range(10)):
+        self.config = config
+        self.scenario = config.SCENARIOS[scenario_name]
+        self.device = config.DEVICE
+        self.seeds = list(seeds)
+
+        # Mỗi env có Generator riêng; optimizer batch rút tiếp từ đó nên mỗi seed giống hệt vòng lặp tuần tự
+        self.envs = []
+        for seed in self.seeds:
+            env = load_env(config, scenario_name, seed)
+            self.envs.append(env)
+        self.generators = [env.generator for env in self.envs]
+
+        self.num_envs = len(self.envs)
+        self.ue_pos = torch.stack([env.ue_pos for env in self.envs])             # [S, num_ue, 3]
+        self.uav_pos = torch.stack([env.uav_pos for env in self.envs])           # [S, num_uav, 3]
+        self.leo_pos = torch.stack([env.leo_pos for env in self.envs])           # [S, 1, 3]
+        self.task_data_bits = torch.stack([env.task_data_bits for env in self.envs]) # [S, num_ue]
+        self.task_cycles = torch.stack([env.task_cycles for env in self.envs])   # [S, num_ue]
+
+        self.latency_table = torch.stack([env.latency_table for env in self.envs]) # [S, num_ue, 3]
+        self.energy_table = torch.stack([env.energy_table for env in self.envs])
+        self.cost_table = torch.stack([env.get_cost_table() for env in self.envs])
+
+        num_ue = self.ue_pos.shape[1]
+        # Offset phẳng: idx = (s * num_ue + ue) * 3 + decision
+        self._flat_offsets = (torch.arange(self.num_envs * num_ue, device=self.device) * 3).view(self.num_envs, 1, num_ue)
+
+    def compute_cost(self, decisions):
+        """
+        decisions: Tensor [S, population_size, num_ue] chứa các giá trị {0, 1, 2}
+        Trả về: [S, population_size]
+        """
+        ue_costs = torch.take(self.cost_table, decisions + self._flat_offsets)
+        return torch.mean(ue_costs, dim=-1)
+
+
+class PaddedSAGINEnv:
+    """
+    Gom nhiều kịch bản khác num_ue / trọng số (mỗi kịch bản nhiều seed) thành một batch B = số kịch bản x số seed,
+    đệm chiều UE tới max_ue: bảng [B, max_ue, 3], mask hợp lệ [B, max_ue], trọng số (w_L, w_E) [B, 2].
+    Hàng của UE đệm trong bảng chi phí bằng 0 và chi phí chia cho num_ue thật nên UE đệm không đóng góp gì.
+    Thứ tự batch: kịch bản rồi seed; labels[b] = (tên kịch bản, seed), groups[tên] = các chỉ số b của kịch bản.
+    """
+    def __init__(self, config, scenario_names=None, seeds=range(10)):
+        self.config = config
+        self.device = config.DEVICE
+        scenario_names = list(scenario_names or config.SCENARIOS)
+        self.labels = [(name, seed) for name in scenario_names for seed in seeds]
+        self.groups = {name: [b for b, (n, _) in enumerate(self.labels) if n == name] for name in scenario_names}
+
+        self.envs = [load_env(config, name, seed) for name, seed in self.labels]
+        self.generators = [env.generator for env in self.envs]
+        self.num_envs = len(self.envs)
+        self.sizes = [env.num_ue for env in self.envs]
+        self.max_ue = max(self.sizes)
+        self.num_ues = torch.tensor(self.sizes, device=self.device)
+        self.mask = torch.arange(self.max_ue, device=self.device) < self.num_ues.unsqueeze(1)  # [B, max_ue]
+
+        self.latency_table = self._pad([env.latency_table for env in self.envs])  # [B, max_ue, 3]
+        self.energy_table = self._pad([env.energy_table for env in self.envs])
+        self.weights = torch.tensor([[env.scenario["w_latency"], env.scenario["w_energy"]] for env in self.envs],
+                                    device=self.device)                          # [B, 2]
+        self.cost_table = (self.weights[:, 0].view(-1, 1, 1) * self.latency_table
+                           + self.weights[:, 1].view(-1, 1, 1) * self.energy_table)
+
+        # Offset phẳng: idx = (b * max_ue + ue) * 3 + decision
+        self._flat_offsets = (torch.arange(self.num_envs * self.max_ue, device=self.device) * 3).view(
+            self.num_envs, 1, self.max_ue)
+
+    def _pad(self, tables):
+        padded = torch.zeros((len(tables), self.max_ue) + tables[0].shape[1:], device=self.device)
+        for b, table in enumerate(tables):
+            padded[b, :table.shape[0]] = table
+        return padded
+
+    def compute_cost(self, decisions):
+        """
+        decisions: [B, population_size, max_ue] giá trị {0, 1, 2} (giá trị tại UE đệm tùy ý)
+        Trả về: [B, population_size], trung bình trên các UE thật của từng kịch bản
+        """
+        ue_costs = torch.take(self.cost_table, decisions + self._flat_offsets)
+        return ue_costs.sum(dim=-1) / self.num_ues.unsqueeze(1)
+
+    def unpad(self, values):
+        """[B, max_ue, ...] -> list B tensor [num_ue_b, ...] (vd. lời giải tốt nhất của từng env)"""
+        return [values[b, :n] for b, n in enumerate(self.sizes)]
+
+    def split(self, per_env):
+        """list / tensor B phần tử (vd. lịch sử từ optimizer.run) -> {kịch bản: [phần tử theo từng seed]}"""
+        return {name: [per_env[b] for b in idx] for name, idx in self.groups.items()}
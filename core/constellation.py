@@ -0,0 +1,117 @@
+import hashlib
+import json
+import math
+import os
+import tempfile
+
+import numpy as np
+
+from config import REPO_ROOT
+
+EARTH_RADIUS = 6371e3
+EARTH_MU = 3.986004418e14
+EARTH_OMEGA = 7.2921159e-5
+
+EPHEMERIS_CACHE = os.path.join(REPO_ROOT, "cache", "ephemeris")
+
+
+class LEOConstellation:
+    """
+    Chòm vệ tinh LEO dạng Walker-delta (num_sats vệ tinh, num_planes mặt phẳng quỹ đạo tròn),
+    quay quanh Trái Đất đang tự quay. Vị trí được biểu diễn trong hệ tọa độ cục bộ của vùng phủ sóng:
+    (x, y) theo hướng Đông / Bắc cộng AREA_SIZE/2 (tâm vùng ở (AREA_SIZE/2, AREA_SIZE/2)), z là độ cao
+    so với mặt phẳng tiếp tuyến, khớp với tọa độ của UE/UAV trong SAGINEnv.
+
+    Bảng ephemeris trên cả horizon (vị trí [num_epochs, num_sats, 3] và mask nhìn thấy tại tâm vùng
+    [num_epochs, num_sats]) được tính một lần, lưu thành file .npy theo hash của tham số
+    và nạp lại bằng memmap ở các lần chạy sau.
+    """
+    def __init__(self, config, num_epochs, epoch_seconds, cache_dir=EPHEMERIS_CACHE):
+        self.params = {
+            "num_sats": int(config.NUM_LEO),
+            "num_planes": int(config.LEO_PLANES),
+            "phasing": int(config.LEO_PHASING),
+            "inclination": float(config.LEO_INCLINATION),
+            "altitude": float(config.LEO_HEIGHT),
+            "ref_latlon": [float(v) for v in config.LEO_REF_LATLON],
+            "min_elevation": float(config.LEO_MIN_ELEVATION),
+            "num_epochs": int(num_epochs),
+            "epoch_seconds": float(epoch_seconds),
+            "area_size": float(config.AREA_SIZE),
+        }
+        if self.params["num_sats"] % self.params["num_planes"] != 0:
+            raise ValueError("NUM_LEO must be a multiple of LEO_PLANES")
+        self.num_sats = self.params["num_sats"]
+        self.num_epochs = self.params["num_epochs"]
+        self.min_elevation = self.params["min_elevation"]
+        self.cache_dir = cache_dir
+        self.positions, self.visible = self._load_or_build()
+
+    def cache_key(self):
+        blob = json.dumps(self.params, sort_keys=True).encode()
+        return hashlib.sha1(blob).hexdigest()[:16]
+
+    def _paths(self):
+        key = self.cache_key()
+        return (os.path.join(self.cache_dir, f"{key}_pos.npy"),
+                os.path.join(self.cache_dir, f"{key}_vis.npy"))
+
+    def _load_or_build(self):
+        pos_path, vis_path = self._paths()
+        if not (os.path.exists(pos_path) and os.path.exists(vis_path)):
+            positions, visible = self._propagate()
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for path, array in ((pos_path, positions), (vis_path, visible)):
+                # Ghi ra file tạm có tên duy nhất rồi os.replace: tiến trình khác không đọc phải file dở dang,
+                # các process / luồng cùng dựng một ephemeris không ghi chồng lên file tạm của nhau
+                with tempfile.NamedTemporaryFile(dir=self.cache_dir, prefix=f".tmp-{os.path.basename(path)}-",
+                                                 delete=False) as f:
+                    np.save(f, array)
+                os.replace(f.name, path)
+        return np.load(pos_path, mmap_mode="r"), np.load(vis_path, mmap_mode="r")
+
+    def _propagate(self):
+        """Lan truyền quỹ đạo tròn cho mọi epoch: (positions float32 [E, L, 3], visible bool [E, L])"""
+        p = self.params
+        per_plane = p["num_sats"] // p["num_planes"]
+        a = EARTH_RADIUS + p["altitude"]
+        mean_motion = math.sqrt(EARTH_MU / a**3)
+        inc = math.radians(p["inclination"])
+
+        plane = np.repeat(np.arange(p["num_planes"]), per_plane)
+        slot = np.tile(np.arange(per_plane), p["num_planes"])
+        raan = 2 * np.pi * plane / p["num_planes"]
+        phase0 = 2 * np.pi * slot / per_plane + 2 * np.pi * p["phasing"] * plane / p["num_sats"]
+
+        t = np.arange(p["num_epochs"])[:, None] * p["epoch_seconds"]   # [E, 1]
+        u = phase0[None, :] + mean_motion * t                          # [E, L] argument of latitude
+        sat = a * np.stack([
+            np.cos(raan) * np.cos(u) - np.sin(raan) * np.sin(u) * math.cos(inc),
+            np.sin(raan) * np.cos(u) + np.cos(raan) * np.sin(u) * math.cos(inc),
+            np.sin(u) * math.sin(inc)
+        ], axis=-1)                                                    # [E, L, 3] (ECI)
+
+        # Điểm tham chiếu (tâm vùng) quay theo Trái Đất và hệ Đông-Bắc-Lên tại đó
+        lat = math.radians(p["ref_latlon"][0])
+        lon = np.radians(p["ref_latlon"][1]) + EARTH_OMEGA * t[:, 0]  # [E]
+        east = np.stack([-np.sin(lon), np.cos(lon), np.zeros_like(lon)], axis=-1)
+        north = np.stack([-math.sin(lat) * np.cos(lon), -math.sin(lat) * np.sin(lon), np.full_like(lon, math.cos(lat))], axis=-1)
+        up = np.stack([math.cos(lat) * np.cos(lon), math.cos(lat) * np.sin(lon), np.full_like(lon, math.sin(lat))], axis=-1)
+
+        rel = sat - EARTH_RADIUS * up[:, None, :]
+        local = np.stack([
+            (rel * east[:, None, :]).sum(-1) + p["area_size"] / 2,
+            (rel * north[:, None, :]).sum(-1) + p["area_size"] / 2,
+            (rel * up[:, None, :]).sum(-1)
+        ], axis=-1)
+
+        elevation = np.degrees(np.arcsin(local[..., 2] / np.linalg.norm(rel, axis=-1)))
+        # Biên nhỏ để UE ở rìa vùng vẫn được xét; mask chính xác theo từng UE được tính trong env
+        visible = elevation >= p["min_elevation"] - 1.0
+        return local.astype(np.float32), visible
+
+    def epoch(self, t):
+        """(positions [L, 3], visible [L]) của epoch t dưới dạng numpy (bản sao từ memmap)"""
+        if not 0 <= t < self.num_epochs:
+            raise IndexError(f"epoch {t} is outside the ephemeris horizon [0, {self.num_epochs})")
+        return np.array(self.positions[t]), np.array(self.visible[t])
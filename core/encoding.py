@@ -0,0 +1,64 @@
+import torch
+
+# Mã quan sát QGA được nén trong một byte: code = (b0 << 1) | b1 với (b0, b1) là cặp qubit của UE.
+# Bảng tra code -> quyết định {0: local, 1: UAV, 2: LEO}. Mặc định giữ ánh xạ cũ
+# clamp(b0 * 2 + b1, 0, 2) để kết quả đã công bố tái lập được: trạng thái (1, 1) được gán cho LEO,
+# nên ở theta = pi/4 LEO có xác suất 1/2 thay vì 1/3. Quan sát không lệch: sample_codes(..., reject_11=True).
+DEFAULT_DECISION_LUT = (0, 1, 2, 2)
+
+
+def make_lut(lut=None, device="cpu"):
+    """Bảng tra code -> quyết định dạng Tensor uint8 [4]"""
+    lut = DEFAULT_DECISION_LUT if lut is None else lut
+    lut = torch.as_tensor(lut, dtype=torch.uint8, device=device)
+    if lut.shape != (4,) or int(lut.max()) > 2:
+        raise ValueError("decision LUT must map the 4 qubit-pair codes to {0, 1, 2}")
+    return lut
+
+
+def inverse_lut(lut):
+    """Quyết định -> code đầu tiên ánh xạ tới nó (uint8 [3]); quyết định không có code sẽ báo lỗi"""
+    codes = []
+    for d in range(3):
+        match = torch.nonzero(lut == d)
+        if match.numel() == 0:
+            raise ValueError(f"decision LUT has no code for decision {d}")
+        codes.append(int(match[0]))
+    return torch.tensor(codes, dtype=torch.uint8, device=lut.device)
+
+
+def pack_bits(b0, b1):
+    """Nén hai mask qubit (bool) thành code uint8"""
+    return (b0.to(torch.uint8) << 1) | b1.to(torch.uint8)
+
+
+def sample_codes(probs, r, reject_11=False):
+    """
+    Quan sát cặp qubit: probs [..., 2] xác suất mỗi qubit bằng 1, r [..., 2] số ngẫu nhiên đều trên [0, 1).
+    reject_11=False: b = r < probs như QGA gốc. reject_11=True: rút từ phân phối của (b0, b1) với điều kiện
+    khác (1, 1) (tương đương quan sát lại cho tới khi không ra (1, 1)), chỉ dùng r[..., 0];
+    code 3 không bao giờ xuất hiện nên LUT không còn lệch về LEO. Cả hai chế độ dùng cùng lượng số ngẫu nhiên.
+    """
+    if not reject_11:
+        observed = r < probs
+        return pack_bits(observed[..., 0], observed[..., 1])
+    p0, p1 = probs[..., 0], probs[..., 1]
+    w00 = (1 - p0) * (1 - p1)
+    w01 = (1 - p0) * p1
+    u = r[..., 0] * (w00 + w01 + p0 * (1 - p1))
+    return (u >= w00).to(torch.uint8) + (u >= w00 + w01).to(torch.uint8)
+
+
+def unpack_bits(codes):
+    """code uint8 [...] -> cặp qubit uint8 [..., 2]"""
+    return torch.stack([codes >> 1, codes & 1], dim=-1)
+
+
+def decode(codes, lut):
+    """code uint8 [...] -> quyết định uint8 [...]"""
+    return lut[codes.int()]
+
+
+def encode(decisions, lut):
+    """Quyết định [...] -> code uint8 [...] (ánh xạ ngược của decode)"""
+    return inverse_lut(lut)[decisions.int()]
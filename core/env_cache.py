@@ -0,0 +1,145 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+
+import numpy as np
+import torch
+
+from config import BaseConfig
+from core.sagin_env import SAGINEnv
+
+ENV_CACHE = BaseConfig.ENV_CACHE_DIR
+# Thuộc tính config không ảnh hưởng tới env (tham số tối ưu, dừng sớm, vị trí cache)
+_ENV_INDEPENDENT = ("SCENARIOS", "ENV_CACHE_DIR", "POPULATION_SIZE", "MAX_ITER")
+# Mã nguồn sinh dữ liệu env: sửa các file này thì snapshot cũ tự động không còn được dùng
+_SOURCES = ("sagin_env.py", "spatial_index.py", "rng.py", "encoding.py")
+_source_digest = None
+
+
+def _sources_digest():
+    global _source_digest
+    if _source_digest is None:
+        h = hashlib.sha1()
+        for name in _SOURCES:
+            with open(os.path.join(os.path.dirname(__file__), name), "rb") as f:
+                h.update(f.read())
+        _source_digest = h.hexdigest()
+    return _source_digest
+
+
+def env_cache_key(config, scenario_name, seed, contention=False, chunk_size=None):
+    """Khóa nội dung của env: hash tham số config / kịch bản, seed, tùy chọn env và mã nguồn sinh env"""
+    params = {name: getattr(config, name) for name in dir(config)
+              if name.isupper() and name not in _ENV_INDEPENDENT and not name.startswith("EARLY_STOP_")}
+    blob = json.dumps({
+        "config": params,
+        "scenario": [scenario_name, config.SCENARIOS[scenario_name]],
+        "seed": int(seed),
+        "contention": bool(contention),
+        "chunk_size": chunk_size,
+        "source": _sources_digest(),
+    }, sort_keys=True, default=str).encode()
+    return hashlib.sha1(blob).hexdigest()[:16]
+
+
+def build_env(config, scenario_name="urban_iot", seed=42, contention=False, chunk_size=None):
+    """Dựng env từ seed như trước: vị trí, task rồi bảng chi phí"""
+    env = SAGINEnv(config, scenario_name=scenario_name, seed=seed, contention=contention, chunk_size=chunk_size)
+    env.generate_tasks()
+    return env
+
+
+def save_env(env, path):
+    """
+    Ghi snapshot của env vào thư mục path: mỗi tensor một file .npy (nạp lại bằng memmap),
+    phần còn lại (trạng thái Generator, khóa bảng, thông số) trong state.pkl.
+    Thư mục được dựng dưới tên tạm rồi os.replace để process khác không đọc phải snapshot dở dang.
+    """
+    env.get_cost_table()
+    state = env.__getstate__()
+    # Bảng dẫn xuất được dựng lại khi cần; config do người gọi cung cấp khi nạp
+    state.update(config=None, _contention_tables=None, _packed_tables={}, _uav_index=None, _uav_index_key=None)
+    arrays = [name for name, value in state.items() if isinstance(value, torch.Tensor)]
+
+    parent = os.path.dirname(path) or "."
+    os.makedirs(parent, exist_ok=True)
+    # Thư mục tạm tên duy nhất: các process / luồng (backend thread dùng chung pid) không ghi chồng lên nhau
+    tmp_path = tempfile.mkdtemp(prefix=f".tmp-{os.path.basename(path)}-", dir=parent)
+    for name in arrays:
+        np.save(os.path.join(tmp_path, f"{name}.npy"), state.pop(name).cpu().numpy())
+    state["_arrays"] = arrays
+    with open(os.path.join(tmp_path, "state.pkl"), "wb") as f:
+        pickle.dump(state, f)
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        # Process khác đã ghi cùng snapshot trước (nội dung giống hệt)
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def read_env(path, config, scenario_name):
+    """
+    Nạp snapshot từ thư mục path. Tensor trên CPU ánh xạ thẳng file .npy (memmap copy-on-write:
+    chỉ trang được đọc mới nạp từ đĩa, sửa in-place không ghi ngược vào cache).
+    """
+    with open(os.path.join(path, "state.pkl"), "rb") as f:
+        state = pickle.load(f)
+    for name in state.pop("_arrays"):
+        array = np.load(os.path.join(path, f"{name}.npy"), mmap_mode="c")
+        state[name] = torch.from_numpy(array).to(config.DEVICE)
+    state.update(config=config, scenario=config.SCENARIOS[scenario_name])
+    env = SAGINEnv.__new__(SAGINEnv)
+    env.__setstate__(state)
+    return env
+
+
+def load_env(config, scenario_name="urban_iot", seed=42, contention=False, chunk_size=None, cache_dir=None):
+    """
+    SAGINEnv đã sinh task và dựng bảng chi phí, giống hệt SAGINEnv(...) + generate_tasks()
+    (kể cả trạng thái Generator, nên optimizer rút tiếp cùng dãy số ngẫu nhiên).
+    Lần đầu env được dựng và ghi vào cache_dir/<khóa>; các lần sau (kể cả ở process worker)
+    chỉ nạp snapshot. cache_dir mặc định là config.ENV_CACHE_DIR; None tắt cache.
+    Chế độ chòm vệ tinh (LEO_MODE="constellation") luôn dựng trực tiếp, ephemeris đã có cache riêng.
+    """
+    cache_dir = cache_dir if cache_dir is not None else getattr(config, "ENV_CACHE_DIR", None)
+    if cache_dir is None or config.LEO_MODE != "static":
+        return build_env(config, scenario_name, seed, contention, chunk_size)
+
+    path = os.path.join(cache_dir, env_cache_key(config, scenario_name, seed, contention, chunk_size))
+    if os.path.exists(os.path.join(path, "state.pkl")):
+        return read_env(path, config, scenario_name)
+    env = build_env(config, scenario_name, seed, contention, chunk_size)
+    save_env(env, path)
+    return env
+
+
+def clear_env_cache(cache_dir=ENV_CACHE):
+    """Xóa mọi snapshot; trả về số snapshot đã xóa"""
+    if not os.path.isdir(cache_dir):
+        return 0
+    entries = os.listdir(cache_dir)
+    shutil.rmtree(cache_dir)
+    return len(entries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dựng trước hoặc xóa snapshot env trong cache")
+    parser.add_argument("action", choices=["warm", "clear"])
+    parser.add_argument("--scenarios", nargs="+", default=None, help="Mặc định: mọi kịch bản")
+    parser.add_argument("--seeds", type=int, nargs="+", default=list(range(10)))
+    parser.add_argument("--contention", action="store_true")
+    parser.add_argument("--cache-dir", default=ENV_CACHE)
+    args = parser.parse_args()
+
+    if args.action == "clear":
+        print(f"Removed {clear_env_cache(args.cache_dir)} env snapshots from {args.cache_dir}")
+    else:
+        config = BaseConfig()
+        for scenario in args.scenarios or list(config.SCENARIOS):
+            for seed in args.seeds:
+                load_env(config, scenario, seed, contention=args.contention, cache_dir=args.cache_dir)
+        print(f"Env snapshots ready in {args.cache_dir}")
@@ -0,0 +1,86 @@
+import torch
+
+
+class IncrementalEvaluator:
+    """
+    Đánh giá tăng dần cho mô hình chi phí có chia sẻ tài nguyên (SAGINEnv.get_contention_tables).
+    Với mỗi cá thể lưu bộ đếm tải n_j và tổng S_j của phần chi phí bị chia sẻ trên từng node,
+    nhờ đó thay đổi quyết định của một UE được chấm lại trong O(1) thay vì O(num_ue):
+        tổng chi phí = sum_i fixed[i, d_i] + sum_j n_j * S_j
+    Khi env không bật contention, shared = 0 và delta rút gọn về fixed[i, d'] - fixed[i, d].
+    """
+    def __init__(self, env, decisions):
+        """decisions: Tensor [pop_size, num_ue] chứa các giá trị {0, 1, 2}"""
+        self.env = env
+        self.fixed, self.shared, self.nodes = env.get_contention_tables()
+        self.num_ue = self.fixed.shape[0]
+        self.num_nodes = env.num_nodes
+        self.reset(decisions)
+
+    def reset(self, decisions):
+        self.decisions = decisions.long().clone()
+        pop_size = self.decisions.shape[0]
+        ue = torch.arange(self.num_ue, device=self.decisions.device)
+        nodes = self.nodes[ue, self.decisions]    # [pop, num_ue]
+        shared = self.shared[ue, self.decisions]
+        fixed = self.fixed[ue, self.decisions]
+
+        self.node_sum = torch.zeros((pop_size, self.num_nodes), device=shared.device).scatter_add_(1, nodes, shared)
+        self.node_load = torch.zeros((pop_size, self.num_nodes), device=shared.device).scatter_add_(1, nodes, torch.ones_like(shared))
+        self.fixed_sum = fixed.sum(dim=1)
+
+    def total(self):
+        """Tổng chi phí (chưa chia num_ue) của từng cá thể: [pop_size]"""
+        return self.fixed_sum + (self.node_load * self.node_sum).sum(dim=1)
+
+    def costs(self):
+        """Chi phí trung bình, khớp với env.compute_cost: [pop_size]"""
+        return self.total() / self.num_ue
+
+    def _move_delta(self, rows, ues, old, new):
+        """Thay đổi tổng chi phí khi UE ues của cá thể rows chuyển từ lựa chọn old sang new"""
+        node_a, node_b = self.nodes[ues, old], self.nodes[ues, new]
+        s_a, s_b = self.shared[ues, old], self.shared[ues, new]
+        n_a, n_b = self.node_load[rows, node_a], self.node_load[rows, node_b]
+        S_a, S_b = self.node_sum[rows, node_a], self.node_sum[rows, node_b]
+
+        # Rời node a: n_a * S_a -> (n_a - 1)(S_a - s_a); vào node b: n_b * S_b -> (n_b + 1)(S_b + s_b)
+        leave = (n_a - 1) * (S_a - s_a) - n_a * S_a
+        join = (n_b + 1) * (S_b + s_b) - n_b * S_b
+        delta = self.fixed[ues, new] - self.fixed[ues, old] + leave + join
+        return torch.where(old == new, torch.zeros_like(delta), delta)
+
+    def delta(self, row, ue, new_decision):
+        """Thay đổi tổng chi phí (O(1)) nếu UE ue của cá thể row đổi sang new_decision"""
+        old = self.decisions[row, ue]
+        return self._move_delta(row, ue, old, torch.as_tensor(new_decision, device=old.device))
+
+    def delta_all(self):
+        """
+        Delta của mọi phép đổi một UE trên toàn quần thể trong một phép tensor.
+        Trả về: [pop_size, num_ue, 3], delta[p, i, d] = thay đổi tổng chi phí khi đặt d_i = d
+        """
+        pop_size = self.decisions.shape[0]
+        rows = torch.arange(pop_size, device=self.decisions.device).view(-1, 1, 1)
+        ues = torch.arange(self.num_ue, device=self.decisions.device).view(1, -1, 1)
+        old = self.decisions.unsqueeze(-1)
+        new = torch.arange(3, device=self.decisions.device).view(1, 1, 3)
+        return self._move_delta(rows, ues, old, new)
+
+    def apply(self, rows, ues, new_decisions):
+        """
+        Áp dụng các phép đổi (mỗi cá thể tối đa một phép) và cập nhật bộ đếm trong O(1) mỗi phép.
+        rows, ues, new_decisions: Tensor [k] (rows không trùng nhau)
+        """
+        rows = torch.as_tensor(rows, device=self.decisions.device)
+        ues = torch.as_tensor(ues, device=self.decisions.device)
+        new = torch.as_tensor(new_decisions, device=self.decisions.device)
+        old = self.decisions[rows, ues]
+        node_a, node_b = self.nodes[ues, old], self.nodes[ues, new]
+
+        self.fixed_sum[rows] += self.fixed[ues, new] - self.fixed[ues, old]
+        self.node_sum[rows, node_a] -= self.shared[ues, old]
+        self.node_load[rows, node_a] -= 1
+        self.node_sum[rows, node_b] += self.shared[ues, new]
+        self.node_load[rows, node_b] += 1
+        self.decisions[rows, ues] = new
@@ -0,0 +1,121 @@
+import torch
+
+
+class RandomWaypointMobility:
+    """
+    Mô hình Random Waypoint: mỗi thực thể đi thẳng tới một điểm đích ngẫu nhiên với vận tốc
+    ngẫu nhiên, tới nơi thì chọn đích mới. Mỗi epoch chỉ một phần thực thể (move_prob) di chuyển,
+    phần còn lại đứng yên (tạm dừng), phù hợp với triển khai thực tế.
+    generator: torch.Generator cho các phép rút ngẫu nhiên (None: RNG toàn cục), tương tự cho các lớp dưới.
+    """
+    def __init__(self, area_size, speed_range=(1.0, 15.0), move_prob=1.0, device="cpu", generator=None):
+        self.area_size = area_size
+        self.speed_range = speed_range
+        self.move_prob = move_prob
+        self.device = device
+        self.generator = generator
+        self.waypoints = None
+
+    def _sample_waypoints(self, n):
+        return torch.rand((n, 2), generator=self.generator, device=self.device) * self.area_size
+
+    def resize(self, keep_idx, num_new):
+        """Đồng bộ trạng thái (điểm đích) khi thực thể rời đi / xuất hiện"""
+        if self.waypoints is None:
+            return
+        self.waypoints = torch.cat([self.waypoints[keep_idx], self._sample_waypoints(num_new)])
+
+    def step(self, positions, dt):
+        """
+        positions: [n, 2] tọa độ (x, y) hiện tại
+        Trả về: (moved_idx [k], new_positions [k, 2]) chỉ cho các thực thể đã di chuyển
+        """
+        n = positions.shape[0]
+        if self.waypoints is None or self.waypoints.shape[0] != n:
+            self.waypoints = self._sample_waypoints(n)
+
+        moving = torch.rand(n, generator=self.generator, device=self.device) < self.move_prob
+        moved_idx = torch.nonzero(moving).squeeze(1)
+        if moved_idx.numel() == 0:
+            return moved_idx, positions[moved_idx]
+
+        low, high = self.speed_range
+        speed = low + (high - low) * torch.rand(moved_idx.numel(), generator=self.generator, device=self.device)
+        delta = self.waypoints[moved_idx] - positions[moved_idx]
+        dist = delta.norm(dim=1)
+        travel = torch.minimum(speed * dt, dist)
+        step = delta * (travel / dist.clamp_min(1e-9)).unsqueeze(1)
+        new_positions = positions[moved_idx] + step
+
+        # Tới đích thì chọn điểm đích mới
+        arrived = travel >= dist
+        if arrived.any():
+            self.waypoints[moved_idx[arrived]] = self._sample_waypoints(int(arrived.sum()))
+        return moved_idx, new_positions
+
+
+class GaussMarkovMobility:
+    """
+    Mô hình Gauss-Markov cho UAV: vận tốc có tương quan theo thời gian (alpha),
+    phản xạ tại biên vùng phủ sóng.
+    """
+    def __init__(self, area_size, mean_speed=10.0, alpha=0.8, sigma=2.0, device="cpu", generator=None):
+        self.area_size = area_size
+        self.mean_speed = mean_speed
+        self.alpha = alpha
+        self.sigma = sigma
+        self.device = device
+        self.generator = generator
+        self.velocity = None
+        self.mean_velocity = None
+
+    def _sample_velocity(self, n):
+        angle = torch.rand(n, generator=self.generator, device=self.device) * 2 * torch.pi
+        return self.mean_speed * torch.stack([torch.cos(angle), torch.sin(angle)], dim=1)
+
+    def resize(self, keep_idx, num_new):
+        if self.velocity is None:
+            return
+        new_velocity = self._sample_velocity(num_new)
+        self.velocity = torch.cat([self.velocity[keep_idx], new_velocity])
+        self.mean_velocity = torch.cat([self.mean_velocity[keep_idx], new_velocity])
+
+    def step(self, positions, dt):
+        n = positions.shape[0]
+        if self.velocity is None or self.velocity.shape[0] != n:
+            self.velocity = self._sample_velocity(n)
+            self.mean_velocity = self.velocity.clone()
+
+        # v_t = alpha * v_{t-1} + (1 - alpha) * v_mean + sqrt(1 - alpha^2) * sigma * w
+        noise = torch.randn((n, 2), generator=self.generator, device=self.device) * self.sigma
+        self.velocity = self.alpha * self.velocity + (1 - self.alpha) * self.mean_velocity + (1 - self.alpha**2) ** 0.5 * noise
+        new_positions = positions + self.velocity * dt
+
+        # Phản xạ tại biên
+        out = (new_positions < 0) | (new_positions > self.area_size)
+        self.velocity[out] = -self.velocity[out]
+        self.mean_velocity[out] = -self.mean_velocity[out]
+        new_positions = new_positions.clamp(0, self.area_size)
+        return torch.arange(n, device=self.device), new_positions
+
+
+class TaskArrivalProcess:
+    """
+    Biến động UE và task theo epoch:
+    - mỗi UE rời mạng với xác suất depart_prob
+    - số UE mới đến ~ Poisson(arrival_rate)
+    - mỗi UE còn lại phát sinh task mới với xác suất new_task_prob
+    """
+    def __init__(self, depart_prob=0.02, arrival_rate=4.0, new_task_prob=0.05, device="cpu", generator=None):
+        self.depart_prob = depart_prob
+        self.arrival_rate = arrival_rate
+        self.new_task_prob = new_task_prob
+        self.device = device
+        self.generator = generator
+
+    def sample(self, num_ue):
+        """Trả về (keep_idx, new_task_idx trong tập giữ lại, num_new)"""
+        keep_idx = torch.nonzero(torch.rand(num_ue, generator=self.generator, device=self.device) >= self.depart_prob).squeeze(1)
+        new_task_idx = torch.nonzero(torch.rand(keep_idx.numel(), generator=self.generator, device=self.device) < self.new_task_prob).squeeze(1)
+        num_new = int(torch.poisson(torch.tensor([self.arrival_rate], device=self.device), generator=self.generator).item())
+        return keep_idx, new_task_idx, num_new
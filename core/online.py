@@ -0,0 +1,106 @@
+import copy
+import torch
+from core.sagin_env import SAGINEnv
+
+
+class OnlineSAGIN:
+    """
+    Chế độ theo epoch cho SAGINEnv: UE/UAV di chuyển, UE rời đi / đến mới và task mới phát sinh.
+    Env được cập nhật in-place; chỉ các hàng bảng chi phí của UE thay đổi được tính lại
+    (trừ khi UAV di chuyển, khi đó toàn bộ bảng được dựng lại).
+    """
+    def __init__(self, env, ue_mobility=None, uav_mobility=None, arrivals=None, epoch_duration=1.0):
+        self.env = env
+        self.ue_mobility = ue_mobility
+        self.uav_mobility = uav_mobility
+        self.arrivals = arrivals
+        self.epoch_duration = epoch_duration
+        self.epoch = 0
+        self.last_stats = {}
+
+    def advance(self):
+        """
+        Chuyển sang epoch kế tiếp.
+        Trả về (keep_idx, num_new): chỉ số các UE cũ còn lại (theo thứ tự mới) và số UE mới nối vào cuối,
+        dùng để warm-start optimizer của epoch trước.
+        """
+        env = self.env
+        num_ue = env.num_ue
+        stats = {"moved": 0, "departed": 0, "arrived": 0, "new_tasks": 0}
+
+        # 1. UE di chuyển: chỉ cập nhật các hàng của UE đã di chuyển
+        if self.ue_mobility is not None:
+            moved_idx, new_xy = self.ue_mobility.step(env.ue_pos[:, :2], self.epoch_duration)
+            if moved_idx.numel() > 0:
+                env.update_ues(moved_idx, positions=new_xy)
+            stats["moved"] = moved_idx.numel()
+
+        # 2. UE rời mạng, task mới, UE mới đến
+        keep_idx = torch.arange(num_ue, device=env.device)
+        num_new = 0
+        if self.arrivals is not None:
+            keep_idx, new_task_idx, num_new = self.arrivals.sample(num_ue)
+            if keep_idx.numel() < num_ue:
+                env.remove_ues(keep_idx)
+            if new_task_idx.numel() > 0:
+                env.update_ues(new_task_idx, task_data_bits=env.sample_task_bits(new_task_idx.numel()))
+            if num_new > 0:
+                new_xy = torch.rand((num_new, 2), generator=env.generator, device=env.device) * env.config.AREA_SIZE
+                env.add_ues(new_xy, env.sample_task_bits(num_new))
+            if self.ue_mobility is not None:
+                self.ue_mobility.resize(keep_idx, num_new)
+            stats.update(departed=num_ue - keep_idx.numel(), arrived=num_new, new_tasks=new_task_idx.numel())
+
+        # 3. UAV di chuyển (bảng chi phí tự động dựng lại ở lần tra kế tiếp)
+        if self.uav_mobility is not None:
+            moved_idx, new_xy = self.uav_mobility.step(env.uav_pos[:, :2], self.epoch_duration)
+            env.move_uavs(moved_idx, new_xy)
+
+        self.epoch += 1
+        # Chòm vệ tinh LEO: vị trí / mask nhìn thấy tra từ bảng ephemeris của epoch mới
+        if env.constellation is not None:
+            env.set_epoch(self.epoch)
+        self.last_stats = stats
+        return keep_idx, num_new
+
+
+def env_from_snapshot(config, scenario_name, seed, positions, task_bits, **scenario_params):
+    """
+    SAGINEnv với UE tại positions [n, 2] và task task_bits [n] lấy từ dữ liệu ngoài (snapshot, trace)
+    thay cho vị trí / task ngẫu nhiên; UAV / LEO vẫn sinh từ seed. scenario_params ghi đè kịch bản (vd. trọng số).
+    """
+    config = copy.copy(config).override_scenario(scenario_name, num_ue=positions.shape[0], **scenario_params)
+    env = SAGINEnv(config, scenario_name=scenario_name, seed=seed)
+    env.ue_pos[:, :2] = positions
+    env.task_data_bits = task_bits
+    env.task_cycles = task_bits * config.CYCLES_PER_BIT
+    return env
+
+
+def sync_ues(env, env_ids, ids, positions, task_bits):
+    """
+    Đưa env (UE theo thứ tự env_ids) về tập UE ids với vị trí positions [n, 2] / task task_bits [n] mới:
+    UE không còn trong ids bị cắt, UE mới được nối vào cuối, UE còn lại chỉ tính lại hàng khi vị trí / task đổi.
+    Trả về (new_env_ids, keep_idx, num_new, order) với order[k] là vị trí trong ids của UE thứ k của env;
+    keep_idx / num_new dùng để warm-start optimizer như OnlineSAGIN.advance.
+    """
+    device = env.device
+    index = {ue: i for i, ue in enumerate(ids)}
+    keep = [i for i, ue in enumerate(env_ids) if ue in index]
+    known = set(env_ids)
+    new_ids = [ue for ue in ids if ue not in known]
+    keep_idx = torch.tensor(keep, dtype=torch.long, device=device)
+    if len(keep) < env.num_ue:
+        env.remove_ues(keep_idx)
+    new_env_ids = [env_ids[i] for i in keep] + new_ids
+    order = torch.tensor([index[ue] for ue in new_env_ids], dtype=torch.long, device=device)
+
+    kept = order[:len(keep)]
+    changed = torch.nonzero((env.ue_pos[:, :2] != positions[kept]).any(dim=1)
+                            | (env.task_data_bits != task_bits[kept])).squeeze(1)
+    if changed.numel() > 0:
+        env.update_ues(changed, positions=positions[kept[changed]], task_data_bits=task_bits[kept[changed]])
+    if new_ids:
+        new = order[len(keep):]
+        env.add_ues(positions[new], task_bits[new])
+    return new_env_ids, keep_idx, len(new_ids), order
@@ -0,0 +1,20 @@
+import numpy as np
+import torch
+
+
+def make_generator(seed, device="cpu"):
+    """Generator riêng trên device khởi tạo từ seed (cùng dãy số với torch.manual_seed(seed))"""
+    return torch.Generator(device=device).manual_seed(int(seed))
+
+
+def spawn_generators(root_seed, n, device="cpu"):
+    """n Generator có luồng số độc lập, sinh tất định từ root_seed qua numpy SeedSequence"""
+    children = np.random.SeedSequence(root_seed).spawn(n)
+    return [make_generator(int(child.generate_state(1, dtype=np.uint64)[0] >> 1), device) for child in children]
+
+
+def clone_generator(generator):
+    """Bản sao độc lập của generator ở đúng trạng thái hiện tại"""
+    clone = torch.Generator(device=generator.device)
+    clone.set_state(generator.get_state())
+    return clone
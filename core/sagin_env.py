@@ -1,17 +1,53 @@
+import math
 import torch
+from core.constellation import LEOConstellation
+from core.encoding import decode
+from core.rng import make_generator
+from core.spatial_index import UAVGridIndex
 
 class SAGINEnv:
-    def __init__(self, config, scenario_name="urban_iot", seed=42):
+    # Các bảng theo hàng UE, được cắt / nối / vá cùng nhau khi UE thay đổi
+    _ROW_TABLES = ("latency_table", "energy_table", "latency_fixed_table", "node_table")
+
+    def __init__(self, config, scenario_name="urban_iot", seed=42, contention=False, chunk_size=None,
+                 generator=None):
+        """
+        generator: torch.Generator cho mọi phép rút ngẫu nhiên của env (mặc định: Generator riêng từ seed,
+        cho cùng dãy số với torch.manual_seed(seed) trước đây). Optimizer mặc định rút tiếp từ generator này.
+        contention=True: tài nguyên tính toán (F_UAV, F_LEO) và băng thông của mỗi node được chia đều
+        (chia sẻ theo thời gian) cho các UE cùng offload lên node đó. Mỗi UE vẫn phát ở tốc độ đầy đủ
+        trong khe của mình nên năng lượng upload không đổi; chỉ độ trễ (thời gian chờ) tăng theo tải.
+        chunk_size: nếu đặt, compute_cost / compute_objectives duyệt UE theo khối chunk_size
+        và cộng dồn theo từng cá thể, không tạo tensor [pop_size, num_ue] đầy đủ.
+        """
         self.config = config
         self.scenario = config.SCENARIOS[scenario_name]
         self.device = config.DEVICE
+        self.contention = contention
+        self.chunk_size = chunk_size
 
-        # Thiết lập seed để đảm bảo tính tái lập (Reproducibility)
-        torch.manual_seed(seed)
+        # Thiết lập seed để đảm bảo tính tái lập (Reproducibility): RNG riêng, không đụng RNG toàn cục
+        self.generator = generator if generator is not None else make_generator(seed, self.device)
 
         # 1. Khởi tạo vị trí các thực thể
         self._initialize_positions()
 
+        # Bảng chi phí [num_ue, 3] được cache, tự động tính lại khi vị trí/task thay đổi
+        self._table_key = None
+        self._cost_key = None
+        self._contention_tables = None
+        self._packed_tables = {}
+        self._uav_index = None
+        self._uav_index_key = None
+
+        # Chế độ chòm vệ tinh: vị trí LEO và mask nhìn thấy tra từ bảng ephemeris theo epoch
+        self.epoch = 0
+        self.leo_visible = None
+        self.constellation = None
+        if config.LEO_MODE == "constellation":
+            self.constellation = LEOConstellation(config, config.LEO_HORIZON, config.LEO_EPOCH_SECONDS)
+            self.set_epoch(0)
+
     def _initialize_positions(self):
         """
         Khởi tạo tọa độ (x, y, z) cho UE, UAV và LEO
@@ -23,12 +59,12 @@ class SAGINEnv:
         # UE: Phân bố ngẫu nhiên trên mặt đất (z=0) trong vùng AREA_SIZE x AREA_SIZE
         # Tọa độ UE: [num_ue, 3] -> (x, y, 0)
         self.ue_pos = torch.zeros((num_ue, 3), device=self.device)
-        self.ue_pos[:, :2] = torch.rand((num_ue, 2), device=self.device) * self.config.AREA_SIZE
+        self.ue_pos[:, :2] = torch.rand((num_ue, 2), generator=self.generator, device=self.device) * self.config.AREA_SIZE
 
         # UAV: Giả định ban đầu đứng ở độ cao UAV_HEIGHT, phân bố đều hoặc ngẫu nhiên
         # Tọa độ UAV: [num_uav, 3] -> (x, y, h_uav)
         self.uav_pos = torch.zeros((num_uav, 3), device=self.device)
-        self.uav_pos[:, :2] = torch.rand((num_uav, 2), device=self.device) * self.config.AREA_SIZE
+        self.uav_pos[:, :2] = torch.rand((num_uav, 2), generator=self.generator, device=self.device) * self.config.AREA_SIZE
         self.uav_pos[:, 2] = self.config.UAV_HEIGHT
 
         # LEO: Giả định vệ tinh ở ngay trung tâm vùng phủ sóng ở độ cao cực lớn
@@ -37,118 +73,481 @@ class SAGINEnv:
             [self.config.AREA_SIZE/2, self.config.AREA_SIZE/2, self.config.LEO_HEIGHT]
         ], device=self.device)
 
-    def get_distances(self):
+    def set_epoch(self, epoch):
+        """
+        Chuyển chòm vệ tinh tới epoch (chỉ số trong bảng ephemeris); bảng chi phí tự động dựng lại
+        ở lần tra kế tiếp. Không có tác dụng ở chế độ LEO tĩnh.
+        """
+        self.epoch = epoch
+        if self.constellation is None:
+            return
+        positions, visible = self.constellation.epoch(epoch)
+        self.leo_pos = torch.from_numpy(positions).to(self.device)
+        self.leo_visible = torch.from_numpy(visible).to(self.device)
+
+    @property
+    def num_ue(self):
+        return self.ue_pos.shape[0]
+
+    def get_distances(self, ue_pos=None):
         """
         Tính toán ma trận khoảng cách Euclidean
         Sử dụng torch.cdist để tính toán vectorized cực nhanh
+        ue_pos: tập con UE cần tính (mặc định: toàn bộ self.ue_pos)
         """
+        if ue_pos is None:
+            ue_pos = self.ue_pos
+
         # Khoảng cách UE tới các UAV: Kết quả là ma trận [num_ue, num_uav]
-        dist_ue_uav = torch.cdist(self.ue_pos, self.uav_pos)
+        dist_ue_uav = torch.cdist(ue_pos, self.uav_pos)
 
         # Khoảng cách UE tới LEO: Kết quả là ma trận [num_ue, 1]
-        dist_ue_leo = torch.cdist(self.ue_pos, self.leo_pos)
+        dist_ue_leo = torch.cdist(ue_pos, self.leo_pos)
 
         # Khoảng cách UAV tới LEO: Kết quả là ma trận [num_uav, 1]
         dist_uav_leo = torch.cdist(self.uav_pos, self.leo_pos)
 
         return dist_ue_uav, dist_ue_leo, dist_uav_leo
 
-    def get_channel_rates(self):
-        dist_ue_uav, dist_ue_leo, _ = self.get_distances()
-
+    def _link_rate(self, dist, fc, g_rx):
+        """Tốc độ kênh (bps) theo khoảng cách cho một loại liên kết (tần số fc, độ lợi thu g_rx)"""
         # 1. Path Loss (FSPL)
-        def calc_pl(dist, fc):
-            return 20 * torch.log10(dist) + 20 * torch.log10(torch.tensor(fc)) + \
-                   20 * torch.log10(torch.tensor(4 * 3.14159 / self.config.C_LIGHT))
-
-        pl_ue_uav = calc_pl(dist_ue_uav, self.config.FC_UAV)
-        pl_ue_leo = calc_pl(dist_ue_leo, self.config.FC_LEO)
+        pl = 20 * torch.log10(dist) + 20 * torch.log10(torch.tensor(fc)) + \
+             20 * torch.log10(torch.tensor(4 * 3.14159 / self.config.C_LIGHT))
 
         # 2. Received Power (dBm) = P_tx + G_ue + G_rx - PL
         p_tx_dbm = 10 * torch.log10(torch.tensor(self.config.P_TRANSMIT_UE * 1000))
-
-        p_rx_uav_dbm = p_tx_dbm + self.config.G_UE + self.config.G_UAV - pl_ue_uav
-        p_rx_leo_dbm = p_tx_dbm + self.config.G_UE + self.config.G_LEO - pl_ue_leo
+        p_rx_dbm = p_tx_dbm + self.config.G_UE + g_rx - pl
 
         # Watts
-        p_rx_uav = 10**(p_rx_uav_dbm / 10) / 1000
-        p_rx_leo = 10**(p_rx_leo_dbm / 10) / 1000
+        p_rx = 10**(p_rx_dbm / 10) / 1000
 
         # 3. Noise & Rate
         noise = self.config.BOLTZMANN * self.config.TEMPERATURE * self.config.BANDWIDTH
+        return self.config.BANDWIDTH * torch.log2(1 + p_rx / noise)
 
-        rate_uav = self.config.BANDWIDTH * torch.log2(1 + p_rx_uav / noise)
-        rate_leo = self.config.BANDWIDTH * torch.log2(1 + p_rx_leo / noise)
-
+    def get_channel_rates(self, ue_pos=None):
+        dist_ue_uav, dist_ue_leo, _ = self.get_distances(ue_pos)
+        rate_uav = self._link_rate(dist_ue_uav, self.config.FC_UAV, self.config.G_UAV)
+        rate_leo = self._link_rate(dist_ue_leo, self.config.FC_LEO, self.config.G_LEO)
         return rate_uav, rate_leo
+
+    def get_leo_links(self, ue_pos=None):
+        """
+        Vệ tinh phục vụ của mỗi UE: vệ tinh nhìn thấy (góc ngẩng >= LEO_MIN_ELEVATION) có tốc độ tốt nhất.
+        Trả về: (rate [n], dist [n], best_sat [n], visible [n]); visible = False nghĩa là mất liên lạc LEO.
+        """
+        if ue_pos is None:
+            ue_pos = self.ue_pos
+        if self.constellation is None:
+            dist = torch.cdist(ue_pos, self.leo_pos)[:, 0]
+            rate = self._link_rate(dist, self.config.FC_LEO, self.config.G_LEO)
+            best_sat = torch.zeros(ue_pos.shape[0], dtype=torch.long, device=ue_pos.device)
+            return rate, dist, best_sat, torch.ones_like(best_sat, dtype=torch.bool)
+
+        # Chỉ xét các vệ tinh nhìn thấy từ vùng phủ sóng ở epoch hiện tại
+        cand = torch.nonzero(self.leo_visible).squeeze(1)
+        n = ue_pos.shape[0]
+        if cand.numel() == 0:
+            ones = torch.ones(n, device=ue_pos.device)
+            return ones, ones, torch.zeros(n, dtype=torch.long, device=ue_pos.device), torch.zeros(n, dtype=torch.bool, device=ue_pos.device)
+        sat_pos = self.leo_pos[cand]
+        dist = torch.cdist(ue_pos, sat_pos) # [n, V]
+        elevation_ok = (sat_pos[:, 2] - ue_pos[:, 2:3]) / dist >= math.sin(math.radians(self.config.LEO_MIN_ELEVATION))
+        rate = self._link_rate(dist, self.config.FC_LEO, self.config.G_LEO).masked_fill(~elevation_ok, 0.0)
+        best_rate, best = torch.max(rate, dim=1)
+        best_dist = torch.gather(dist, 1, best.unsqueeze(1)).squeeze(1)
+        return best_rate, best_dist, cand[best], elevation_ok.any(dim=1)
+
+    def _use_uav_index(self):
+        return self.uav_pos.shape[0] >= self.config.UAV_INDEX_MIN_UAV
+
+    def get_uav_index(self):
+        """Chỉ mục lưới UAV, dựng lại khi uav_pos bị thay thế / sửa in-place ngoài move_uavs"""
+        key = (id(self.uav_pos), self.uav_pos._version)
+        if self._uav_index is None or self._uav_index_key != key:
+            cell = self.config.UAV_GRID_CELL or self.config.AREA_SIZE / self.uav_pos.shape[0] ** 0.5
+            self._uav_index = UAVGridIndex(self.config.AREA_SIZE, cell, self.device)
+            self._uav_index.build(self.uav_pos[:, :2])
+            self._uav_index_key = key
+        return self._uav_index
+
+    def move_uavs(self, idx, positions):
+        """
+        Di chuyển các UAV idx tới positions [k, 2] (x, y). Chỉ mục lưới được cập nhật tăng dần;
+        bảng chi phí tự động dựng lại ở lần tra kế tiếp.
+        """
+        index = self.get_uav_index() if self._use_uav_index() else None
+        self.uav_pos[idx, :2] = positions
+        if index is not None:
+            index.update(idx, positions)
+            self._uav_index_key = (id(self.uav_pos), self.uav_pos._version)
+
+    def get_uav_links(self, ue_pos=None):
+        """
+        UAV phục vụ của mỗi UE (tốc độ tốt nhất) và tốc độ tương ứng: (best_rate [n], best_uav [n]).
+        Với nhiều UAV, tốc độ chỉ được tính trên UAV_ASSOC_K UAV gần nhất tìm qua chỉ mục lưới.
+        """
+        if ue_pos is None:
+            ue_pos = self.ue_pos
+        if not self._use_uav_index():
+            rate_uav, _ = self.get_channel_rates(ue_pos)
+            return torch.max(rate_uav, dim=1)
+
+        cand, _ = self.get_uav_index().query(ue_pos[:, :2], self.config.UAV_ASSOC_K) # [n, k]
+        dist = (ue_pos.unsqueeze(1) - self.uav_pos[cand]).norm(dim=-1)
+        rate = self._link_rate(dist, self.config.FC_UAV, self.config.G_UAV)
+        best_rate, best = torch.max(rate, dim=1)
+        return best_rate, torch.gather(cand, 1, best.unsqueeze(1)).squeeze(1)
     
     def generate_tasks(self):
         """
         Tạo task cho từng UE dựa trên kịch bản
         Mỗi task có: Data Size (bits) và Total Cycles cần thiết
         """
-        min_size, max_size = self.scenario["task_data_size"]
-        num_ue = self.scenario["num_ue"]
-        
-        # Kích thước dữ liệu ngẫu nhiên (chuyển từ MB sang bits)
-        # [num_ue]
-        task_data_mb = min_size + (max_size - min_size) * torch.rand(num_ue, device=self.device)
-        self.task_data_bits = task_data_mb * 1024 * 1024 * 8
+        self.task_data_bits = self.sample_task_bits(self.scenario["num_ue"])
         
         # Tổng số chu kỳ CPU cần để xử lý các bits này
         self.task_cycles = self.task_data_bits * self.config.CYCLES_PER_BIT
-        
+
+        # Dựng sẵn bảng chi phí một lần, các thế hệ sau chỉ cần tra bảng
+        self.get_cost_table()
+
         return self.task_data_bits, self.task_cycles
-    
-    def compute_cost(self, decisions):
+
+    def sample_task_bits(self, num_ue):
+        """Kích thước dữ liệu ngẫu nhiên (chuyển từ MB sang bits): [num_ue]"""
+        min_size, max_size = self.scenario["task_data_size"]
+        task_data_mb = min_size + (max_size - min_size) * torch.rand(num_ue, generator=self.generator, device=self.device)
+        return task_data_mb * 1024 * 1024 * 8
+
+    def _source_key(self):
         """
-        Tính toán chi phí cho một quần thể các lời giải.
-        decisions: Tensor [population_size, num_ue] chứa các giá trị {0, 1, 2}
+        Khóa nhận diện dữ liệu nguồn của bảng chi phí.
+        Giữ tham chiếu tới tensor (phát hiện gán lại) kèm _version (phát hiện sửa in-place).
+        """
+        tensors = (self.ue_pos, self.uav_pos, self.leo_pos, self.task_data_bits, self.task_cycles)
+        return tensors, tuple(t._version for t in tensors)
+
+    def share_memory(self):
+        """
+        Dựng sẵn các bảng rồi chuyển mọi tensor sang bộ nhớ chia sẻ: khi env được gửi sang process khác
+        (torch.multiprocessing), các bảng chỉ được ánh xạ chứ không sao chép.
+        """
+        self.get_contention_tables()
+        for value in self.__dict__.values():
+            tables = value if isinstance(value, tuple) else (value,)
+            for t in tables:
+                if isinstance(t, torch.Tensor):
+                    t.share_memory_()
+        return self
+
+    def __getstate__(self):
+        # Tensor sau khi unpickle là đối tượng mới (_version = 0): ghi nhớ bảng còn khớp nguồn hay không
+        state = self.__dict__.copy()
+        state["_tables_fresh"] = not self._is_stale(self._source_key(), self._table_key)
+        state["_table_key"] = None
+        # Trạng thái Generator gửi dạng bytes: tensor trạng thái tạm thời không dùng được bộ nhớ chia sẻ
+        state["generator"] = (str(self.generator.device), self.generator.get_state().numpy().tobytes())
+        return state
+
+    def __setstate__(self, state):
+        fresh = state.pop("_tables_fresh")
+        device, rng_state = state.pop("generator")
+        self.__dict__.update(state)
+        self.generator = torch.Generator(device=device)
+        self.generator.set_state(torch.frombuffer(bytearray(rng_state), dtype=torch.uint8))
+        if fresh:
+            self._table_key = self._source_key()
+
+    def _is_stale(self, key, cached):
+        if cached is None:
+            return True
+        tensors, versions = key
+        cached_tensors, cached_versions = cached
+        return versions != cached_versions or any(a is not b for a, b in zip(tensors, cached_tensors))
+
+    def get_objective_tables(self):
+        """
+        Bảng độ trễ và năng lượng theo từng UE cho 3 lựa chọn {0: local, 1: UAV, 2: LEO}
+        Trả về: (latency_table, energy_table), mỗi bảng [num_ue, 3]
+        """
+        key = self._source_key()
+        if self._is_stale(key, self._table_key):
+            self._build_objective_tables()
+            self._table_key = key
+            self._cost_key = None
+        return self.latency_table, self.energy_table
+
+    def _build_objective_tables(self):
+        rows = self._objective_rows(self.ue_pos, self.task_data_bits, self.task_cycles)
+        for name, table in zip(self._ROW_TABLES, rows):
+            setattr(self, name, table)
+        self._refresh_offsets()
+
+    @property
+    def num_nodes(self):
+        """Số node tính toán: 0 = xử lý tại chỗ, 1..NUM_UAV = các UAV, tiếp theo là LEO"""
+        return 1 + self.uav_pos.shape[0] + self.leo_pos.shape[0]
+
+    def _refresh_offsets(self):
+        # Offset phẳng để tra bảng bằng một phép gather: idx = ue * 3 + decision
+        self._flat_offsets = torch.arange(self.latency_table.shape[0], device=self.latency_table.device) * 3
+        self._packed_offsets = self._flat_offsets // 3 * 4
+
+    def _objective_rows(self, ue_pos, task_data_bits, task_cycles):
+        """
+        Tính các hàng của bảng độ trễ / năng lượng cho một tập UE.
+        Trả về: (latency [k, 3], energy [k, 3], latency_fixed [k, 3], node [k, 3])
+        latency_fixed: phần độ trễ không bị chia sẻ tài nguyên (xử lý tại chỗ, trễ lan truyền LEO)
+        node: chỉ số node phục vụ của từng lựa chọn
         """
-        pop_size, num_ue = decisions.shape
-        rate_uav, rate_leo = self.get_channel_rates() # [num_ue, num_uav] và [num_ue, 1]
-        dist_ue_uav, dist_ue_leo, _ = self.get_distances()
+        rate_leo, dist_ue_leo, best_sat, leo_visible = self.get_leo_links(ue_pos) # [k]
+        # UE không thấy vệ tinh nào: tránh chia cho 0, chi phí LEO được thay bằng mức phạt bên dưới
+        rate_leo = torch.where(leo_visible, rate_leo, torch.ones_like(rate_leo))
 
-        # Giả sử mỗi UE kết nối với UAV gần nhất nếu chọn offload lên UAV
-        best_rate_uav, _ = torch.max(rate_uav, dim=1) # [num_ue]
-        best_dist_uav, _ = torch.min(dist_ue_uav, dim=1)
+        # Giả sử mỗi UE kết nối với UAV có tốc độ tốt nhất (cũng là UAV gần nhất)
+        best_rate_uav, best_uav = self.get_uav_links(ue_pos) # [num_ue]
 
-        # 1. Tính Độ trễ (Latency) cho 3 trường hợp [pop_size, num_ue]
+        # 1. Độ trễ (Latency)
         # T_local
-        t_local = self.task_cycles / self.config.F_UE
-        
+        t_local = task_cycles / self.config.F_UE
         # T_uav = truyền dẫn + xử lý
-        t_uav = (self.task_data_bits / best_rate_uav) + (self.task_cycles / self.config.F_UAV)
-        
+        t_uav = (task_data_bits / best_rate_uav) + (task_cycles / self.config.F_UAV)
         # T_leo = truyền dẫn + xử lý + 2*trễ lan truyền
-        t_prop_leo = dist_ue_leo.squeeze() / self.config.C_LIGHT
-        t_leo = (self.task_data_bits / rate_leo.squeeze()) + (self.task_cycles / self.config.F_LEO) + 2 * t_prop_leo
+        t_prop_leo = dist_ue_leo / self.config.C_LIGHT
+        t_leo = (task_data_bits / rate_leo) + (task_cycles / self.config.F_LEO) + 2 * t_prop_leo
 
-        # 2. Tính Năng lượng (Energy) [pop_size, num_ue]
+        # 2. Năng lượng (Energy)
         # E_local = kappa * f^2 * cycles
-        e_local = self.config.KAPPA * (self.config.F_UE**2) * self.task_cycles
-        
+        e_local = self.config.KAPPA * (self.config.F_UE**2) * task_cycles
         # E_uav = P_tx * T_upload
-        e_uav = self.config.P_TRANSMIT_UE * (self.task_data_bits / best_rate_uav)
-        
+        e_uav = self.config.P_TRANSMIT_UE * (task_data_bits / best_rate_uav)
         # E_leo = P_tx * T_upload
-        e_leo = self.config.P_TRANSMIT_UE * (self.task_data_bits / rate_leo.squeeze())
+        e_leo = self.config.P_TRANSMIT_UE * (task_data_bits / rate_leo)
+
+        # Mất liên lạc LEO: không truyền được (năng lượng 0), độ trễ phạt cố định LEO_OUTAGE_PENALTY
+        if not bool(leo_visible.all()):
+            penalty = torch.full_like(t_leo, self.config.LEO_OUTAGE_PENALTY)
+            t_leo = torch.where(leo_visible, t_leo, penalty)
+            e_leo = torch.where(leo_visible, e_leo, torch.zeros_like(e_leo))
+            t_prop_leo = torch.where(leo_visible, t_prop_leo, penalty / 2)
+
+        latency = torch.stack([t_local, t_uav, t_leo], dim=1)
+        energy = torch.stack([e_local, e_uav, e_leo], dim=1)
+        latency_fixed = torch.stack([t_local, torch.zeros_like(t_uav), 2 * t_prop_leo], dim=1)
+        node = torch.stack([
+            torch.zeros_like(best_uav),
+            1 + best_uav,
+            1 + self.uav_pos.shape[0] + best_sat
+        ], dim=1)
+        return latency, energy, latency_fixed, node
 
-        # 3. Tổng hợp dựa trên decisions
-        # Tạo mask cho từng loại quyết định
-        mask_local = (decisions == 0).float()
-        mask_uav = (decisions == 1).float()
-        mask_leo = (decisions == 2).float()
+    def _commit_tables(self):
+        # Đánh dấu bảng đã khớp với dữ liệu nguồn hiện tại sau khi cập nhật từng phần
+        self._table_key = self._source_key()
+        self._cost_key = None
+
+    def update_ues(self, idx, positions=None, task_data_bits=None):
+        """
+        Cập nhật in-place vị trí (x, y) và/hoặc task của các UE idx.
+        Chỉ tính lại các hàng khoảng cách / tốc độ / chi phí của những UE này.
+        """
+        self.get_objective_tables()
+        if positions is not None:
+            self.ue_pos[idx, :positions.shape[1]] = positions
+        if task_data_bits is not None:
+            self.task_data_bits[idx] = task_data_bits
+            self.task_cycles[idx] = task_data_bits * self.config.CYCLES_PER_BIT
+        rows = self._objective_rows(self.ue_pos[idx], self.task_data_bits[idx], self.task_cycles[idx])
+        for name, table in zip(self._ROW_TABLES, rows):
+            getattr(self, name)[idx] = table
+        self._commit_tables()
 
-        total_latency = (mask_local * t_local + mask_uav * t_uav + mask_leo * t_leo)
-        total_energy = (mask_local * e_local + mask_uav * e_uav + mask_leo * e_leo)
+    def remove_ues(self, keep_idx):
+        """Giữ lại các UE keep_idx (các UE khác rời mạng), bảng chi phí được cắt theo hàng"""
+        self.get_objective_tables()
+        self.ue_pos = self.ue_pos[keep_idx]
+        self.task_data_bits = self.task_data_bits[keep_idx]
+        self.task_cycles = self.task_cycles[keep_idx]
+        for name in self._ROW_TABLES:
+            setattr(self, name, getattr(self, name)[keep_idx])
+        self._refresh_offsets()
+        self._commit_tables()
 
-        # 4. Tính Weighted Cost cho từng UE
+    def add_ues(self, positions, task_data_bits):
+        """
+        Thêm UE mới vào cuối: positions [k, 2] (x, y trên mặt đất), task_data_bits [k]
+        Chỉ tính các hàng bảng chi phí của UE mới.
+        """
+        self.get_objective_tables()
+        new_pos = torch.zeros((positions.shape[0], 3), device=self.device)
+        new_pos[:, :2] = positions
+        task_cycles = task_data_bits * self.config.CYCLES_PER_BIT
+        rows = self._objective_rows(new_pos, task_data_bits, task_cycles)
+        self.ue_pos = torch.cat([self.ue_pos, new_pos])
+        self.task_data_bits = torch.cat([self.task_data_bits, task_data_bits])
+        self.task_cycles = torch.cat([self.task_cycles, task_cycles])
+        for name, table in zip(self._ROW_TABLES, rows):
+            setattr(self, name, torch.cat([getattr(self, name), table]))
+        self._refresh_offsets()
+        self._commit_tables()
+
+    def get_cost_table(self):
+        """
+        Bảng chi phí có trọng số [num_ue, 3]: w_L * T + w_E * E
+        """
+        latency_table, energy_table = self.get_objective_tables()
         w_l = self.scenario["w_latency"]
         w_e = self.scenario["w_energy"]
-        
+        if self._cost_key != (w_l, w_e):
+            self.cost_table = w_l * latency_table + w_e * energy_table
+            self._contention_tables = None
+            self._packed_tables = {}
+            self._cost_key = (w_l, w_e)
+        return self.cost_table
+
+    def get_packed_cost_table(self, lut):
+        """
+        Bảng chi phí theo code quan sát nén [num_ue, 4]: packed[i, c] = cost_table[i, lut[c]]
+        Giúp chấm trực tiếp code uint8 của QGA mà không cần giải mã ra quyết định.
+        """
+        cost_table = self.get_cost_table()
+        key = tuple(lut.tolist())
+        if key not in self._packed_tables:
+            self._packed_tables[key] = cost_table[:, lut.long()]
+        return self._packed_tables[key]
+
+    def get_contention_tables(self):
+        """
+        Tách bảng chi phí thành phần cố định và phần bị chia sẻ theo tải của node:
+            cost = (sum_i fixed[i, d_i] + sum_j n_j * sum_{i -> j} shared[i, d_i]) / num_ue
+        với n_j là số UE cùng chọn node j. Chia sẻ theo thời gian: chỉ độ trễ truyền dẫn + xử lý bị nhân n_j,
+        năng lượng upload (P_tx * data / rate, phát trong khe riêng) nằm trọn trong fixed.
+        Khi không bật contention: fixed = cost_table, shared = 0.
+        Trả về: (fixed [num_ue, 3], shared [num_ue, 3], node [num_ue, 3])
+        """
+        cost_table = self.get_cost_table()
+        if self._contention_tables is None:
+            if self.contention:
+                w_l = self.scenario["w_latency"]
+                w_e = self.scenario["w_energy"]
+                fixed = w_l * self.latency_fixed_table + w_e * self.energy_table
+                shared = w_l * (self.latency_table - self.latency_fixed_table)
+                self._contention_tables = (fixed, shared, self.node_table)
+            else:
+                self._contention_tables = (cost_table, torch.zeros_like(cost_table), torch.zeros_like(self.node_table))
+        return self._contention_tables
+
+    def _load_weighted_sum(self, idx, fixed_table, shared_table):
+        """
+        Tổng theo UE có tính tải node: sum fixed + sum_j n_j * S_j
+        idx: chỉ số phẳng [..., num_ue]. Trả về: [...]
+        """
+        nodes = torch.take(self.node_table, idx)
+        shared = torch.take(shared_table, idx)
+        lead = nodes.shape[:-1]
+        node_sum = torch.zeros(lead + (self.num_nodes,), device=shared.device).scatter_add_(-1, nodes, shared)
+        node_load = torch.zeros(lead + (self.num_nodes,), device=shared.device).scatter_add_(-1, nodes, torch.ones_like(shared))
+        return torch.take(fixed_table, idx).sum(dim=-1) + (node_load * node_sum).sum(dim=-1)
+    
+    def _use_chunks(self, decisions):
+        return self.chunk_size is not None and decisions.shape[-1] > self.chunk_size
+
+    def _chunked_sum(self, decisions, fixed_table, shared_table=None):
+        """
+        Tổng theo UE cho từng cá thể, duyệt UE theo khối chunk_size (bộ nhớ tạm O(pop_size * chunk_size)).
+        shared_table khác None: cộng thêm sum_j n_j * S_j như _load_weighted_sum.
+        Cộng dồn bằng float64 nên khớp đường không chia khối tới sai số làm tròn float32.
+        Trả về: [...] (float64)
+        """
+        lead = decisions.shape[:-1]
+        num_ue = decisions.shape[-1]
+        total = torch.zeros(lead, dtype=torch.float64, device=decisions.device)
+        if shared_table is not None:
+            node_sum = torch.zeros(lead + (self.num_nodes,), dtype=torch.float64, device=decisions.device)
+            node_load = torch.zeros_like(node_sum)
+
+        for start in range(0, num_ue, self.chunk_size):
+            end = min(start + self.chunk_size, num_ue)
+            idx = decisions[..., start:end] + self._flat_offsets[start:end]
+            total += torch.take(fixed_table, idx).sum(dim=-1, dtype=torch.float64)
+            if shared_table is not None:
+                nodes = torch.take(self.node_table, idx)
+                shared = torch.take(shared_table, idx).double()
+                node_sum.scatter_add_(-1, nodes, shared)
+                node_load.scatter_add_(-1, nodes, torch.ones_like(shared))
+
+        if shared_table is not None:
+            total += (node_load * node_sum).sum(dim=-1)
+        return total
+
+    def compute_objectives(self, decisions):
+        """
+        Tổng độ trễ và tổng năng lượng của toàn mạng cho từng cá thể.
+        decisions: Tensor [..., num_ue] chứa các giá trị {0, 1, 2}
+        Trả về: (total_latency, total_energy), mỗi tensor [...]
+        """
+        latency_table, energy_table = self.get_objective_tables()
+        if self._use_chunks(decisions):
+            if self.contention:
+                total_latency = self._chunked_sum(decisions, self.latency_fixed_table, latency_table - self.latency_fixed_table)
+            else:
+                total_latency = self._chunked_sum(decisions, latency_table)
+            # Năng lượng không phụ thuộc tải node (chia sẻ theo thời gian)
+            total_energy = self._chunked_sum(decisions, energy_table)
+            return total_latency.to(latency_table.dtype), total_energy.to(energy_table.dtype)
+
+        idx = decisions + self._flat_offsets
+        total_energy = torch.take(energy_table, idx).sum(dim=-1)
+        if self.contention:
+            total_latency = self._load_weighted_sum(idx, self.latency_fixed_table, latency_table - self.latency_fixed_table)
+            return total_latency, total_energy
+        total_latency = torch.take(latency_table, idx).sum(dim=-1)
+        return total_latency, total_energy
+
+    def compute_cost(self, decisions, return_objectives=False, lut=None):
+        """
+        Tính toán chi phí cho một quần thể các lời giải.
+        decisions: Tensor [population_size, num_ue] chứa các giá trị {0, 1, 2} (kiểu nguyên bất kỳ, vd. uint8)
+        return_objectives=True: trả thêm (total_latency, total_energy) [population_size]
+        lut: nếu đặt, decisions là code quan sát nén (core.encoding) và lut là bảng tra code -> quyết định
+        """
+        cost_table = self.get_cost_table()
+
+        if lut is not None:
+            if self.contention or return_objectives or self._use_chunks(decisions):
+                return self.compute_cost(decode(decisions, lut), return_objectives)
+            # Tra thẳng bảng [num_ue, 4] theo code: idx = ue * 4 + code
+            packed = self.get_packed_cost_table(lut)
+            ue_costs = torch.take(packed, decisions + self._packed_offsets)
+            return torch.mean(ue_costs, dim=1)
+
+        if self._use_chunks(decisions):
+            if self.contention:
+                fixed, shared, _ = self.get_contention_tables()
+                total = self._chunked_sum(decisions, fixed, shared)
+            else:
+                total = self._chunked_sum(decisions, cost_table)
+            individual_costs = (total / decisions.shape[-1]).to(cost_table.dtype)
+            if return_objectives:
+                return (individual_costs,) + self.compute_objectives(decisions)
+            return individual_costs
+
+        if self.contention:
+            fixed, shared, _ = self.get_contention_tables()
+            individual_costs = self._load_weighted_sum(decisions + self._flat_offsets, fixed, shared) / decisions.shape[-1]
+            if return_objectives:
+                return (individual_costs,) + self.compute_objectives(decisions)
+            return individual_costs
+
+        # Tra bảng chi phí theo quyết định của từng UE: [pop_size, num_ue]
+        ue_costs = torch.take(cost_table, decisions + self._flat_offsets)
+
         # Cost trung bình của toàn mạng cho mỗi cá thể trong quần thể
         # Kết quả: [pop_size]
-        individual_costs = torch.mean(w_l * total_latency + w_e * total_energy, dim=1)
-        
+        individual_costs = torch.mean(ue_costs, dim=1)
+
+        if return_objectives:
+            return (individual_costs,) + self.compute_objectives(decisions)
         return individual_costs
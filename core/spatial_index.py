@@ -0,0 +1,115 @@
+import math
+import torch
+
+
+class UAVGridIndex:
+    """
+    Chỉ mục lưới đều trên mặt phẳng (x, y) cho UAV, dùng để tìm k UAV gần nhất của mỗi UE
+    mà không tính ma trận khoảng cách đầy đủ [num_ue, num_uav].
+    Mỗi ô lưới lưu danh sách chỉ số UAV (bảng [num_cells, max_per_cell], -1 = trống).
+    Truy vấn mở rộng dần cửa sổ (2r+1) x (2r+1) ô quanh UE cho tới khi UAV thứ k
+    chắc chắn gần hơn mọi UAV ngoài cửa sổ, nên kết quả là k láng giềng gần nhất chính xác.
+    """
+    def __init__(self, area_size, cell_size, device="cpu"):
+        self.cell_size = float(cell_size)
+        self.grid = max(1, math.ceil(area_size / cell_size))
+        self.device = device
+        self.uav_xy = None
+        self.cell_of = None
+        self.table = None
+
+    def _cells(self, xy):
+        """Tọa độ ô (cx, cy) [n, 2]; điểm ngoài vùng được gán vào ô biên"""
+        return torch.floor(xy / self.cell_size).long().clamp(0, self.grid - 1)
+
+    def _flat(self, cells):
+        return cells[:, 0] * self.grid + cells[:, 1]
+
+    def build(self, uav_xy):
+        """Dựng lại toàn bộ chỉ mục từ tọa độ UAV [num_uav, 2]"""
+        self.uav_xy = uav_xy.clone()
+        self.cell_of = self._flat(self._cells(self.uav_xy))
+        num_cells = self.grid * self.grid
+
+        order = torch.argsort(self.cell_of, stable=True)
+        sorted_cells = self.cell_of[order]
+        counts = torch.bincount(self.cell_of, minlength=num_cells)
+        starts = torch.cumsum(counts, 0) - counts
+        rank = torch.arange(order.numel(), device=self.device) - starts[sorted_cells]
+
+        width = max(1, int(counts.max())) if order.numel() > 0 else 1
+        self.table = torch.full((num_cells, width), -1, dtype=torch.long, device=self.device)
+        self.table[sorted_cells, rank] = order
+        return self
+
+    def update(self, idx, new_xy):
+        """
+        Cập nhật tăng dần khi các UAV idx di chuyển tới new_xy [k, 2].
+        Chỉ các UAV đổi ô mới được chuyển giữa các danh sách ô. Trả về số UAV đổi ô.
+        """
+        idx = torch.as_tensor(idx, device=self.device)
+        self.uav_xy[idx] = new_xy
+        new_cells = self._flat(self._cells(new_xy))
+        changed = new_cells != self.cell_of[idx]
+        for uav, cell in zip(idx[changed].tolist(), new_cells[changed].tolist()):
+            old = int(self.cell_of[uav])
+            self.table[old, self.table[old] == uav] = -1
+            free = torch.nonzero(self.table[cell] < 0)
+            if free.numel() == 0:
+                # Ô đầy: nới bảng thêm một cột
+                pad = torch.full((self.table.shape[0], 1), -1, dtype=torch.long, device=self.device)
+                self.table = torch.cat([self.table, pad], dim=1)
+                slot = self.table.shape[1] - 1
+            else:
+                slot = int(free[0])
+            self.table[cell, slot] = uav
+            self.cell_of[uav] = cell
+        return int(changed.sum())
+
+    def query(self, xy, k):
+        """
+        k UAV gần nhất (theo khoảng cách mặt phẳng) của mỗi điểm xy [n, 2].
+        Trả về: (idx [n, k] long, dist2 [n, k]) sắp xếp tăng dần theo khoảng cách bình phương.
+        """
+        n = xy.shape[0]
+        k = min(k, self.uav_xy.shape[0])
+        out_idx = torch.empty((n, k), dtype=torch.long, device=self.device)
+        out_d2 = torch.empty((n, k), dtype=xy.dtype, device=self.device)
+        cells = self._cells(xy)
+
+        # Bán kính khởi đầu: cửa sổ chứa trung bình khoảng k UAV
+        density = self.uav_xy.shape[0] / (self.grid * self.grid)
+        r = max(1, math.ceil((math.sqrt(k / max(density, 1e-12)) - 1) / 2))
+        pending = torch.arange(n, device=self.device)
+        while pending.numel() > 0:
+            offsets = torch.arange(-r, r + 1, device=self.device)
+            dx, dy = torch.meshgrid(offsets, offsets, indexing="ij")
+            cx = cells[pending, 0:1] + dx.reshape(1, -1)   # [p, W]
+            cy = cells[pending, 1:2] + dy.reshape(1, -1)
+            valid = (cx >= 0) & (cx < self.grid) & (cy >= 0) & (cy < self.grid)
+            flat = cx.clamp(0, self.grid - 1) * self.grid + cy.clamp(0, self.grid - 1)
+            cand = torch.where(valid.unsqueeze(-1), self.table[flat], -1).reshape(pending.numel(), -1)
+            if cand.shape[1] < k:
+                r += 1
+                continue
+
+            diff = xy[pending].unsqueeze(1) - self.uav_xy[cand.clamp_min(0)]
+            d2 = (diff ** 2).sum(dim=-1).masked_fill(cand < 0, float("inf"))
+            top_d2, top_pos = torch.topk(d2, k, dim=1, largest=False)
+
+            # Khoảng cách tối thiểu từ điểm tới biên cửa sổ (vô hạn nếu cửa sổ chạm biên lưới).
+            # Điểm ngoài vùng nằm ngoài cửa sổ của ô biên: margin âm được chặn về 0 (chưa kết luận được)
+            # thay vì để radius ** 2 biến nó thành dương.
+            lo = cells[pending] - r
+            hi = cells[pending] + r + 1
+            margin_lo = torch.where(lo > 0, xy[pending] - lo * self.cell_size, float("inf"))
+            margin_hi = torch.where(hi < self.grid, hi * self.cell_size - xy[pending], float("inf"))
+            radius = torch.minimum(margin_lo, margin_hi).min(dim=1).values.clamp_min(0)
+            done = top_d2[:, -1] <= radius ** 2
+
+            rows = pending[done]
+            out_idx[rows] = torch.gather(cand[done], 1, top_pos[done])
+            out_d2[rows] = top_d2[done]
+            pending = pending[~done]
+            r += 1
+        return out_idx, out_d2
@@ -0,0 +1,235 @@
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import torch
+
+TRACE_COLUMNS = ("ue_id", "x", "y", "task_bits")
+BITS_PER_MB = 1024 * 1024 * 8
+
+
+def _read_chunks(csv_path, chunk_rows):
+    """Đọc CSV theo khối: (epoch int64, ue_id int64, x, y float32, task_bits float32) mỗi khối"""
+    # pandas chỉ cần khi chuyển đổi trace, không cần khi đọc định dạng cột
+    import pandas as pd
+    header = pd.read_csv(csv_path, nrows=0).columns
+    task_col = "task_bits" if "task_bits" in header else "task_mb"
+    usecols = ["epoch", "ue_id", "x", "y", task_col]
+    dtype = {"epoch": np.int64, "ue_id": np.int64, "x": np.float32, "y": np.float32, task_col: np.float32}
+    for chunk in pd.read_csv(csv_path, usecols=usecols, dtype=dtype, chunksize=chunk_rows):
+        task = chunk[task_col].to_numpy()
+        if task_col == "task_mb":
+            task = task * np.float32(BITS_PER_MB)
+        yield (chunk["epoch"].to_numpy(), chunk["ue_id"].to_numpy(), chunk["x"].to_numpy(),
+               chunk["y"].to_numpy(), task)
+
+
+def convert_trace(csv_path, out_dir, chunk_rows=1_000_000):
+    """
+    Chuyển trace CSV (cột epoch, ue_id, x, y, task_mb hoặc task_bits; thứ tự dòng tùy ý) sang định dạng cột
+    trong out_dir: mỗi cột một file .npy sắp theo epoch (ổn định theo thứ tự dòng trong cùng epoch),
+    epochs.npy (giá trị epoch) và offsets.npy [num_epochs + 1] (bản ghi của epoch e nằm ở [offsets[e], offsets[e+1])).
+    Hai lượt đọc theo khối chunk_rows dòng, không nạp cả trace vào bộ nhớ:
+    lượt 1 đếm số bản ghi mỗi epoch, lượt 2 ghi từng khối thẳng vào vị trí của nó trong các file memmap.
+    Trả về dict thống kê: records, epochs, seconds, records_per_sec.
+    """
+    start = time.perf_counter()
+    counts = {}
+    for epoch, *_ in _read_chunks(csv_path, chunk_rows):
+        values, n = np.unique(epoch, return_counts=True)
+        for v, c in zip(values.tolist(), n.tolist()):
+            counts[v] = counts.get(v, 0) + c
+    epochs = np.array(sorted(counts), dtype=np.int64)
+    offsets = np.zeros(len(epochs) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([counts[e] for e in epochs.tolist()])
+    num_records = int(offsets[-1])
+
+    os.makedirs(out_dir, exist_ok=True)
+    columns = {
+        name: np.lib.format.open_memmap(os.path.join(out_dir, f"{name}.npy"), mode="w+",
+                                        dtype=np.int64 if name == "ue_id" else np.float32, shape=(num_records,))
+        for name in TRACE_COLUMNS
+    }
+    cursor = offsets[:-1].copy()
+    for epoch, *values in _read_chunks(csv_path, chunk_rows):
+        idx = np.searchsorted(epochs, epoch)
+        order = np.argsort(idx, kind="stable")
+        idx = idx[order]
+        groups, first, sizes = np.unique(idx, return_index=True, return_counts=True)
+        # Vị trí đích = đầu epoch + số bản ghi epoch đó đã ghi + thứ hạng trong khối
+        dest = cursor[idx] + np.arange(len(idx)) - np.repeat(first, sizes)
+        cursor[groups] += sizes
+        for name, column in zip(TRACE_COLUMNS, values):
+            columns[name][dest] = column[order]
+    for column in columns.values():
+        column.flush()
+    np.save(os.path.join(out_dir, "epochs.npy"), epochs)
+    np.save(os.path.join(out_dir, "offsets.npy"), offsets)
+
+    seconds = time.perf_counter() - start
+    stats = {"records": num_records, "epochs": len(epochs), "seconds": seconds,
+             "records_per_sec": num_records / seconds if seconds > 0 else float("inf")}
+    with open(os.path.join(out_dir, "meta.json"), "w") as f:
+        json.dump({"source": os.path.abspath(csv_path), "columns": list(TRACE_COLUMNS), **stats}, f)
+    return stats
+
+
+class TraceEpoch:
+    """Bản ghi của một epoch: ue_ids (list), positions [n, 2], task_bits [n] (tensor trên device)"""
+    def __init__(self, epoch, ue_ids, positions, task_bits):
+        self.epoch = epoch
+        self.ue_ids = ue_ids
+        self.positions = positions
+        self.task_bits = task_bits
+
+    def __len__(self):
+        return len(self.ue_ids)
+
+
+class UETrace:
+    """
+    Trace UE đã chuyển bằng convert_trace, mở bằng memmap: chỉ các trang của epoch được đọc mới nạp từ đĩa.
+    stream() đọc lần lượt từng epoch, tùy chọn đọc trước epoch kế tiếp trên một luồng nền.
+    """
+    def __init__(self, path, device="cpu"):
+        self.path = path
+        self.device = device
+        self.epochs = np.load(os.path.join(path, "epochs.npy"))
+        self.offsets = np.load(os.path.join(path, "offsets.npy"))
+        self.columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in TRACE_COLUMNS}
+        self.read_time = 0.0
+        self.wait_time = 0.0
+        self.records_read = 0
+        self.epochs_read = 0
+
+    @classmethod
+    def from_csv(cls, csv_path, out_dir=None, device="cpu", chunk_rows=1_000_000):
+        """Mở trace từ CSV, chuyển đổi một lần vào out_dir (mặc định <csv>.trace/) nếu chưa có hoặc CSV mới hơn"""
+        out_dir = out_dir or os.path.splitext(csv_path)[0] + ".trace"
+        meta = os.path.join(out_dir, "meta.json")
+        if not os.path.exists(meta) or os.path.getmtime(meta) < os.path.getmtime(csv_path):
+            stats = convert_trace(csv_path, out_dir, chunk_rows)
+            print(f"Converted {stats['records']} records / {stats['epochs']} epochs "
+                  f"in {stats['seconds']:.2f}s ({stats['records_per_sec']:,.0f} records/s)")
+        return cls(out_dir, device)
+
+    @property
+    def num_epochs(self):
+        return len(self.epochs)
+
+    @property
+    def num_records(self):
+        return int(self.offsets[-1])
+
+    def read_epoch(self, t):
+        """Epoch thứ t (chỉ số 0..num_epochs-1): sao chép đoạn memmap của nó sang tensor"""
+        start = time.perf_counter()
+        lo, hi = int(self.offsets[t]), int(self.offsets[t + 1])
+        x, y = self.columns["x"][lo:hi], self.columns["y"][lo:hi]
+        positions = torch.from_numpy(np.stack([x, y], axis=1)).to(self.device)
+        task_bits = torch.from_numpy(np.array(self.columns["task_bits"][lo:hi])).to(self.device)
+        record = TraceEpoch(int(self.epochs[t]), self.columns["ue_id"][lo:hi].tolist(), positions, task_bits)
+        self.read_time += time.perf_counter() - start
+        self.records_read += hi - lo
+        self.epochs_read += 1
+        return record
+
+    def stream(self, start=0, stop=None, prefetch=True):
+        """
+        Sinh TraceEpoch cho các epoch [start, stop). prefetch=True: một luồng nền đọc epoch kế tiếp
+        (đọc trang memmap, tạo tensor) trong lúc bên gọi xử lý epoch hiện tại; wait_time là thời gian
+        bên gọi phải chờ dữ liệu.
+        """
+        stop = self.num_epochs if stop is None else min(stop, self.num_epochs)
+        if not prefetch:
+            for t in range(start, stop):
+                wait_start = time.perf_counter()
+                record = self.read_epoch(t)
+                self.wait_time += time.perf_counter() - wait_start
+                yield record
+            return
+
+        buffer = queue.Queue(maxsize=1)
+        done = threading.Event()
+
+        def put(item):
+            # Chờ chỗ trống trong buffer; bỏ cuộc khi bên gọi đã dừng
+            while not done.is_set():
+                try:
+                    buffer.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def reader():
+            try:
+                for t in range(start, stop):
+                    if not put(self.read_epoch(t)):
+                        return
+                put(None)
+            except Exception as e:
+                # Lỗi đọc được chuyển sang bên gọi thay vì để bên gọi chờ mãi
+                put(e)
+
+        thread = threading.Thread(target=reader, daemon=True)
+        thread.start()
+        try:
+            while True:
+                wait_start = time.perf_counter()
+                record = buffer.get()
+                self.wait_time += time.perf_counter() - wait_start
+                if record is None:
+                    return
+                if isinstance(record, Exception):
+                    raise record
+                yield record
+        finally:
+            # Bên gọi dừng sớm: báo luồng đọc thoát
+            done.set()
+            thread.join()
+
+    def stats(self, elapsed=None):
+        """
+        Thông lượng nạp: records_per_sec tính trên thời gian đọc (read_time);
+        elapsed (giây, tổng thời gian xử lý) cho thêm thông lượng đầu-cuối end_to_end_records_per_sec.
+        """
+        stats = {
+            "records": self.records_read,
+            "epochs": self.epochs_read,
+            "read_time": self.read_time,
+            "wait_time": self.wait_time,
+            "records_per_sec": self.records_read / self.read_time if self.read_time > 0 else float("inf"),
+        }
+        if elapsed is not None:
+            stats["end_to_end_records_per_sec"] = self.records_read / elapsed if elapsed > 0 else float("inf")
+        return stats
+
+
+def synthesize_trace(csv_path, num_ue=1000, num_epochs=100, area_size=10000, move_prob=0.2, churn=0.02,
+                     task_data_size=(0.5, 2.0), seed=0):
+    """
+    Ghi một trace CSV mẫu (epoch, ue_id, x, y, task_mb) để thử bộ nạp: UE di chuyển ngẫu nhiên,
+    một tỉ lệ churn UE rời đi / UE mới đến mỗi epoch, mỗi epoch một task mới cho mọi UE.
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.arange(num_ue)
+    pos = rng.random((num_ue, 2)) * area_size
+    next_id = num_ue
+    with open(csv_path, "w") as f:
+        f.write("epoch,ue_id,x,y,task_mb\n")
+        for epoch in range(num_epochs):
+            task = task_data_size[0] + (task_data_size[1] - task_data_size[0]) * rng.random(len(ids))
+            rows = np.column_stack([np.full(len(ids), epoch), ids, pos, task])
+            np.savetxt(f, rows, fmt=["%d", "%d", "%.2f", "%.2f", "%.4f"], delimiter=",")
+
+            moving = rng.random(len(ids)) < move_prob
+            pos[moving] = np.clip(pos[moving] + rng.normal(0, 200, (moving.sum(), 2)), 0, area_size)
+            stay = rng.random(len(ids)) >= churn
+            num_new = len(ids) - stay.sum()
+            ids = np.concatenate([ids[stay], np.arange(next_id, next_id + num_new)])
+            pos = np.concatenate([pos[stay], rng.random((num_new, 2)) * area_size])
+            next_id += num_new
@@ -1,29 +1,46 @@
 # main.py cập nhật
-from config import BaseConfig, SCENARIOS
-from core.sagin_env import SAGINEnv
+from config import BaseConfig
+from core.env_cache import load_env
 from models.qga_optimizer import QGAOptimizer
 from models.pso_optimizer import PSOOptimizer
+from models.telemetry import Telemetry
+from models.eval_cache import EvaluationCache
 import matplotlib.pyplot as plt
+import argparse
 import torch
 
 class RunConfig(BaseConfig):
-    SCENARIOS = SCENARIOS
     POPULATION_SIZE = 100
     MAX_ITER = 100
 
+parser = argparse.ArgumentParser()
+parser.add_argument("--profile", action="store_true",
+                    help="Ghi thời gian từng pha mỗi thế hệ ra results/<algo>_trace.json (Chrome trace) và .csv")
+parser.add_argument("--compiled", action="store_true",
+                    help="Chạy mỗi thế hệ bằng kernel gộp torch.compile (models.fused)")
+parser.add_argument("--eval-cache", type=int, default=None, metavar="SIZE",
+                    help="Chấm quần thể qua cache LRU SIZE lời giải (gộp cá thể trùng), in thống kê hit-rate")
+parser.add_argument("--unbiased-decisions", action="store_true",
+                    help="QGA quan sát loại trạng thái (1, 1): không lệch về LEO (mặc định giữ ánh xạ clamp gốc)")
+args = parser.parse_args()
+
 config = RunConfig()
-env = SAGINEnv(config, scenario_name="urban_iot")
-env.generate_tasks()
+env = load_env(config, "urban_iot")
 
 # 1. Chạy QGA
 print("--- Running QGA ---")
-qga = QGAOptimizer(config, num_ue=config.SCENARIOS["urban_iot"]["num_ue"], env=env)
-qga_history = qga.run(max_iter=config.MAX_ITER)
+qga = QGAOptimizer(config, num_ue=config.SCENARIOS["urban_iot"]["num_ue"], env=env, compiled=args.compiled,
+                   eval_cache=EvaluationCache(args.eval_cache) if args.eval_cache else None,
+                   reject_11=args.unbiased_decisions)
+qga_telemetry = Telemetry(config.DEVICE) if args.profile else None
+qga_history = qga.run(max_iter=config.MAX_ITER, telemetry=qga_telemetry)
 
 # 2. Chạy PSO
 print("\n--- Running PSO ---")
-pso = PSOOptimizer(config, num_ue=config.SCENARIOS["urban_iot"]["num_ue"], env=env)
-pso_history = pso.run(max_iter=config.MAX_ITER)
+pso = PSOOptimizer(config, num_ue=config.SCENARIOS["urban_iot"]["num_ue"], env=env, compiled=args.compiled,
+                   eval_cache=EvaluationCache(args.eval_cache) if args.eval_cache else None)
+pso_telemetry = Telemetry(config.DEVICE) if args.profile else None
+pso_history = pso.run(max_iter=config.MAX_ITER, telemetry=pso_telemetry)
 
 # 3. Vẽ biểu đồ so sánh
 plt.figure(figsize=(10, 6))
@@ -39,3 +56,16 @@ plt.savefig('results/qga_vs_pso.pdf', format='pdf', bbox_inches='tight')
 
 print(f"\nFinal Cost - QGA: {qga.best_cost:.4f}")
 print(f"Final Cost - PSO: {pso.gbest_cost:.4f}")
+
+if args.eval_cache:
+    for name, optimizer in (("QGA", qga), ("PSO", pso)):
+        stats = optimizer.run_stats["eval_cache"]
+        print(f"{name} eval cache: hit rate {stats['hit_rate']:.1%} "
+              f"({stats['hits']} hits, {stats['duplicates']} in-population duplicates, {stats['evaluated']} evaluated)")
+
+if args.profile:
+    for name, telemetry in (("qga", qga_telemetry), ("pso", pso_telemetry)):
+        telemetry.to_chrome_trace(f"results/{name}_trace.json", process_name=name.upper())
+        telemetry.to_csv(f"results/{name}_trace.csv")
+        totals = ", ".join(f"{phase}={t * 1e3:.1f}ms" for phase, t in telemetry.phase_totals().items())
+        print(f"{name.upper()} phases: {totals}")
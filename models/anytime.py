@@ -0,0 +1,118 @@
+import time
+
+
+class RunBudget:
+    """
+    Theo dõi ngân sách của một lần chạy: số thế hệ tối đa và/hoặc thời gian (giây).
+    Thời gian chỉ được kiểm tra tại ranh giới giữa các thế hệ; thế hệ đầu tiên luôn được chạy
+    để luôn có lời giải best-so-far.
+    early_stop: EarlyStopping (tùy chọn), được cập nhật sau mỗi thế hệ qua step(best_cost, optimizer).
+    Lý do dừng ("max_iter", "time_budget" hoặc tiêu chí dừng sớm) được lưu trong stop_reason.
+    """
+    def __init__(self, max_iter=None, time_budget=None, early_stop=None):
+        if max_iter is None and time_budget is None:
+            raise ValueError("Cần ít nhất một trong hai: max_iter hoặc time_budget")
+        self.max_iter = max_iter
+        self.time_budget = time_budget
+        self.early_stop = early_stop
+        if early_stop is not None:
+            early_stop.reset()
+        self.start = time.perf_counter()
+        self.generations = 0
+        self.stop_reason = None
+        self.times = []     # thời gian (giây) từ đầu lần chạy đến hết từng thế hệ
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def should_stop(self):
+        if self.stop_reason is not None:
+            return True
+        if self.max_iter is not None and self.generations >= self.max_iter:
+            self.stop_reason = "max_iter"
+            return True
+        if self.time_budget is None or self.generations == 0:
+            return False
+        # Dừng nếu thế hệ kế tiếp (ước lượng theo thời gian trung bình) sẽ vượt deadline
+        elapsed = self.elapsed()
+        if elapsed + elapsed / self.generations > self.time_budget:
+            self.stop_reason = "time_budget"
+            return True
+        return False
+
+    def progress(self):
+        """Tỉ lệ ngân sách đã dùng trong [0, 1]: max của tỉ lệ thế hệ và tỉ lệ thời gian"""
+        fractions = []
+        if self.max_iter is not None:
+            fractions.append(self.generations / self.max_iter)
+        if self.time_budget is not None:
+            fractions.append(min(self.elapsed() / self.time_budget, 1.0))
+        return max(fractions)
+
+    def step(self, best_cost=None, optimizer=None):
+        self.generations += 1
+        self.times.append(self.elapsed())
+        if self.early_stop is not None:
+            self.stop_reason = self.early_stop.update(best_cost, optimizer)
+
+    def stats(self, pop_size):
+        elapsed = self.elapsed()
+        evaluations = self.generations * pop_size
+        return {
+            "generations": self.generations,
+            "elapsed": elapsed,
+            "evaluations": evaluations,
+            "evals_per_sec": evaluations / elapsed if elapsed > 0 else float('inf'),
+            "stop_reason": self.stop_reason
+        }
+
+
+class EarlyStopping:
+    """
+    Tiêu chí dừng sớm, kiểm tra sau mỗi thế hệ (mọi tiêu chí mặc định tắt):
+    - patience: dừng khi best cost không cải thiện trong patience thế hệ liên tiếp;
+      một thế hệ chỉ tính là cải thiện nếu giảm quá rel_tol (tương đối) so với mốc cải thiện trước.
+    - theta_eps (QGA): dừng khi mọi góc theta cách biên clamp không quá theta_eps (optimizer.theta_saturated).
+    - swarm_tol (PSO): dừng khi cả bầy co về gbest với vận tốc không quá swarm_tol (optimizer.swarm_collapsed).
+    """
+    def __init__(self, patience=None, rel_tol=0.0, theta_eps=None, swarm_tol=None):
+        self.patience = patience
+        self.rel_tol = rel_tol
+        self.theta_eps = theta_eps
+        self.swarm_tol = swarm_tol
+        self.reset()
+
+    @classmethod
+    def from_config(cls, config, **overrides):
+        """Đọc các khóa EARLY_STOP_* của config (overrides ghi đè); None nếu không có tiêu chí nào bật"""
+        params = {
+            "patience": config.EARLY_STOP_PATIENCE,
+            "rel_tol": config.EARLY_STOP_REL_TOL,
+            "theta_eps": config.EARLY_STOP_THETA_EPS,
+            "swarm_tol": config.EARLY_STOP_SWARM_TOL,
+            **overrides
+        }
+        if all(params[k] is None for k in ("patience", "theta_eps", "swarm_tol")):
+            return None
+        return cls(**params)
+
+    def reset(self):
+        self.reference = float('inf')
+        self.stall = 0
+
+    def update(self, best_cost, optimizer=None):
+        """Trả về lý do dừng ("stall", "theta_saturation", "swarm_collapse") hoặc None"""
+        if self.reference == float('inf') or self.reference - best_cost > self.rel_tol * abs(self.reference):
+            self.reference = best_cost
+            self.stall = 0
+        else:
+            self.stall += 1
+        if self.patience is not None and self.stall >= self.patience:
+            return "stall"
+        if self.theta_eps is not None and hasattr(optimizer, "theta_saturated") \
+                and optimizer.theta_saturated(self.theta_eps):
+            return "theta_saturation"
+        if self.swarm_tol is not None and hasattr(optimizer, "swarm_collapsed") \
+                and optimizer.swarm_collapsed(self.swarm_tol):
+            return "swarm_collapse"
+        return None
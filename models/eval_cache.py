@@ -0,0 +1,101 @@
+import collections
+import torch
+
+
+def pack_decisions(decisions):
+    """
+    Nén quyết định {0, 1, 2} [pop_size, num_ue] thành 4 quyết định mỗi byte: uint8 [pop_size, ceil(num_ue / 4)].
+    Mỗi hàng nén là khóa của lời giải (num_ue / 4 byte thay vì num_ue phần tử).
+    """
+    decisions = decisions.to(torch.uint8)
+    pad = -decisions.shape[1] % 4
+    if pad:
+        decisions = torch.nn.functional.pad(decisions, (0, pad))
+    d = decisions.view(decisions.shape[0], -1, 4)
+    return (d[..., 0] << 6) | (d[..., 1] << 4) | (d[..., 2] << 2) | d[..., 3]
+
+
+class EvaluationCache:
+    """
+    Cache chi phí theo lời giải với số phần tử tối đa capacity và loại bỏ LRU.
+    Khóa là bytes của hàng quyết định đã nén (pack_decisions), băm bằng hash của dict Python.
+    Mỗi lần evaluate xử lý cả quần thể: gộp các cá thể trùng nhau, tra cache và chỉ chấm các lời giải
+    chưa có bằng env.compute_cost. Cache tự xóa khi bảng chi phí của env được dựng lại
+    (UE / UAV di chuyển, task hoặc trọng số đổi) hoặc khi dùng với env khác.
+    Có lợi khi mô hình chi phí đắt (vd. contention) và quần thể lặp lại nhiều (bầy PSO hội tụ,
+    theta QGA bão hòa); với bảng chi phí tách được, một lần tra bảng thường rẻ hơn việc băm.
+    """
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self._entries = collections.OrderedDict()
+        self._table = None
+        self.lookups = 0
+        self.hits = 0
+        self.duplicates = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+
+    def _sync(self, env):
+        # Bảng chi phí được gán tensor mới mỗi khi dựng lại: so sánh đồng nhất đối tượng là đủ
+        table = env.get_cost_table()
+        if table is not self._table:
+            if self._entries:
+                self.invalidations += 1
+            self.clear()
+            self._table = table
+
+    def evaluate(self, env, decisions):
+        """
+        decisions: [pop_size, num_ue] quyết định {0, 1, 2}. Trả về costs [pop_size] như env.compute_cost(decisions).
+        """
+        self._sync(env)
+        keys = [row.tobytes() for row in pack_decisions(decisions).cpu().numpy()]
+        self.lookups += len(keys)
+
+        values = [None] * len(keys)
+        pending = {}  # khóa chưa có trong cache -> các vị trí cá thể cần giá trị đó
+        for i, key in enumerate(keys):
+            if key in pending:
+                pending[key].append(i)
+                self.duplicates += 1
+            elif key in self._entries:
+                self._entries.move_to_end(key)
+                values[i] = self._entries[key]
+                self.hits += 1
+            else:
+                pending[key] = [i]
+
+        if pending:
+            first = torch.tensor([idx[0] for idx in pending.values()], device=decisions.device)
+            computed = env.compute_cost(decisions[first]).tolist()
+            self.misses += len(computed)
+            for (key, idx), cost in zip(pending.items(), computed):
+                for i in idx:
+                    values[i] = cost
+                self._entries[key] = cost
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return torch.tensor(values, device=decisions.device)
+
+    def stats(self):
+        """Thống kê tích lũy: hit_rate = (cache hit + trùng trong quần thể) / số cá thể tra"""
+        saved = self.hits + self.duplicates
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "duplicates": self.duplicates,
+            "evaluated": self.misses,
+            "hit_rate": saved / self.lookups if self.lookups else 0.0,
+            "size": len(self._entries),
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,66 @@
+import numpy as np
+import torch
+
+from core.encoding import pack_bits, unpack_bits
+
+THETA_MIN = 0.01
+THETA_MAX = np.pi/2 - 0.01
+
+_compiled = {}
+
+
+def compiled(fn):
+    """
+    Bản torch.compile của fn, biên dịch một lần cho mỗi process và mỗi kích thước (lần gọi đầu tốn vài giây).
+    Các phép elementwise / gather / reduce trong fn được inductor gộp thành ít kernel vòng lặp,
+    dùng lại bộ đệm nội bộ thay vì cấp phát tensor tạm cho từng phép.
+    dynamic=False: kernel chuyên biệt theo (pop_size, num_ue) nhanh hơn kernel shape động.
+    """
+    if fn not in _compiled:
+        _compiled[fn] = torch.compile(fn, dynamic=False)
+    return _compiled[fn]
+
+
+def qga_generation(theta, r_obs, r_mask, r_val, packed, offsets, best_codes, best_cost,
+                   step_size, mutation_rate):
+    """
+    Một thế hệ QGA gộp: observe -> chấm code nén -> cập nhật best -> xoay theta.
+    r_obs / r_mask / r_val: số ngẫu nhiên [pop_size, num_ue, 2] rút sẵn theo đúng thứ tự của đường eager.
+    best_codes [num_ue] uint8, best_cost tensor 0 chiều: giữ trên device, không đồng bộ host.
+    Trả về: (theta, best_codes, best_cost)
+    """
+    probs = torch.sin(theta)**2
+    observed = r_obs < probs
+    codes = pack_bits(observed[..., 0], observed[..., 1])
+    costs = torch.mean(torch.take(packed, codes + offsets), dim=1)
+
+    min_val, min_idx = torch.min(costs, dim=0)
+    improved = min_val < best_cost
+    best_codes = torch.where(improved, codes[min_idx], best_codes)
+    best_cost = torch.where(improved, min_val, best_cost)
+
+    direction = unpack_bits(best_codes).unsqueeze(0).float() - unpack_bits(codes).float()
+    mutation = (r_mask < mutation_rate).float() * (r_val - 0.5)
+    theta = torch.clamp(theta + direction * step_size + mutation * 0.01, THETA_MIN, THETA_MAX)
+    return theta, best_codes, best_cost
+
+
+def pso_generation(pos, vel, pbest_pos, pbest_cost, gbest_pos, gbest_cost, r, cost_table, offsets, w, c1, c2):
+    """
+    Một thế hệ PSO gộp: chấm vị trí -> cập nhật pbest / gbest -> cập nhật vận tốc, vị trí.
+    r: số ngẫu nhiên [2, pop_size, num_ue] rút sẵn; gbest_cost tensor 0 chiều.
+    Trả về: (pos, vel, pbest_pos, pbest_cost, gbest_pos, gbest_cost)
+    """
+    costs = torch.mean(torch.take(cost_table, pos.to(torch.uint8) + offsets), dim=1)
+
+    better = costs < pbest_cost
+    pbest_pos = torch.where(better.unsqueeze(1), pos, pbest_pos)
+    pbest_cost = torch.where(better, costs, pbest_cost)
+    min_val, min_idx = torch.min(costs, dim=0)
+    improved = min_val < gbest_cost
+    gbest_pos = torch.where(improved, pos[min_idx], gbest_pos)
+    gbest_cost = torch.where(improved, min_val, gbest_cost)
+
+    vel = w * vel + c1 * r[0] * (pbest_pos - pos) + c2 * r[1] * (gbest_pos - pos)
+    pos = torch.clamp(pos + vel, 0, 2.99)
+    return pos, vel, pbest_pos, pbest_cost, gbest_pos, gbest_cost
@@ -0,0 +1,37 @@
+import itertools
+
+import numpy as np
+import torch
+
+# Siêu tham số mặc định (giá trị trước đây được viết cứng trong optimizer)
+QGA_DEFAULTS = {"base_step": 0.02 * np.pi, "mutation_rate": 0.01}
+PSO_DEFAULTS = {"w": 0.7, "c1": 1.5, "c2": 1.5}
+
+
+def per_population(value, ndim, device):
+    """
+    Siêu tham số cho các quần thể trong batch: số thực giữ nguyên (giống hệt đường không batch),
+    dãy S giá trị thành tensor [S, 1, ..., 1] (ndim chiều) để broadcast theo từng quần thể con.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = torch.as_tensor(value, dtype=torch.float32, device=device)
+    return value.view((-1,) + (1,) * (ndim - 1))
+
+
+def grid_settings(space):
+    """space: {tên: [giá trị, ...]} -> list dict của mọi tổ hợp (tích Descartes)"""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def random_settings(space, num_samples, seed=0):
+    """space: {tên: (thấp, cao)} -> num_samples dict rút đều trong từng khoảng (tất định theo seed)"""
+    rng = np.random.default_rng(seed)
+    return [{name: float(rng.uniform(low, high)) for name, (low, high) in space.items()}
+            for _ in range(num_samples)]
+
+
+def settings_column(settings, name, defaults):
+    """Cột siêu tham số name của danh sách settings (thiếu thì lấy giá trị mặc định)"""
+    return [float(s.get(name, defaults[name])) for s in settings]
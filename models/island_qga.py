@@ -0,0 +1,195 @@
+import queue
+import time
+import traceback
+
+import torch
+import torch.multiprocessing as mp
+
+from core.rng import spawn_generators
+from models.qga_optimizer import QGAOptimizer
+
+TOPOLOGIES = ("ring", "complete")
+
+
+def migration_targets(rank, num_islands, topology):
+    """Các đảo nhận elite của đảo rank"""
+    if topology == "ring":
+        return [(rank + 1) % num_islands] if num_islands > 1 else []
+    if topology == "complete":
+        return [j for j in range(num_islands) if j != rank]
+    raise ValueError(f"unknown topology {topology!r}, expected one of {TOPOLOGIES}")
+
+
+def split_population(total, num_islands):
+    """Chia total cá thể cho các đảo: phần dư dồn cho các đảo đầu, tổng đúng bằng total"""
+    base, extra = divmod(total, num_islands)
+    return [base + (1 if rank < extra else 0) for rank in range(num_islands)]
+
+
+def _run_island(rank, run_id, env, config, pop_size, max_iter, seed, num_islands, topology,
+                migration_interval, inbox, inboxes, qga_kwargs):
+    # Luồng RNG độc lập cho từng đảo, sinh tất định từ seed gốc (mỗi lần chạy bắt đầu lại từ seed)
+    generator = spawn_generators(seed, num_islands, config.DEVICE)[rank]
+
+    sources = [j for j in range(num_islands) if rank in migration_targets(j, num_islands, topology)]
+    targets = migration_targets(rank, num_islands, topology)
+    early = {}   # elite của vòng sau đến sớm từ đảo chạy nhanh hơn
+
+    def migrate(optimizer, iteration):
+        if (iteration + 1) % migration_interval != 0:
+            return
+        round_id = (run_id, (iteration + 1) // migration_interval)
+        # Gửi dạng numpy (pickle thường) để không phụ thuộc vòng đời bộ nhớ chia sẻ của process gửi
+        elite = (optimizer.best_cost, optimizer.best_sol_bits.cpu().numpy())
+        for j in targets:
+            inboxes[j].put((round_id, rank, elite))
+
+        # Trao đổi đồng bộ: chờ đủ elite của vòng này từ mọi đảo nguồn
+        received = early.pop(round_id, {})
+        while len(received) < len(sources):
+            msg_round, src, msg = inbox.get()
+            if msg_round == round_id:
+                received[src] = msg
+            elif msg_round[0] == run_id:
+                early.setdefault(msg_round, {})[src] = msg
+        for src in sorted(received):
+            cost, codes = received[src]
+            if cost < optimizer.best_cost:
+                optimizer.best_cost = cost
+                optimizer.best_sol_bits = torch.from_numpy(codes).to(optimizer.device)
+
+    optimizer = QGAOptimizer(config, env.num_ue, env, pop_size=pop_size, generator=generator, **qga_kwargs)
+    history = optimizer.run(max_iter=max_iter, verbose=False, on_generation=migrate)
+    return history, optimizer.best_cost, optimizer.best_sol_bits.cpu().numpy()
+
+
+def _island_worker(rank, num_islands, topology, migration_interval, threads, commands, inboxes, results):
+    """
+    Process đảo sống suốt vòng đời của IslandQGAOptimizer: import torch / khởi tạo một lần,
+    sau đó chạy mỗi lệnh (run_id, env, config, pop_size, max_iter, seed, qga_kwargs) nhận được; None để thoát.
+    """
+    torch.set_num_threads(threads)
+    results.put(("ready", rank, None))
+    while (command := commands.get()) is not None:
+        run_id, env, config, pop_size, max_iter, seed, qga_kwargs = command
+        try:
+            output = _run_island(rank, run_id, env, config, pop_size, max_iter, seed, num_islands, topology,
+                                 migration_interval, inboxes[rank], inboxes, qga_kwargs)
+            results.put((run_id, rank, output))
+        except Exception:
+            results.put(("error", rank, traceback.format_exc()))
+
+
+class IslandQGAOptimizer:
+    """
+    QGA mô hình đảo trên nhiều process CPU: mỗi đảo tiến hóa quần thể theta riêng
+    (POPULATION_SIZE được chia cho các đảo, tổng không đổi) trên cùng bảng chi phí chỉ đọc trong bộ nhớ chia sẻ.
+    Cứ migration_interval thế hệ, mỗi đảo gửi lời giải tốt nhất (best_sol_bits) cho các đảo kề
+    theo topology ("ring" hoặc "complete"); đảo nhận dùng elite tốt hơn làm đích xoay.
+    Việc trao đổi là đồng bộ nên kết quả chỉ phụ thuộc seed.
+    Các process đảo được tạo một lần trong __init__ (thời gian khởi động ở self.startup_time, không tính vào run)
+    và dùng lại cho mọi lần run; gọi close() hoặc dùng with để dừng chúng.
+    """
+    def __init__(self, config, num_ue, env, num_islands=4, migration_interval=10, topology="ring",
+                 threads_per_island=1, seed=0, **qga_kwargs):
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"unknown topology {topology!r}, expected one of {TOPOLOGIES}")
+        self.config = config
+        self.num_ue = num_ue
+        self.env = env
+        self.num_islands = num_islands
+        self.migration_interval = migration_interval
+        self.topology = topology
+        self.threads_per_island = threads_per_island
+        self.seed = seed
+        self.qga_kwargs = qga_kwargs
+        self.pop_sizes = split_population(config.POPULATION_SIZE, num_islands)
+        self.pop_size = sum(self.pop_sizes)
+        self.best_cost = float('inf')
+        self.best_sol_bits = None
+        self.island_histories = []
+        self.run_stats = {}
+        self._run_id = 0
+        self._workers = []
+
+        start = time.perf_counter()
+        ctx = mp.get_context("spawn")
+        self._commands = [ctx.Queue() for _ in range(num_islands)]
+        inboxes = [ctx.Queue() for _ in range(num_islands)]
+        self._results = ctx.Queue()
+        self._workers = [
+            ctx.Process(target=_island_worker, args=(
+                rank, num_islands, topology, migration_interval, threads_per_island,
+                self._commands[rank], inboxes, self._results), daemon=True)
+            for rank in range(num_islands)
+        ]
+        for w in self._workers:
+            w.start()
+        self._collect("ready")
+        self.startup_time = time.perf_counter() - start
+
+    def _collect(self, tag):
+        """Chờ mỗi đảo trả một kết quả gắn tag; đảo lỗi hoặc chết thì dừng cả pool"""
+        outputs = {}
+        while len(outputs) < self.num_islands:
+            try:
+                msg_tag, rank, payload = self._results.get(timeout=1.0)
+            except queue.Empty:
+                # Một đảo chết thì các đảo còn lại sẽ chờ migration mãi: dừng tất cả
+                if any(w.exitcode is not None for w in self._workers):
+                    self.close(terminate=True)
+                    raise RuntimeError("an island worker exited unexpectedly")
+                continue
+            if msg_tag == "error":
+                self.close(terminate=True)
+                raise RuntimeError(f"island {rank} failed:\n{payload}")
+            if msg_tag == tag:
+                outputs[rank] = payload
+        return [outputs[rank] for rank in range(self.num_islands)]
+
+    def close(self, terminate=False):
+        """Dừng các process đảo (terminate=True: dừng ngay, không chờ)"""
+        for w, commands in zip(self._workers, self._commands):
+            if w.is_alive():
+                if terminate:
+                    w.terminate()
+                else:
+                    commands.put(None)
+        for w in self._workers:
+            w.join()
+        self._workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def run(self, max_iter, verbose=True):
+        """Trả về lịch sử best cost gộp: best-so-far trên mọi đảo ở từng thế hệ"""
+        if not self._workers:
+            raise RuntimeError("island pool is closed")
+        start = time.perf_counter()
+        self._run_id += 1
+        env = self.env.share_memory()
+        for rank, commands in enumerate(self._commands):
+            commands.put((self._run_id, env, self.config, self.pop_sizes[rank], max_iter, self.seed,
+                          self.qga_kwargs))
+        outputs = self._collect(self._run_id)
+
+        self.island_histories = [history for history, _, _ in outputs]
+        self.best_cost, best_codes = min(((cost, codes) for _, cost, codes in outputs), key=lambda o: o[0])
+        self.best_sol_bits = torch.from_numpy(best_codes).to(self.config.DEVICE)
+        history = [min(costs) for costs in zip(*self.island_histories)]
+        elapsed = time.perf_counter() - start
+        self.run_stats = {
+            "generations": max_iter,
+            "elapsed": elapsed,
+            "startup": self.startup_time,
+            "evaluations": max_iter * self.pop_size,
+            "evals_per_sec": max_iter * self.pop_size / elapsed if elapsed > 0 else 0.0,
+            "islands": self.num_islands
+        }
+        if verbose:
+            print(f"Island QGA ({self.num_islands} islands, {self.topology}): Best Cost = {self.best_cost:.4f}")
+        return history
@@ -0,0 +1,28 @@
+import time
+import torch
+
+
+def best_improvement(evaluator, max_steps=None, time_limit=None, tol=1e-7):
+    """
+    Local search best-improvement vector hóa trên các cá thể của evaluator (IncrementalEvaluator).
+    Mỗi bước chấm mọi phép đổi một UE của cả quần thể bằng delta (không đánh giá lại toàn bộ),
+    rồi mỗi cá thể áp dụng phép đổi tốt nhất nếu nó cải thiện chi phí.
+    Dừng khi không còn cải thiện, đạt max_steps hoặc hết time_limit (giây; luôn chạy ít nhất một bước).
+    Trả về số bước đã thực hiện.
+    """
+    start = time.perf_counter()
+    steps = 0
+    pop_size = evaluator.decisions.shape[0]
+    while max_steps is None or steps < max_steps:
+        delta = evaluator.delta_all().view(pop_size, -1)
+        best_delta, flat_idx = torch.min(delta, dim=1)
+        # Dung sai tương đối tránh lặp vô hạn do sai số làm tròn float32
+        improving = best_delta < -tol * evaluator.total().abs()
+        if not improving.any():
+            break
+        rows = torch.nonzero(improving).squeeze(1)
+        evaluator.apply(rows, flat_idx[rows] // 3, flat_idx[rows] % 3)
+        steps += 1
+        if time_limit is not None and time.perf_counter() - start >= time_limit:
+            break
+    return steps
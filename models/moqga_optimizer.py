@@ -0,0 +1,101 @@
+import torch
+from models.qga_optimizer import BatchedQGAOptimizer
+
+
+def non_dominated_mask(objectives):
+    """
+    objectives: [n, 2] (latency, energy), cả hai cần cực tiểu
+    Trả về mask [n]: True nếu điểm không bị điểm nào khác chi phối
+    """
+    a = objectives.unsqueeze(1) # điểm i
+    b = objectives.unsqueeze(0) # điểm j
+    dominates = (b <= a).all(dim=-1) & (b < a).any(dim=-1) # [i, j]: j chi phối i
+    return ~dominates.any(dim=1)
+
+
+class MOQGAOptimizer(BatchedQGAOptimizer):
+    """
+    QGA đa mục tiêu: mỗi trọng số w_latency là một quần thể con, tất cả tiến hóa trong một batch
+    [num_weights, pop_size, num_ue, 2] trên cùng một env (dùng chung bảng kênh truyền đã cache).
+    Song song duy trì archive các lời giải không bị chi phối theo (tổng độ trễ, tổng năng lượng).
+    """
+    def __init__(self, config, num_ue, env, w_latency_list, archive_size=100, generator=None, reject_11=False):
+        super().__init__(config, num_ue, env, reject_11=reject_11,
+                         generator=generator if generator is not None else env.generator,
+                         num_populations=len(w_latency_list))
+        self.w_latency = torch.tensor(w_latency_list, device=self.device).view(-1, 1)
+        self.w_energy = 1.0 - self.w_latency
+        self.archive_size = archive_size
+        # (tổng độ trễ, tổng năng lượng) của lời giải tốt nhất trong từng quần thể con
+        self.best_objectives = torch.zeros((self.num_envs, 2), device=self.device)
+
+        self.archive_objectives = torch.empty((0, 2), device=self.device)
+        self.archive_decisions = torch.empty((0, self.num_ue), dtype=torch.uint8, device=self.device)
+
+    def evaluate(self, decisions):
+        """
+        decisions: [num_weights, pop_size, num_ue]
+        Trả về: costs [num_weights, pop_size] và objectives [num_weights, pop_size, 2]
+        """
+        total_latency, total_energy = self.env.compute_objectives(decisions)
+        costs = (self.w_latency * total_latency + self.w_energy * total_energy) / self.num_ue
+        return costs, torch.stack([total_latency, total_energy], dim=-1)
+
+    def update_archive(self, decisions, objectives):
+        objectives = objectives.reshape(-1, 2)
+        decisions = decisions.reshape(-1, self.num_ue)
+
+        # Lọc trước trong quần thể hiện tại để giảm kích thước phép so sánh từng cặp
+        keep = non_dominated_mask(objectives)
+        objectives = torch.cat([self.archive_objectives, objectives[keep]])
+        decisions = torch.cat([self.archive_decisions, decisions[keep]])
+
+        keep = non_dominated_mask(objectives)
+        objectives, decisions = objectives[keep], decisions[keep]
+
+        # Loại các điểm trùng mục tiêu, sắp theo độ trễ tăng dần
+        objectives, inverse = torch.unique(objectives, dim=0, return_inverse=True)
+        first = torch.full((objectives.shape[0],), len(inverse), dtype=torch.long, device=self.device)
+        first.scatter_reduce_(0, inverse, torch.arange(len(inverse), device=self.device), reduce="amin")
+        decisions = decisions[first]
+
+        # Giới hạn kích thước archive: giữ các điểm trải đều dọc theo mặt Pareto
+        if objectives.shape[0] > self.archive_size:
+            idx = torch.linspace(0, objectives.shape[0] - 1, self.archive_size, device=self.device).round().long()
+            objectives, decisions = objectives[idx], decisions[idx]
+
+        self.archive_objectives = objectives
+        self.archive_decisions = decisions
+
+    def select_per_weight(self):
+        """
+        Lời giải báo cáo cho từng trọng số: điểm có chi phí có trọng số nhỏ nhất trong archive cùng
+        lời giải tốt nhất của các quần thể con. Lời giải tốt nhất của một quần thể con chỉ là kết quả
+        heuristic nên có thể bị điểm khác chi phối; với w_L trong (0, 1), điểm cực tiểu chi phí có trọng số
+        của một tập không bị điểm nào trong tập đó chi phối, nên các điểm trả về luôn nằm trên mặt Pareto thu được.
+        Trả về: objectives [num_weights, 2] (tổng độ trễ, tổng năng lượng), decisions [num_weights, num_ue]
+        """
+        objectives = torch.cat([self.archive_objectives, self.best_objectives])
+        decisions = torch.cat([self.archive_decisions, self.decode(self.best_sol_bits)])
+        weighted = self.w_latency * objectives[:, 0] + self.w_energy * objectives[:, 1]   # [num_weights, n]
+        idx = torch.argmin(weighted, dim=1)
+        return objectives[idx], decisions[idx]
+
+    def run(self, max_iter, verbose=True):
+        """Trả về lịch sử best cost của từng quần thể con: list num_weights phần tử, mỗi phần tử dài max_iter"""
+        history = []
+        rows = torch.arange(self.num_envs, device=self.device)
+        for i in range(max_iter):
+            codes, decisions = self.observe()
+            costs, objectives = self.evaluate(decisions)
+
+            min_val, min_idx = torch.min(costs, dim=1)
+            improved = min_val < self.best_cost
+            self.best_objectives[improved] = objectives[rows, min_idx][improved]
+
+            self.evolve(codes, costs, i, max_iter)
+            self.update_archive(decisions, objectives)
+            history.append(self.best_cost.clone())
+            if verbose and i % 20 == 0:
+                print(f"MO-QGA Iteration {i}: Archive Size = {self.archive_objectives.shape[0]}")
+        return torch.stack(history, dim=1).tolist()
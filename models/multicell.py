@@ -0,0 +1,83 @@
+import torch
+from core.encoding import pack_bits, unpack_bits
+from models.fused import THETA_MIN, THETA_MAX
+
+
+class MultiCellQGAOptimizer:
+    """
+    Chạy QGA cho nhiều cell (mỗi cell một env và một QGAOptimizer giữ trạng thái ấm) trong một batch.
+    Số UE của các cell khác nhau nên các gen được nối theo chiều UE: theta [pop_size, sum N_c, 2],
+    bảng chi phí nén [sum N_c, 4]; chi phí của cá thể p trên cell c là trung bình các UE của đoạn c,
+    tính bằng một lần index_add cho mọi cell. Cá thể p của các cell tiến hóa độc lập như QGA tuần tự.
+    Chỉ hỗ trợ env không contention (chi phí tách được theo UE).
+    """
+    def __init__(self, optimizers, generator):
+        self.optimizers = list(optimizers)
+        self.generator = generator
+        first = self.optimizers[0]
+        self.device = first.device
+        self.pop_size = first.pop_size
+        self.lut = first.lut
+        self.base_step = first.base_step
+        self.mutation_rate = first.mutation_rate
+        self.num_cells = len(self.optimizers)
+
+        sizes = [opt.num_ue for opt in self.optimizers]
+        self.sizes = torch.tensor(sizes, device=self.device)
+        self.segment = torch.repeat_interleave(torch.arange(self.num_cells, device=self.device), self.sizes)
+        total = sum(sizes)
+        self.offsets = torch.arange(total, device=self.device) * 4
+
+        self.theta = torch.cat([opt.theta for opt in self.optimizers], dim=1)
+        self.packed = torch.cat([opt.env.get_packed_cost_table(self.lut) for opt in self.optimizers])
+        self.best_cost = torch.tensor([opt.best_cost for opt in self.optimizers], device=self.device)
+        self.best_sol_bits = torch.cat([
+            opt.best_sol_bits if opt.best_sol_bits is not None
+            else torch.zeros(opt.num_ue, dtype=torch.uint8, device=self.device)
+            for opt in self.optimizers])
+
+    def _rand(self, shape):
+        return torch.rand(shape, generator=self.generator, device=self.device)
+
+    def population_costs(self, codes):
+        """costs [pop_size, num_cells]: chi phí trung bình theo từng cell của mỗi cá thể"""
+        ue_costs = torch.take(self.packed, codes + self.offsets)
+        sums = torch.zeros((self.pop_size, self.num_cells), device=self.device).index_add_(1, self.segment, ue_costs)
+        return sums / self.sizes
+
+    def step(self, progress):
+        """Một thế hệ: observe -> chấm -> cập nhật best theo cell -> xoay theta"""
+        probs = torch.sin(self.theta)**2
+        observed = self._rand(probs.shape) < probs
+        codes = pack_bits(observed[..., 0], observed[..., 1])
+        costs = self.population_costs(codes)
+
+        min_val, min_idx = torch.min(costs, dim=0)
+        improved = min_val < self.best_cost
+        self.best_cost = torch.where(improved, min_val, self.best_cost)
+        # Mỗi UE lấy code của cá thể tốt nhất trong cell của nó
+        candidates = codes[min_idx[self.segment], torch.arange(codes.shape[1], device=self.device)]
+        self.best_sol_bits = torch.where(improved[self.segment], candidates, self.best_sol_bits)
+
+        direction = unpack_bits(self.best_sol_bits).unsqueeze(0).float() - unpack_bits(codes).float()
+        step_size = self.base_step * (1 - progress)
+        mutation = (self._rand(self.theta.shape) < self.mutation_rate).float() * (self._rand(self.theta.shape) - 0.5)
+        self.theta = torch.clamp(self.theta + direction * step_size + mutation * 0.01, THETA_MIN, THETA_MAX)
+
+    def run(self, max_iter):
+        """
+        Chạy max_iter thế hệ rồi ghi trạng thái (theta, best_sol_bits, best_cost) về optimizer của từng cell.
+        Trả về best cost của từng cell (list).
+        """
+        for i in range(max_iter):
+            self.step(i / max_iter)
+
+        best_cost = self.best_cost.tolist()
+        for opt, theta, bits, cost in zip(self.optimizers,
+                                          torch.split(self.theta, self.sizes.tolist(), dim=1),
+                                          torch.split(self.best_sol_bits, self.sizes.tolist()),
+                                          best_cost):
+            opt.theta = theta.contiguous()
+            opt.best_sol_bits = bits.clone()
+            opt.best_cost = cost
+        return best_cost
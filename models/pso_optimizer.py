@@ -1,37 +1,280 @@
+import time
 import torch
+from models.anytime import RunBudget
+from models.hyperparams import PSO_DEFAULTS, per_population
+from models import fused
+from models.telemetry import NULL_TELEMETRY, population_diversity
 
 class PSOOptimizer:
-    def __init__(self, config, num_ue, env):
+    def __init__(self, config, num_ue, env, generator=None, w=PSO_DEFAULTS["w"], c1=PSO_DEFAULTS["c1"],
+                 c2=PSO_DEFAULTS["c2"], compiled=False, eval_cache=None):
+        """
+        generator: torch.Generator cho mọi phép rút ngẫu nhiên (mặc định: rút tiếp từ env.generator)
+        w, c1, c2: hệ số quán tính, nhận thức (pbest) và xã hội (gbest)
+        compiled=True: run dùng kernel gộp torch.compile (models.fused.pso_generation) cho cả thế hệ,
+        cùng luồng RNG với đường eager; chỉ hỗ trợ env không contention.
+        eval_cache: models.eval_cache.EvaluationCache; vị trí lượng tử hóa được chấm qua cache (các hạt trùng
+        quyết định chỉ chấm một lần), thống kê hit-rate trong run_stats["eval_cache"]. Không áp dụng cho đường compiled.
+        """
         self.config = config
         self.num_ue = num_ue
         self.env = env
         self.device = config.DEVICE
         self.pop_size = config.POPULATION_SIZE
-        self.pos = torch.rand((self.pop_size, self.num_ue), device=self.device) * 2.99
-        self.vel = torch.randn((self.pop_size, self.num_ue), device=self.device) * 0.1
+        self.generator = generator if generator is not None else env.generator
+        self.pos = torch.rand((self.pop_size, self.num_ue), generator=self.generator, device=self.device) * 2.99
+        self.vel = torch.randn((self.pop_size, self.num_ue), generator=self.generator, device=self.device) * 0.1
         self.pbest_pos = self.pos.clone()
         self.pbest_cost = torch.full((self.pop_size,), float('inf'), device=self.device)
         self.gbest_pos = None
         self.gbest_cost = float('inf')
+        self.run_stats = {}
+        self.elapsed = []
+        self.w, self.c1, self.c2 = w, c1, c2
+        self.compiled = compiled
+        self.eval_cache = eval_cache
 
-    def run(self, max_iter, verbose=True): # Đã thêm verbose
+    def warm_start(self, previous, keep_idx, num_new):
+        """
+        Khởi tạo bầy từ optimizer của epoch trước: giữ vị trí/vận tốc của UE còn lại (keep_idx),
+        UE mới (nối vào cuối) được khởi tạo ngẫu nhiên. pbest/gbest được chấm lại trên env hiện tại.
+        """
+        new_pos = torch.rand((self.pop_size, num_new), generator=self.generator, device=self.device) * 2.99
+        new_vel = torch.randn((self.pop_size, num_new), generator=self.generator, device=self.device) * 0.1
+        self.pos = torch.cat([previous.pos[:, keep_idx], new_pos], dim=1)
+        self.vel = torch.cat([previous.vel[:, keep_idx], new_vel], dim=1)
+        self.pbest_pos = torch.cat([previous.pbest_pos[:, keep_idx], new_pos], dim=1)
+        self.pbest_cost = self.env.compute_cost(self.pbest_pos.to(torch.uint8))
+
+        if previous.gbest_pos is not None:
+            self.gbest_pos = torch.cat([previous.gbest_pos[keep_idx], new_pos[0]])
+            self.gbest_cost = self.env.compute_cost(self.gbest_pos.to(torch.uint8).unsqueeze(0)).item()
+
+    def decisions(self):
+        # pos luôn nằm trong [0, 2.99] nên phần nguyên (uint8) đã là quyết định {0, 1, 2}
+        return self.pos.to(torch.uint8)
+
+    def score(self, decisions):
+        """costs [pop_size] của quyết định; qua eval_cache nếu có"""
+        if self.eval_cache is None:
+            return self.env.compute_cost(decisions)
+        return self.eval_cache.evaluate(self.env, decisions)
+
+    def update(self, costs):
+        """Một bước PSO: cập nhật pbest/gbest theo costs của vị trí hiện tại rồi cập nhật vận tốc, vị trí"""
+        self.update_best(costs)
+        self.move()
+
+    def update_best(self, costs):
+        """Cập nhật pbest/gbest (có một lần đồng bộ host qua .item() khi gbest cải thiện)"""
+        better_mask = costs < self.pbest_cost
+        self.pbest_pos[better_mask] = self.pos[better_mask].clone()
+        self.pbest_cost[better_mask] = costs[better_mask]
+        min_val, min_idx = torch.min(costs, dim=0)
+        if min_val < self.gbest_cost:
+            self.gbest_cost = min_val.item()
+            self.gbest_pos = self.pos[min_idx].clone()
+
+    def move(self):
+        """Cập nhật vận tốc và vị trí về phía pbest/gbest"""
+        r1, r2 = torch.rand((2, self.pop_size, self.num_ue), generator=self.generator, device=self.device)
+        self.vel = (self.w * self.vel + self.c1 * r1 * (self.pbest_pos - self.pos)
+                    + self.c2 * r2 * (self.gbest_pos - self.pos))
+        self.pos += self.vel
+        self.pos = torch.clamp(self.pos, 0, 2.99)
+
+    def swarm_collapsed(self, tol):
+        """True nếu mọi hạt nằm trong tol quanh gbest và vận tốc không quá tol (bầy đã co lại)"""
+        if self.gbest_pos is None:
+            return False
+        spread = (self.pos - self.gbest_pos).abs().max()
+        return bool(spread <= tol and self.vel.abs().max() <= tol)
+
+    def run(self, max_iter=None, verbose=True, time_budget=None, telemetry=None, early_stop=None): # Đã thêm verbose
+        """
+        time_budget: deadline (giây) cho cả lần chạy; trả về gbest tại thời điểm hết hạn.
+        Thống kê được lưu trong self.run_stats.
+        telemetry: models.telemetry.Telemetry để ghi thời gian từng pha, độ đa dạng và bộ nhớ mỗi thế hệ
+        early_stop: models.anytime.EarlyStopping; khi đó lịch sử ngắn hơn max_iter và
+        run_stats["generations"] / run_stats["stop_reason"] cho biết thế hệ và lý do dừng.
+        self.elapsed[i]: thời gian (giây) từ đầu lần chạy đến hết thế hệ i.
+        """
+        if self.compiled:
+            return self._run_fused(max_iter, verbose, time_budget, telemetry, early_stop)
+        tel = telemetry or NULL_TELEMETRY
+        history = []
+        budget = RunBudget(max_iter, time_budget, early_stop)
+        while not budget.should_stop():
+            i = budget.generations
+            if tel.enabled:
+                with tel.phase("cost_table"):
+                    self.env.get_cost_table()
+            with tel.phase("observe"):
+                decisions = self.decisions()
+            with tel.phase("compute_cost"):
+                costs = self.score(decisions)
+            with tel.phase("update_best"):
+                self.update_best(costs)
+            with tel.phase("evolve"):
+                self.move()
+            history.append(self.gbest_cost)
+            if tel.enabled:
+                with tel.phase("telemetry"):
+                    diversity = population_diversity(decisions)
+                tel.end_generation(i, self.gbest_cost, self.pop_size, diversity)
+            budget.step(self.gbest_cost, self)
+            if verbose and i % 20 == 0:
+                print(f"PSO Iteration {i}: Best Cost = {self.gbest_cost:.4f}")
+        self.run_stats = budget.stats(self.pop_size)
+        if self.eval_cache is not None:
+            self.run_stats["eval_cache"] = self.eval_cache.stats()
+        self.elapsed = budget.times
+        return history
+
+    def _run_fused(self, max_iter, verbose, time_budget, telemetry, early_stop):
+        """
+        Đường compiled của run: số ngẫu nhiên được rút vào bộ đệm cấp phát sẵn, mỗi thế hệ là một lần
+        gọi kernel gộp. gbest cost giữ trên device; chỉ đồng bộ host mỗi thế hệ khi cần
+        (early_stop, telemetry hoặc verbose).
+        """
+        if self.env.contention:
+            raise ValueError("compiled=True requires a non-contention env")
+        step = fused.compiled(fused.pso_generation)
+        tel = telemetry or NULL_TELEMETRY
+        cost_table = self.env.get_cost_table()
+        offsets = torch.arange(self.num_ue, device=self.device) * 3
+        r = torch.empty((2, self.pop_size, self.num_ue), device=self.device)
+        # Hệ số dạng tensor 0 chiều để kernel không bị biên dịch lại khi giá trị đổi
+        w, c1, c2 = (torch.tensor(v, device=self.device) for v in (self.w, self.c1, self.c2))
+        gbest_pos = self.gbest_pos if self.gbest_pos is not None else torch.zeros_like(self.pos[0])
+        gbest_cost = torch.tensor(self.gbest_cost, device=self.device)
+        sync_host = early_stop is not None or tel.enabled
+
+        history = []
+        budget = RunBudget(max_iter, time_budget, early_stop)
+        while not budget.should_stop():
+            i = budget.generations
+            with tel.phase("fused_generation"):
+                torch.rand(r.shape, generator=self.generator, device=self.device, out=r)
+                self.pos, self.vel, self.pbest_pos, self.pbest_cost, gbest_pos, gbest_cost = step(
+                    self.pos, self.vel, self.pbest_pos, self.pbest_cost, gbest_pos, gbest_cost,
+                    r, cost_table, offsets, w, c1, c2)
+            if sync_host or (verbose and i % 20 == 0):
+                self.gbest_cost, self.gbest_pos = gbest_cost.item(), gbest_pos
+            history.append(gbest_cost)
+            if tel.enabled:
+                tel.end_generation(i, self.gbest_cost, self.pop_size)
+            budget.step(self.gbest_cost, self)
+            if verbose and i % 20 == 0:
+                print(f"PSO Iteration {i}: Best Cost = {self.gbest_cost:.4f}")
+        self.gbest_cost, self.gbest_pos = gbest_cost.item(), gbest_pos
+        self.run_stats = budget.stats(self.pop_size)
+        self.elapsed = budget.times
+        return torch.stack(history).tolist()
+
+
+class BatchedPSOOptimizer(PSOOptimizer):
+    """
+    Chạy S bầy PSO độc lập song song (mỗi seed một bầy) trên BatchedSAGINEnv.
+    pos/vel: [S, pop_size, num_ue]; mỗi bầy dùng Generator riêng của env.
+    w, c1, c2: một số thực chung hoặc S giá trị, mỗi bầy một giá trị.
+    generator: Generator dùng chung cho num_populations bầy con trên cùng một env (một lần rút cho cả batch,
+    vd. quét siêu tham số); mặc định mỗi bầy rút từ env.generators và S = env.num_envs.
+    """
+    def __init__(self, config, num_ue, env, w=PSO_DEFAULTS["w"], c1=PSO_DEFAULTS["c1"], c2=PSO_DEFAULTS["c2"],
+                 generator=None, num_populations=None):
+        self.config = config
+        self.num_ue = num_ue
+        self.env = env
+        self.device = config.DEVICE
+        self.pop_size = config.POPULATION_SIZE
+        self.generator = generator
+        self.generators = None if generator is not None else env.generators
+        self.num_envs = num_populations if num_populations is not None else env.num_envs
+        self.pos, self.vel = self._init_swarm()
+        self.pbest_pos = self.pos.clone()
+        self.pbest_cost = torch.full((self.num_envs, self.pop_size), float('inf'), device=self.device)
+        self.gbest_pos = torch.zeros((self.num_envs, self.num_ue), device=self.device)
+        self.gbest_cost = torch.full((self.num_envs,), float('inf'), device=self.device)
+        self.w, self.c1, self.c2 = (per_population(v, 3, self.device) for v in (w, c1, c2))
+        self.elapsed = []
+
+    def _init_swarm(self):
+        """Vị trí và vận tốc ban đầu [S, pop_size, num_ue], theo đúng thứ tự rút số của vòng lặp tuần tự"""
+        if self.generators is None:
+            shape = (self.num_envs, self.pop_size, self.num_ue)
+            pos = torch.rand(shape, generator=self.generator, device=self.device) * 2.99
+            return pos, torch.randn(shape, generator=self.generator, device=self.device) * 0.1
+        shape = (self.pop_size, self.num_ue)
+        pos = torch.stack([torch.rand(shape, generator=g, device=self.device) * 2.99 for g in self.generators])
+        vel = torch.stack([torch.randn(shape, generator=g, device=self.device) * 0.1 for g in self.generators])
+        return pos, vel
+
+    def _rand(self, shape):
+        if self.generators is None:
+            return torch.rand((self.num_envs,) + tuple(shape), generator=self.generator, device=self.device)
+        # Rút số ngẫu nhiên cho từng bầy theo đúng thứ tự của vòng lặp tuần tự
+        return torch.stack([torch.rand(shape, generator=g, device=self.device) for g in self.generators])
+
+    def population_costs(self, decisions):
+        """costs [S, pop_size] của vị trí hiện tại"""
+        return self.env.compute_cost(decisions)
+
+    def run(self, max_iter, verbose=True):
+        """
+        Trả về lịch sử gbest cost của từng bầy: list S phần tử, mỗi phần tử dài max_iter.
+        self.elapsed[i]: thời gian (giây) từ đầu lần chạy đến hết thế hệ i.
+        """
         history = []
-        w, c1, c2 = 0.7, 1.5, 1.5
+        self.elapsed = []
+        start = time.perf_counter()
+        rows = torch.arange(self.num_envs, device=self.device)
         for i in range(max_iter):
-            decisions = torch.clamp(self.pos.long(), 0, 2)
-            costs = self.env.compute_cost(decisions)
+            decisions = self.pos.to(torch.uint8)
+            costs = self.population_costs(decisions)
             better_mask = costs < self.pbest_cost
             self.pbest_pos[better_mask] = self.pos[better_mask].clone()
             self.pbest_cost[better_mask] = costs[better_mask]
-            min_val, min_idx = torch.min(costs, dim=0)
-            if min_val < self.gbest_cost:
-                self.gbest_cost = min_val.item()
-                self.gbest_pos = self.pos[min_idx].clone()
-            r1, r2 = torch.rand(2, self.pop_size, self.num_ue, device=self.device)
-            self.vel = w * self.vel + c1 * r1 * (self.pbest_pos - self.pos) + c2 * r2 * (self.gbest_pos - self.pos)
+            min_val, min_idx = torch.min(costs, dim=1)
+            improved = min_val < self.gbest_cost
+            self.gbest_cost = torch.where(improved, min_val, self.gbest_cost)
+            self.gbest_pos[improved] = self.pos[rows, min_idx][improved]
+            r = self._rand((2, self.pop_size, self.num_ue))
+            r1, r2 = r[:, 0], r[:, 1]
+            self.vel = (self.w * self.vel + self.c1 * r1 * (self.pbest_pos - self.pos)
+                        + self.c2 * r2 * (self.gbest_pos.unsqueeze(1) - self.pos))
             self.pos += self.vel
             self.pos = torch.clamp(self.pos, 0, 2.99)
-            history.append(self.gbest_cost)
+            history.append(self.gbest_cost.clone())
+            self.elapsed.append(time.perf_counter() - start)
             if verbose and i % 20 == 0:
-                print(f"PSO Iteration {i}: Best Cost = {self.gbest_cost:.4f}")
-        return history
+                print(f"Batched PSO Iteration {i}: Mean Best Cost = {self.gbest_cost.mean().item():.4f}")
+        return torch.stack(history, dim=1).tolist()
+
+
+class PaddedPSOOptimizer(BatchedPSOOptimizer):
+    """
+    PSO trên PaddedSAGINEnv: mọi kịch bản tiến hóa trong một vòng lặp, pos/vel [B, pop_size, max_ue].
+    Mỗi env rút số ngẫu nhiên đúng num_ue thật của nó (như BatchedPSOOptimizer chạy riêng từng kịch bản).
+    Vị trí, vận tốc và hệ số ngẫu nhiên tại UE đệm bằng 0 nên mọi số hạng cập nhật ở đó bằng 0:
+    UE đệm luôn ở quyết định 0 (hàng chi phí 0) và không ảnh hưởng tới bầy.
+    """
+    def __init__(self, config, env, w=PSO_DEFAULTS["w"], c1=PSO_DEFAULTS["c1"], c2=PSO_DEFAULTS["c2"]):
+        super().__init__(config, env.max_ue, env, w=w, c1=c1, c2=c2)
+
+    def _init_swarm(self):
+        pos = self._padded(lambda g, n: torch.rand((self.pop_size, n), generator=g, device=self.device) * 2.99)
+        vel = self._padded(lambda g, n: torch.randn((self.pop_size, n), generator=g, device=self.device) * 0.1)
+        return pos, vel
+
+    def _padded(self, draw, leading=()):
+        # draw(generator, num_ue) -> tensor [..., num_ue] của từng env, đệm 0 tới max_ue
+        out = torch.zeros((self.num_envs,) + tuple(leading) + (self.pop_size, self.num_ue), device=self.device)
+        for b, (g, n) in enumerate(zip(self.generators, self.env.sizes)):
+            out[b, ..., :n] = draw(g, n)
+        return out
+
+    def _rand(self, shape):
+        # shape = (2, pop_size, max_ue)
+        return self._padded(lambda g, n: torch.rand(tuple(shape[:-1]) + (n,), generator=g, device=self.device),
+                            leading=shape[:-2])
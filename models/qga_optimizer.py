@@ -1,50 +1,448 @@
+import time
 import torch
 import numpy as np
+from core.encoding import make_lut, sample_codes, unpack_bits, decode, encode
+from core.incremental import IncrementalEvaluator
+from core.rng import clone_generator
+from models.anytime import RunBudget
+from models.local_search import best_improvement
+from models.telemetry import NULL_TELEMETRY, population_diversity
+from models.hyperparams import QGA_DEFAULTS, per_population
+from models import fused
 
 class QGAOptimizer:
-    def __init__(self, config, num_ue, env):
+    # Ước lượng bộ nhớ tạm (bytes) cho mỗi UE của một cá thể trong một thế hệ
+    _BYTES_PER_UE = 96
+
+    def __init__(self, config, num_ue, env, local_search=False, ls_elite=5, ls_time_share=0.2,
+                 memory_budget=None, decision_lut=None, pop_size=None, generator=None,
+                 base_step=QGA_DEFAULTS["base_step"], mutation_rate=QGA_DEFAULTS["mutation_rate"], compiled=False,
+                 eval_cache=None, reject_11=False):
+        """
+        Quần thể được quan sát dưới dạng code nén uint8 (core.encoding): code = (b0 << 1) | b1,
+        decision_lut ánh xạ 4 code -> quyết định (mặc định (0, 1, 2, 2) như clamp(b0 * 2 + b1, 0, 2)).
+        reject_11=True: quan sát với điều kiện cặp qubit khác (1, 1), nên ở theta = pi/4 ba quyết định
+        đồng xác suất thay vì LEO 1/2 (không hỗ trợ compiled).
+        best_sol_bits lưu code [num_ue] của lời giải tốt nhất.
+        pop_size: kích thước quần thể (mặc định config.POPULATION_SIZE).
+        generator: torch.Generator cho mọi phép rút ngẫu nhiên (mặc định: rút tiếp từ env.generator).
+        base_step: bước xoay ban đầu (giảm tuyến tính về 0 theo progress); mutation_rate: xác suất đột biến mỗi qubit.
+        local_search=True: sau mỗi lần quan sát, tinh chỉnh lời giải tốt nhất và ls_elite cá thể tốt nhất
+        bằng local search best-improvement (đổi một UE, chấm bằng delta), chiếm khoảng ls_time_share
+        thời gian của mỗi thế hệ.
+        memory_budget: giới hạn bộ nhớ tạm (bytes) của một thế hệ; quần thể được xử lý theo khối cá thể
+        và chỉ giữ code của cả quần thể. Kết quả trên CPU giống hệt đường không chia khối.
+        compiled=True: run dùng kernel gộp torch.compile (models.fused.qga_generation) cho cả thế hệ,
+        cùng luồng RNG với đường eager; chỉ hỗ trợ env không contention, không local search / memory_budget.
+        eval_cache: models.eval_cache.EvaluationCache; quần thể quan sát được chấm qua cache (gộp cá thể trùng,
+        chỉ chấm lời giải chưa gặp), thống kê hit-rate trong run_stats["eval_cache"]. Không áp dụng cho
+        đường memory_budget / compiled.
+        """
         self.config = config
         self.num_ue = num_ue
         self.env = env
         self.device = config.DEVICE
-        self.pop_size = config.POPULATION_SIZE
+        self.pop_size = pop_size or config.POPULATION_SIZE
+        self.generator = generator if generator is not None else env.generator
         self.theta = torch.full((self.pop_size, self.num_ue, 2), np.pi/4, device=self.device)
         self.best_cost = float('inf')
         self.best_sol_bits = None
+        self.run_stats = {}
+        self.elapsed = []
+        self.local_search = local_search
+        self.ls_elite = ls_elite
+        self.ls_time_share = ls_time_share
+        self.memory_budget = memory_budget
+        self.lut = make_lut(decision_lut, self.device)
+        self.base_step = base_step
+        self.mutation_rate = mutation_rate
+        self.compiled = compiled
+        self.eval_cache = eval_cache
+        self.reject_11 = reject_11
+
+    def warm_start(self, previous, keep_idx, num_new, relax=0.0):
+        """
+        Khởi tạo từ optimizer của epoch trước thay vì theta = pi/4.
+        keep_idx: chỉ số (theo epoch trước) của các UE còn lại; num_new UE mới được nối vào cuối.
+        relax: kéo theta về pi/4 một phần để giữ khả năng khám phá.
+        """
+        theta = previous.theta[:, keep_idx]
+        if relax > 0:
+            theta = np.pi/4 + (theta - np.pi/4) * (1 - relax)
+        new_theta = torch.full((self.pop_size, num_new, 2), np.pi/4, device=self.device)
+        self.theta = torch.cat([theta, new_theta], dim=1)
+
+        if previous.best_sol_bits is not None:
+            # Lời giải tốt nhất cũ (UE mới xử lý tại chỗ) được chấm lại trên env hiện tại
+            local = torch.zeros(num_new, dtype=torch.uint8, device=self.device)
+            self.best_sol_bits = torch.cat([previous.best_sol_bits[keep_idx], encode(local, self.lut)])
+            self.best_cost = self.env.compute_cost(self.best_sol_bits.unsqueeze(0), lut=self.lut).item()
 
     def observe(self):
+        """Trả về code quan sát nén uint8 [pop_size, num_ue]; env.compute_cost(codes, lut=self.lut) chấm trực tiếp"""
         probs = torch.sin(self.theta)**2
-        rand_vals = torch.rand_like(probs)
-        bits = (rand_vals < probs).long()
-        decisions = bits[:, :, 0] * 2 + bits[:, :, 1]
-        decisions = torch.clamp(decisions, 0, 2)
-        return bits, decisions
+        return sample_codes(probs, self._rand(probs.shape), self.reject_11)
+
+    def _rand(self, shape):
+        return torch.rand(shape, generator=self.generator, device=self.device)
+
+    def score(self, codes):
+        """costs [pop_size] của code quan sát; qua eval_cache nếu có (cùng giá trị với chấm trực tiếp)"""
+        if self.eval_cache is None:
+            return self.env.compute_cost(codes, lut=self.lut)
+        return self.eval_cache.evaluate(self.env, self.decode(codes))
+
+    def skip_run(self, max_iter):
+        """
+        Rút bỏ đúng các số ngẫu nhiên mà run(max_iter) sẽ rút (không local search / memory_budget),
+        để một optimizer khác tiếp tục luồng RNG như khi chạy sau QGA trong cùng phiên.
+        """
+        for _ in range(3 * max_iter):
+            self._rand(self.theta.shape)
+
+    def decode(self, codes):
+        """code uint8 -> quyết định uint8 {0, 1, 2}"""
+        return decode(codes, self.lut)
 
-    def evolve(self, current_bits, costs, iteration, max_iter):
+    def _direction(self, current_codes):
+        # Hướng xoay từng qubit về lời giải tốt nhất: +1 (0 -> 1), -1 (1 -> 0), 0 nếu trùng
+        best = unpack_bits(self.best_sol_bits).unsqueeze(0).float()
+        return best - unpack_bits(current_codes).float()
+
+    def refine(self, codes, costs, time_limit=None):
+        """
+        Tinh chỉnh lời giải tốt nhất hiện có cùng các cá thể elite bằng local search.
+        Elite cải thiện được ghi đè vào codes/costs (evolve xoay theta theo chúng);
+        lời giải tốt nhất cải thiện được ghi thẳng vào best_sol_bits.
+        """
+        k = min(self.ls_elite, costs.shape[0])
+        elite = torch.topk(costs, k, largest=False).indices
+        candidates = codes[elite]
+        # Tinh chỉnh cả lời giải tốt nhất giúp đích xoay của theta cải thiện ổn định qua các thế hệ
+        has_best = self.best_sol_bits is not None
+        if has_best:
+            candidates = torch.cat([self.best_sol_bits.unsqueeze(0), candidates])
+
+        evaluator = IncrementalEvaluator(self.env, self.decode(candidates))
+        if best_improvement(evaluator, time_limit=time_limit) == 0:
+            return codes, costs
+
+        refined_costs = evaluator.costs()
+        refined_codes = encode(evaluator.decisions, self.lut)
+        if has_best and refined_costs[0] < self.best_cost:
+            self.best_cost = refined_costs[0].item()
+            self.best_sol_bits = refined_codes[0]
+
+        codes = codes.clone()
+        costs = costs.clone()
+        codes[elite] = refined_codes[int(has_best):]
+        costs[elite] = refined_costs[int(has_best):]
+        return codes, costs
+
+    def evolve(self, current_codes, costs, iteration, max_iter, progress=None):
+        """
+        current_codes: code quan sát nén [pop_size, num_ue] (từ observe)
+        progress: tỉ lệ ngân sách đã dùng trong [0, 1]; mặc định là iteration / max_iter
+        """
+        self.update_best(current_codes, costs)
+        self.rotate(current_codes, iteration / max_iter if progress is None else progress)
+
+    def update_best(self, current_codes, costs):
+        """Cập nhật lời giải tốt nhất (có một lần đồng bộ host qua .item() khi cải thiện)"""
         min_val, min_idx = torch.min(costs, dim=0)
         if min_val < self.best_cost:
             self.best_cost = min_val.item()
-            self.best_sol_bits = current_bits[min_idx].clone()
-
-        base_step = 0.02 * np.pi
-        step_size = base_step * (1 - iteration / max_iter)
-        best_bits = self.best_sol_bits.unsqueeze(0)
-        
-        direction = torch.zeros_like(self.theta)
-        direction[(current_bits == 0) & (best_bits == 1)] = 1.0
-        direction[(current_bits == 1) & (best_bits == 0)] = -1.0
-        
-        mutation = (torch.rand_like(self.theta) < 0.01).float() * (torch.rand_like(self.theta) - 0.5)
+            self.best_sol_bits = current_codes[min_idx].clone()
+
+    def rotate(self, current_codes, progress):
+        """Xoay theta về best_sol_bits với bước giảm dần theo progress, kèm đột biến nhỏ"""
+        step_size = self.base_step * (1 - progress)
+        direction = self._direction(current_codes)
+
+        mutation = (self._rand(self.theta.shape) < self.mutation_rate).float() * (self._rand(self.theta.shape) - 0.5)
         self.theta += (direction * step_size) + (mutation * 0.01)
         self.theta = torch.clamp(self.theta, 0.01, np.pi/2 - 0.01)
 
-    def run(self, max_iter, verbose=True): # Đã thêm verbose
+    def theta_saturated(self, eps):
+        """True nếu mọi góc theta đều cách biên clamp [0.01, pi/2 - 0.01] không quá eps (quần thể đã đông cứng)"""
+        low = self.theta - 0.01
+        high = (np.pi/2 - 0.01) - self.theta
+        return bool(torch.minimum(low, high).max() <= eps)
+
+    def _chunk_rows(self):
+        """Số cá thể mỗi khối sao cho bộ nhớ tạm không vượt memory_budget"""
+        return max(1, int(self.memory_budget // (self.num_ue * self._BYTES_PER_UE)))
+
+    def observe_and_evaluate_chunked(self):
+        """
+        Quan sát + đánh giá theo khối cá thể. Chỉ giữ code (uint8) và costs của cả quần thể.
+        Trả về: codes [pop_size, num_ue], costs [pop_size]
+        """
+        rows = self._chunk_rows()
+        codes = torch.empty((self.pop_size, self.num_ue), dtype=torch.uint8, device=self.device)
+        costs = torch.empty(self.pop_size, device=self.device)
+        for start in range(0, self.pop_size, rows):
+            end = min(start + rows, self.pop_size)
+            probs = torch.sin(self.theta[start:end])**2
+            codes[start:end] = sample_codes(probs, self._rand(probs.shape), self.reject_11)
+            costs[start:end] = self.env.compute_cost(codes[start:end], lut=self.lut)
+        return codes, costs
+
+    def evolve_chunked(self, current_codes, costs, iteration, max_iter, progress=None):
+        """Giống evolve nhưng cập nhật theta theo khối cá thể (xem rotate_chunked)"""
+        self.update_best(current_codes, costs)
+        self.rotate_chunked(current_codes, iteration / max_iter if progress is None else progress)
+
+    def rotate_chunked(self, current_codes, progress):
+        """
+        Giống rotate nhưng theo khối cá thể.
+        Để giữ đúng thứ tự rút số của rotate (toàn bộ mask đột biến rồi mới tới giá trị đột biến),
+        giá trị đột biến được rút từ một bản sao của Generator, tua qua phần mask trước.
+        """
+        step_size = self.base_step * (1 - progress)
+
+        rows = self._chunk_rows()
+        chunks = [(start, min(start + rows, self.pop_size)) for start in range(0, self.pop_size, rows)]
+        value_gen = clone_generator(self.generator)
+        for start, end in chunks:
+            torch.rand((end - start, self.num_ue, 2), generator=value_gen, device=self.device)
+
+        for start, end in chunks:
+            theta = self.theta[start:end]
+            direction = self._direction(current_codes[start:end])
+
+            mask = self._rand(theta.shape) < self.mutation_rate
+            mutation = mask.float() * (torch.rand(theta.shape, generator=value_gen, device=self.device) - 0.5)
+            theta += (direction * step_size) + (mutation * 0.01)
+            self.theta[start:end] = torch.clamp(theta, 0.01, np.pi/2 - 0.01)
+
+        # Generator tiếp tục từ sau phần giá trị đột biến, như sau rotate thông thường
+        self.generator.set_state(value_gen.get_state())
+
+    def run(self, max_iter=None, verbose=True, time_budget=None, on_generation=None, telemetry=None,
+            early_stop=None): # Đã thêm verbose
+        """
+        time_budget: deadline (giây) cho cả lần chạy. Bước xoay giảm dần theo tỉ lệ ngân sách đã dùng
+        và trả về lời giải best-so-far khi hết thời gian. Thống kê được lưu trong self.run_stats.
+        on_generation(optimizer, iteration): gọi sau mỗi thế hệ (vd. trao đổi elite giữa các đảo)
+        telemetry: models.telemetry.Telemetry để ghi thời gian từng pha, độ đa dạng và bộ nhớ mỗi thế hệ
+        early_stop: models.anytime.EarlyStopping; khi đó lịch sử ngắn hơn max_iter và
+        run_stats["generations"] / run_stats["stop_reason"] cho biết thế hệ và lý do dừng.
+        self.elapsed[i]: thời gian (giây) từ đầu lần chạy đến hết thế hệ i.
+        """
+        if self.compiled:
+            return self._run_fused(max_iter, verbose, time_budget, on_generation, telemetry, early_stop)
+        tel = telemetry or NULL_TELEMETRY
         history = []
-        for i in range(max_iter):
-            bits, decisions = self.observe()
-            costs = self.env.compute_cost(decisions)
-            self.evolve(bits, costs, i, max_iter)
+        budget = RunBudget(max_iter, time_budget, early_stop)
+        core_time = None
+        while not budget.should_stop():
+            i = budget.generations
+            progress = budget.progress()
+            gen_start = time.perf_counter()
+            if tel.enabled:
+                # Tách riêng việc dựng lại bảng (get_channel_rates) khỏi compute_cost
+                with tel.phase("cost_table"):
+                    self.env.get_cost_table()
+            if self.memory_budget is not None:
+                with tel.phase("observe_evaluate"):
+                    codes, costs = self.observe_and_evaluate_chunked()
+            else:
+                with tel.phase("observe"):
+                    codes = self.observe()
+                with tel.phase("compute_cost"):
+                    costs = self.score(codes)
+            if self.local_search:
+                # Ngân sách local search tỉ lệ với thời gian phần lõi (observe/đánh giá/evolve) của thế hệ
+                if core_time is None:
+                    core_time = time.perf_counter() - gen_start
+                ls_start = time.perf_counter()
+                with tel.phase("local_search"):
+                    codes, costs = self.refine(codes, costs,
+                                               time_limit=self.ls_time_share / (1 - self.ls_time_share) * core_time)
+                ls_time = time.perf_counter() - ls_start
+            with tel.phase("update_best"):
+                self.update_best(codes, costs)
+            with tel.phase("evolve"):
+                if self.memory_budget is not None:
+                    self.rotate_chunked(codes, progress)
+                else:
+                    self.rotate(codes, progress)
+            if self.local_search:
+                core_time = time.perf_counter() - gen_start - ls_time
+            if on_generation is not None:
+                on_generation(self, i)
             history.append(self.best_cost)
+            if tel.enabled:
+                with tel.phase("telemetry"):
+                    diversity = population_diversity(self.decode(codes))
+                tel.end_generation(i, self.best_cost, self.pop_size, diversity)
+            budget.step(self.best_cost, self)
             if verbose and i % 20 == 0:
                 print(f"QGA Iteration {i}: Best Cost = {self.best_cost:.4f}")
+        self.run_stats = budget.stats(self.pop_size)
+        if self.eval_cache is not None:
+            self.run_stats["eval_cache"] = self.eval_cache.stats()
+        self.elapsed = budget.times
         return history
+
+    def _run_fused(self, max_iter, verbose, time_budget, on_generation, telemetry, early_stop):
+        """
+        Đường compiled của run: số ngẫu nhiên được rút vào bộ đệm cấp phát sẵn, mỗi thế hệ là một lần
+        gọi kernel gộp. best cost giữ trên device; chỉ đồng bộ host mỗi thế hệ khi cần
+        (on_generation, early_stop, telemetry hoặc verbose).
+        """
+        if self.local_search or self.memory_budget is not None or self.env.contention or self.reject_11:
+            raise ValueError("compiled=True requires a non-contention env without local_search, "
+                             "memory_budget or reject_11")
+        step = fused.compiled(fused.qga_generation)
+        tel = telemetry or NULL_TELEMETRY
+        packed = self.env.get_packed_cost_table(self.lut)
+        offsets = torch.arange(self.num_ue, device=self.device) * 4
+        shape = self.theta.shape
+        r_obs, r_mask, r_val = (torch.empty(shape, device=self.device) for _ in range(3))
+        # Tham số dạng tensor 0 chiều để kernel không bị biên dịch lại khi giá trị đổi
+        step_size = torch.zeros((), device=self.device)
+        mutation_rate = torch.tensor(self.mutation_rate, device=self.device)
+        best_codes = self.best_sol_bits if self.best_sol_bits is not None else \
+            torch.zeros(self.num_ue, dtype=torch.uint8, device=self.device)
+        best_cost = torch.tensor(self.best_cost, device=self.device)
+        sync_host = on_generation is not None or early_stop is not None or tel.enabled
+
+        history = []
+        budget = RunBudget(max_iter, time_budget, early_stop)
+        while not budget.should_stop():
+            i = budget.generations
+            step_size.fill_(self.base_step * (1 - budget.progress()))
+            with tel.phase("fused_generation"):
+                # Cùng thứ tự rút số với observe -> rotate (mask rồi giá trị đột biến) của đường eager
+                for buf in (r_obs, r_mask, r_val):
+                    torch.rand(shape, generator=self.generator, device=self.device, out=buf)
+                self.theta, best_codes, best_cost = step(self.theta, r_obs, r_mask, r_val, packed, offsets,
+                                                         best_codes, best_cost, step_size, mutation_rate)
+            if sync_host or (verbose and i % 20 == 0):
+                self.best_cost, self.best_sol_bits = best_cost.item(), best_codes
+            if on_generation is not None:
+                on_generation(self, i)
+                best_cost = torch.tensor(self.best_cost, device=self.device)
+                best_codes = self.best_sol_bits
+            history.append(best_cost)
+            if tel.enabled:
+                tel.end_generation(i, self.best_cost, self.pop_size)
+            budget.step(self.best_cost, self)
+            if verbose and i % 20 == 0:
+                print(f"QGA Iteration {i}: Best Cost = {self.best_cost:.4f}")
+        self.best_cost, self.best_sol_bits = best_cost.item(), best_codes
+        self.run_stats = budget.stats(self.pop_size)
+        self.elapsed = budget.times
+        return torch.stack(history).tolist()
+
+
+class BatchedQGAOptimizer(QGAOptimizer):
+    """
+    Tiến hóa S quần thể QGA độc lập song song (mỗi seed một quần thể).
+    theta: [S, pop_size, num_ue, 2]; mỗi quần thể dùng Generator riêng của env.
+    base_step / mutation_rate: một số thực chung hoặc S giá trị, mỗi quần thể một giá trị.
+    generator: Generator dùng chung cho num_populations quần thể con trên cùng một env (một lần rút cho cả batch,
+    vd. quét siêu tham số, MO-QGA); mặc định mỗi quần thể rút từ env.generators và S = env.num_envs.
+    reject_11: quan sát không lệch như QGAOptimizer.
+    """
+    def __init__(self, config, num_ue, env, base_step=QGA_DEFAULTS["base_step"],
+                 mutation_rate=QGA_DEFAULTS["mutation_rate"], reject_11=False, generator=None, num_populations=None):
+        self.config = config
+        self.num_ue = num_ue
+        self.env = env
+        self.device = config.DEVICE
+        self.pop_size = config.POPULATION_SIZE
+        self.generator = generator
+        self.generators = None if generator is not None else env.generators
+        self.num_envs = num_populations if num_populations is not None else env.num_envs
+        self.theta = torch.full((self.num_envs, self.pop_size, self.num_ue, 2), np.pi/4, device=self.device)
+        self.best_cost = torch.full((self.num_envs,), float('inf'), device=self.device)
+        self.best_sol_bits = torch.zeros((self.num_envs, self.num_ue), dtype=torch.uint8, device=self.device)
+        self.lut = make_lut(None, self.device)
+        self.base_step = per_population(base_step, 4, self.device)
+        self.mutation_rate = per_population(mutation_rate, 4, self.device)
+        self.reject_11 = reject_11
+        self.elapsed = []
+
+    def _rand(self, shape):
+        if self.generators is None:
+            # Các quần thể con dùng chung một Generator: một lần rút cho cả batch
+            return torch.rand((self.num_envs,) + tuple(shape), generator=self.generator, device=self.device)
+        # Rút số ngẫu nhiên cho từng quần thể theo đúng thứ tự của vòng lặp tuần tự
+        return torch.stack([torch.rand(shape, generator=g, device=self.device) for g in self.generators])
+
+    def observe(self):
+        """Trả về (codes, decisions), đều uint8 [S, pop_size, num_ue]"""
+        probs = torch.sin(self.theta)**2
+        codes = sample_codes(probs, self._rand(probs.shape[1:]), self.reject_11)
+        return codes, self.decode(codes)
+
+    def _direction(self, current_codes):
+        best = unpack_bits(self.best_sol_bits).unsqueeze(1).float()
+        return best - unpack_bits(current_codes).float()
+
+    def evolve(self, current_codes, costs, iteration, max_iter, progress=None):
+        min_val, min_idx = torch.min(costs, dim=1)
+        improved = min_val < self.best_cost
+        self.best_cost = torch.where(improved, min_val, self.best_cost)
+        candidates = current_codes[torch.arange(self.num_envs, device=self.device), min_idx]
+        self.best_sol_bits[improved] = candidates[improved]
+
+        if progress is None:
+            progress = iteration / max_iter
+        step_size = self.base_step * (1 - progress)
+        direction = self._direction(current_codes)
+
+        shape = self.theta.shape[1:]
+        mutation = (self._rand(shape) < self.mutation_rate).float() * (self._rand(shape) - 0.5)
+        self.theta += (direction * step_size) + (mutation * 0.01)
+        self.theta = torch.clamp(self.theta, 0.01, np.pi/2 - 0.01)
+
+    def population_costs(self, codes, decisions):
+        """costs [S, pop_size] của quần thể quan sát được"""
+        return self.env.compute_cost(decisions)
+
+    def run(self, max_iter, verbose=True):
+        """
+        Trả về lịch sử best cost của từng quần thể: list S phần tử, mỗi phần tử dài max_iter.
+        self.elapsed[i]: thời gian (giây) từ đầu lần chạy đến hết thế hệ i.
+        """
+        history = []
+        self.elapsed = []
+        start = time.perf_counter()
+        for i in range(max_iter):
+            codes, decisions = self.observe()
+            costs = self.population_costs(codes, decisions)
+            self.evolve(codes, costs, i, max_iter)
+            history.append(self.best_cost.clone())
+            self.elapsed.append(time.perf_counter() - start)
+            if verbose and i % 20 == 0:
+                print(f"Batched QGA Iteration {i}: Mean Best Cost = {self.best_cost.mean().item():.4f}")
+        return torch.stack(history, dim=1).tolist()
+
+
+class PaddedQGAOptimizer(BatchedQGAOptimizer):
+    """
+    QGA trên PaddedSAGINEnv: mọi kịch bản (num_ue khác nhau) tiến hóa trong một vòng lặp,
+    theta [B, pop_size, max_ue, 2]. Mỗi env rút số ngẫu nhiên đúng num_ue thật của nó nên quỹ đạo
+    khớp BatchedQGAOptimizer chạy riêng từng kịch bản (sai khác chỉ ở làm tròn của chi phí);
+    theta của UE đệm không bị xoay / đột biến và giữ nguyên pi/4.
+    """
+    def __init__(self, config, env, base_step=QGA_DEFAULTS["base_step"], mutation_rate=QGA_DEFAULTS["mutation_rate"],
+                 reject_11=False):
+        super().__init__(config, env.max_ue, env, base_step=base_step, mutation_rate=mutation_rate, reject_11=reject_11)
+        self.mask = env.mask.view(self.num_envs, 1, self.num_ue, 1)
+
+    def _rand(self, shape):
+        # shape = (pop_size, max_ue, 2); phần đệm bằng 1: không quan sát được qubit 1, không đột biến
+        out = torch.ones((self.num_envs,) + tuple(shape), device=self.device)
+        for b, (g, n) in enumerate(zip(self.generators, self.env.sizes)):
+            out[b, :, :n] = torch.rand((shape[0], n) + tuple(shape[2:]), generator=g, device=self.device)
+        return out
+
+    def evolve(self, current_codes, costs, iteration, max_iter, progress=None):
+        super().evolve(current_codes, costs, iteration, max_iter, progress)
+        # Hướng xoay về best tại UE đệm có thể khác 0: giữ theta của chúng ở giá trị ban đầu
+        self.theta = torch.where(self.mask, self.theta, np.pi/4)
@@ -0,0 +1,78 @@
+import time
+
+import numpy as np
+import torch
+
+from core.incremental import IncrementalEvaluator
+from models.local_search import best_improvement
+
+# Ngưỡng tương đối mặc định cho time-to-within-epsilon
+DEFAULT_EPSILON = 0.01
+
+
+def solve_reference(env, time_limit=None):
+    """
+    Lời giải tham chiếu để đo khoảng cách tối ưu của QGA / PSO trên env.
+
+    Không có contention: chi phí là trung bình của các số hạng độc lập theo UE nên argmin theo từng UE
+    trên cost_table là tối ưu toàn cục (lower_bound = upper_bound, exact=True).
+
+    Có contention (chi phí chia sẻ n_j * S_j trên mỗi node): vì n_j >= 1 với mọi node được chọn,
+    chi phí của từng UE không nhỏ hơn fixed + shared = cost_table, nên argmin không tải vẫn là cận dưới.
+    Cận trên là local search best-improvement (chấm bằng delta) xuất phát từ lời giải đó và từ
+    lời giải toàn bộ xử lý tại chỗ, lấy kết quả tốt hơn. Cận dưới này bỏ qua toàn bộ tải nên có thể
+    cách xa tối ưu khi nhiều UE dồn về ít node; khoảng cách thực nằm giữa hai cận.
+
+    Trả về dict: lower_bound, upper_bound, exact, decisions (uint8 [num_ue], lời giải đạt upper_bound), time (giây)
+    """
+    start = time.perf_counter()
+    cost_table = env.get_cost_table()
+    min_costs, argmin = torch.min(cost_table, dim=1)
+    lower_bound = min_costs.mean().item()
+
+    if not env.contention:
+        return {
+            "lower_bound": lower_bound,
+            "upper_bound": lower_bound,
+            "exact": True,
+            "decisions": argmin.to(torch.uint8),
+            "time": time.perf_counter() - start
+        }
+
+    starts = torch.stack([argmin, torch.zeros_like(argmin)])
+    evaluator = IncrementalEvaluator(env, starts)
+    best_improvement(evaluator, time_limit=time_limit)
+    costs = evaluator.costs()
+    best = torch.argmin(costs)
+    return {
+        "lower_bound": lower_bound,
+        "upper_bound": costs[best].item(),
+        "exact": False,
+        "decisions": evaluator.decisions[best].to(torch.uint8),
+        "time": time.perf_counter() - start
+    }
+
+
+def optimality_gap(cost, reference):
+    """Khoảng cách tương đối (%) tới cận dưới; đúng bằng khoảng cách tới tối ưu khi reference["exact"]"""
+    return (cost - reference["lower_bound"]) / reference["lower_bound"] * 100
+
+
+def time_to_within(history, elapsed, target, epsilon=DEFAULT_EPSILON):
+    """
+    Thời gian (giây, theo elapsed của từng thế hệ) đến khi best cost lần đầu <= target * (1 + epsilon).
+    None nếu lần chạy không đạt ngưỡng.
+    """
+    reached = np.nonzero(np.asarray(history) <= target * (1 + epsilon))[0]
+    return elapsed[reached[0]] if len(reached) else None
+
+
+def gap_report(history, elapsed, reference, epsilon=DEFAULT_EPSILON):
+    """Các cột kết quả cho một lần chạy: cận dưới / trên, khoảng cách tối ưu và time-to-within-epsilon"""
+    return {
+        "Lower_Bound": reference["lower_bound"],
+        "Upper_Bound": reference["upper_bound"],
+        "Exact": reference["exact"],
+        "Gap": optimality_gap(history[-1], reference),
+        "Time_To_Eps": time_to_within(history, elapsed, reference["lower_bound"], epsilon)
+    }
@@ -0,0 +1,68 @@
+import numpy as np
+from models.hyperparams import QGA_DEFAULTS, PSO_DEFAULTS, settings_column
+from models.qga_optimizer import BatchedQGAOptimizer
+from models.pso_optimizer import BatchedPSOOptimizer
+
+
+class SweepQGAOptimizer(BatchedQGAOptimizer):
+    """
+    Quét siêu tham số QGA trong một lần chạy: mỗi setting (dict base_step / mutation_rate,
+    thiếu thì lấy mặc định) là một quần thể con, tất cả tiến hóa trong một batch
+    [num_settings, pop_size, num_ue, 2] trên cùng một env (dùng chung bảng chi phí đã cache).
+    """
+    def __init__(self, config, num_ue, env, settings, generator=None, reject_11=False):
+        self.settings = [{**QGA_DEFAULTS, **s} for s in settings]
+        super().__init__(config, num_ue, env, reject_11=reject_11,
+                         base_step=settings_column(self.settings, "base_step", QGA_DEFAULTS),
+                         mutation_rate=settings_column(self.settings, "mutation_rate", QGA_DEFAULTS),
+                         generator=generator if generator is not None else env.generator,
+                         num_populations=len(self.settings))
+
+    def population_costs(self, codes, decisions):
+        # Cùng một env cho mọi quần thể con: chấm thẳng code nén trên bảng [num_ue, 4]
+        return self.env.compute_cost(codes.view(-1, self.num_ue), lut=self.lut).view(self.num_envs, self.pop_size)
+
+
+class SweepPSOOptimizer(BatchedPSOOptimizer):
+    """
+    Quét siêu tham số PSO trong một lần chạy: mỗi setting (dict w / c1 / c2, thiếu thì lấy mặc định)
+    là một bầy con, tất cả cập nhật trong một batch [num_settings, pop_size, num_ue] trên cùng một env.
+    """
+    def __init__(self, config, num_ue, env, settings, generator=None):
+        self.settings = [{**PSO_DEFAULTS, **s} for s in settings]
+        super().__init__(config, num_ue, env,
+                         **{name: settings_column(self.settings, name, PSO_DEFAULTS) for name in ("w", "c1", "c2")},
+                         generator=generator if generator is not None else env.generator,
+                         num_populations=len(self.settings))
+
+    def population_costs(self, decisions):
+        return self.env.compute_cost(decisions.view(-1, self.num_ue)).view(self.num_envs, self.pop_size)
+
+
+def rank_settings(optimizer, history, target=None, rel_tol=0.05):
+    """
+    Bảng xếp hạng các setting sau một lần quét.
+    history: lịch sử best cost [num_settings][max_iter] (từ optimizer.run)
+    target: ngưỡng chi phí cho time-to-target; mặc định là chi phí cuối tốt nhất * (1 + rel_tol).
+    Trả về list dict (setting, final_cost, gens_to_target, time_to_target) sắp theo
+    chi phí cuối rồi thời gian đạt ngưỡng (None nếu không đạt).
+    """
+    history = np.asarray(history)
+    final = history[:, -1]
+    if target is None:
+        target = float(final.min()) * (1 + rel_tol)
+    rows = []
+    for s, setting in enumerate(optimizer.settings):
+        reached = np.nonzero(history[s] <= target)[0]
+        gen = int(reached[0]) if len(reached) else None
+        rows.append({
+            **setting,
+            "final_cost": float(final[s]),
+            "target": target,
+            "gens_to_target": None if gen is None else gen + 1,
+            "time_to_target": None if gen is None else optimizer.elapsed[gen],
+        })
+    rows.sort(key=lambda r: (r["final_cost"], float('inf') if r["time_to_target"] is None else r["time_to_target"]))
+    for rank, row in enumerate(rows, start=1):
+        row["rank"] = rank
+    return rows
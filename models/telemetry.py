@@ -0,0 +1,119 @@
+import contextlib
+import csv
+import json
+import resource
+import time
+
+import torch
+
+
+def population_diversity(decisions):
+    """
+    Độ đa dạng của quần thể quyết định [pop_size, num_ue] (giá trị {0, 1, 2}):
+    chỉ số Gini-Simpson của phân bố quyết định trên từng UE, lấy trung bình và chuẩn hóa về [0, 1]
+    (0: mọi cá thể giống hệt nhau, 1: ba quyết định chia đều ở mọi UE).
+    """
+    counts = torch.stack([(decisions == d).sum(dim=0) for d in range(3)]).float()
+    freq = counts / decisions.shape[0]
+    gini = 1 - (freq ** 2).sum(dim=0)
+    return (gini.mean() / (2 / 3)).item()
+
+
+def memory_high_water(device):
+    """Đỉnh bộ nhớ (bytes): bộ nhớ CUDA đã cấp phát trên GPU, RSS của process trên CPU"""
+    if torch.device(device).type == "cuda":
+        return torch.cuda.max_memory_allocated(device)
+    # ru_maxrss tính bằng KB trên Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class NullTelemetry:
+    """Telemetry tắt: mọi hook là no-op để vòng lặp tối ưu gần như không tốn thêm chi phí"""
+    enabled = False
+
+    def phase(self, name):
+        return _NULL_PHASE
+
+    def end_generation(self, generation, best_cost, evaluations, diversity=None):
+        pass
+
+
+_NULL_PHASE = contextlib.nullcontext()
+NULL_TELEMETRY = NullTelemetry()
+
+
+class Telemetry:
+    """
+    Ghi thời gian từng pha của mỗi thế hệ (observe, compute_cost, evolve, ...), số lượt đánh giá,
+    độ đa dạng quần thể và đỉnh bộ nhớ. Truyền vào optimizer.run(telemetry=...).
+    sync=True: đồng bộ device ở cuối mỗi pha để thời gian GPU được tính đúng pha (không ảnh hưởng CPU).
+    Xuất ra Chrome trace JSON (chrome://tracing, Perfetto) hoặc CSV mỗi thế hệ một dòng.
+    """
+    enabled = True
+
+    def __init__(self, device="cpu", sync=True):
+        self.device = device
+        self.sync = sync and torch.device(device).type == "cuda"
+        self.start = time.perf_counter()
+        self.events = []        # (name, generation, start_s, duration_s)
+        self.generations = []   # dict cho từng thế hệ
+        self._current = {}
+
+    def _now(self):
+        if self.sync:
+            torch.cuda.synchronize(self.device)
+        return time.perf_counter() - self.start
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = self._now()
+        try:
+            yield
+        finally:
+            duration = self._now() - start
+            self.events.append((name, len(self.generations), start, duration))
+            self._current[name] = self._current.get(name, 0.0) + duration
+
+    def end_generation(self, generation, best_cost, evaluations, diversity=None):
+        record = {
+            "generation": generation,
+            "time": self._now(),
+            "best_cost": float(best_cost),
+            "evaluations": evaluations,
+            "diversity": diversity,
+            "memory_peak": memory_high_water(self.device),
+        }
+        record.update({f"{name}_ms": duration * 1e3 for name, duration in self._current.items()})
+        self.generations.append(record)
+        self._current = {}
+
+    def phase_totals(self):
+        """Tổng thời gian (giây) của từng pha trên cả lần chạy"""
+        totals = {}
+        for name, _, _, duration in self.events:
+            totals[name] = totals.get(name, 0.0) + duration
+        return totals
+
+    def to_chrome_trace(self, path, process_name="optimizer"):
+        trace = [{"name": "process_name", "ph": "M", "pid": 0, "tid": 0, "args": {"name": process_name}}]
+        for name, generation, start, duration in self.events:
+            trace.append({"name": name, "ph": "X", "pid": 0, "tid": 0, "ts": start * 1e6,
+                          "dur": duration * 1e6, "args": {"generation": generation}})
+        for record in self.generations:
+            counters = {"best_cost": record["best_cost"], "memory_peak": record["memory_peak"]}
+            if record["diversity"] is not None:
+                counters["diversity"] = record["diversity"]
+            for name, value in counters.items():
+                trace.append({"name": name, "ph": "C", "pid": 0, "tid": 0, "ts": record["time"] * 1e6,
+                              "args": {name: value}})
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+
+    def to_csv(self, path):
+        fields = ["generation", "time", "best_cost", "evaluations", "diversity", "memory_peak"]
+        for record in self.generations:
+            fields += [key for key in record if key not in fields]
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(self.generations)
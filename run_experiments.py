@@ -1,57 +1,187 @@
-import torch
-import pandas as pd
-import numpy as np
+import argparse
+import time
 import os
 from config import BaseConfig
-from core.sagin_env import SAGINEnv
-from models.qga_optimizer import QGAOptimizer
-from models.pso_optimizer import PSOOptimizer
-from tqdm import tqdm
+from core.env_cache import load_env
+from core.batched_env import BatchedSAGINEnv, PaddedSAGINEnv
+from models.qga_optimizer import QGAOptimizer, BatchedQGAOptimizer, PaddedQGAOptimizer
+from models.pso_optimizer import PSOOptimizer, BatchedPSOOptimizer, PaddedPSOOptimizer
+from models.anytime import EarlyStopping
+from models.reference import solve_reference, gap_report
+from utils.results_store import ResultsStore, EXPERIMENTS_STORE, load_experiment_results
+from utils.job_runner import run_jobs
 
-def run_suite():
+SEEDS = range(10) # Chạy 10 seeds để lấy thống kê
+OPTIMIZERS = {"QGA": QGAOptimizer, "PSO": PSOOptimizer}
+
+def run_job(scenario, seed, algorithm, patience=None, unbiased=False):
+    """
+    Một job độc lập: (kịch bản, seed, thuật toán) -> bản ghi kết quả
+    patience: bật dừng sớm khi best cost đứng yên patience thế hệ (các tiêu chí khác lấy từ EARLY_STOP_* của config)
+    unbiased: QGA quan sát loại trạng thái (1, 1) (reject_11) thay vì ánh xạ clamp gốc lệch về LEO
+    """
+    config = BaseConfig()
+    # Snapshot env của (kịch bản, seed) được nạp từ cache thay vì dựng lại (cùng trạng thái RNG)
+    env = load_env(config, scenario, seed)
+
+    num_ue = config.SCENARIOS[scenario]["num_ue"]
+    if algorithm == "PSO":
+        # Trong vòng lặp tuần tự gốc PSO chạy sau QGA trên cùng luồng RNG của seed: bỏ qua phần QGA đã rút
+        QGAOptimizer(config, num_ue=num_ue, env=env).skip_run(100)
+    optimizer = OPTIMIZERS[algorithm](config, num_ue=num_ue, env=env, **({"reject_11": True} if unbiased and algorithm == "QGA" else {}))
+    # Lời giải tham chiếu (tối ưu chính xác, hoặc cận dưới / cận trên khi có contention)
+    reference = solve_reference(env)
+    early_stop = EarlyStopping.from_config(config, **({} if patience is None else {"patience": patience}))
+    start = time.perf_counter()
+    history = optimizer.run(max_iter=100, verbose=False, early_stop=early_stop)
+    elapsed = time.perf_counter() - start
+    best_cost = optimizer.best_cost if algorithm == "QGA" else optimizer.gbest_cost
+
+    return {
+        "Scenario": scenario,
+        "Seed": seed,
+        "Algorithm": algorithm,
+        "Cost": float(best_cost),
+        "Time": elapsed,
+        "Generations": optimizer.run_stats["generations"],
+        "Stop_Reason": optimizer.run_stats["stop_reason"],
+        **gap_report(history, optimizer.elapsed, reference),
+        "History": history
+    }
+
+def summarize(df):
+    df.to_csv("results/experimental_results.csv", index=False)
+    
+    # Tính toán bảng tóm tắt
+    columns = ["QGA_Cost", "PSO_Cost", "Gain_Percentage"]
+    columns += [c for c in ("QGA_Gap", "PSO_Gap", "QGA_Generations", "PSO_Generations") if c in df.columns]
+    summary = df.groupby("Scenario")[columns].agg(['mean', 'std'])
+    print("\n" + "="*60)
+    print("FINAL EXPERIMENT SUMMARY")
+    print("="*60)
+    print(summary)
+    print("="*60)
+    print("Results saved to results/experimental_results.csv")
+
+def run_suite(workers=1, store_dir=EXPERIMENTS_STORE, backend="process", patience=None, unbiased=False):
+    """
+    Phân phối các job (scenario, seed, algorithm) lên process pool hoặc thread pool.
+    Mỗi job xong được ghi ngay vào kho; chạy lại sẽ bỏ qua các job đã hoàn thành.
+    Mỗi job dùng Generator riêng của seed nên kết quả giống hệt vòng lặp tuần tự gốc
+    (và run_batched_suite), bất kể số worker.
+    patience: bật dừng sớm; kết quả khi đó được ghi vào kho riêng <store_dir>-patience<K>
+    để không lẫn với các lần chạy đủ 100 thế hệ.
+    unbiased: QGA dùng quan sát không lệch (reject_11), ghi vào kho riêng <store_dir>-unbiased.
+    """
+    config = BaseConfig()
+    if not os.path.exists("results"):
+        os.makedirs("results")
+
+    jobs = [{"scenario": sc_name, "seed": seed, "algorithm": algo}
+            for sc_name in config.SCENARIOS.keys()
+            for seed in SEEDS
+            for algo in OPTIMIZERS]
+    if patience is not None:
+        jobs = [{**job, "patience": patience} for job in jobs]
+        store_dir = f"{store_dir}-patience{patience}"
+    if unbiased:
+        jobs = [{**job, "unbiased": True} for job in jobs]
+        store_dir = f"{store_dir}-unbiased"
+    store = ResultsStore(store_dir)
+    run_jobs(run_job, jobs, store, workers=workers, desc="Experiment jobs", backend=backend)
+
+    summarize(load_experiment_results(store_dir))
+
+def run_batched_suite(unbiased=False):
+    """
+    Chạy toàn bộ seeds của mỗi kịch bản trong một batch, tái lập đúng vòng lặp tuần tự gốc
+    unbiased: QGA dùng quan sát không lệch (reject_11)
+    """
     config = BaseConfig()
     if not os.path.exists("results"):
         os.makedirs("results")
         
     results = []
-    seeds = range(10) # Chạy 10 seeds để lấy thống kê
     
     # Truy cập SCENARIOS thông qua config
     for sc_name in config.SCENARIOS.keys():
         sc_params = config.SCENARIOS[sc_name]
         print(f"\n>>> Evaluating Scenario: {sc_name} <<<")
         
-        for seed in tqdm(seeds, desc=f"Seeds for {sc_name}"):
-            env = SAGINEnv(config, scenario_name=sc_name, seed=seed)
-            env.generate_tasks()
-            
-            # Chạy QGA (verbose=False)
-            qga = QGAOptimizer(config, num_ue=sc_params["num_ue"], env=env)
-            _ = qga.run(max_iter=100, verbose=False)
-            
-            # Chạy PSO (verbose=False)
-            pso = PSOOptimizer(config, num_ue=sc_params["num_ue"], env=env)
-            _ = pso.run(max_iter=100, verbose=False)
-            
+        # Toàn bộ seeds của một kịch bản được tiến hóa song song trong một batch
+        env = BatchedSAGINEnv(config, scenario_name=sc_name, seeds=SEEDS)
+
+        # Chạy QGA (verbose=False)
+        qga = BatchedQGAOptimizer(config, num_ue=sc_params["num_ue"], env=env, reject_11=unbiased)
+        _ = qga.run(max_iter=100, verbose=False)
+
+        # Chạy PSO (verbose=False)
+        pso = BatchedPSOOptimizer(config, num_ue=sc_params["num_ue"], env=env)
+        _ = pso.run(max_iter=100, verbose=False)
+
+        for i, seed in enumerate(env.seeds):
+            qga_cost = qga.best_cost[i].item()
+            pso_cost = pso.gbest_cost[i].item()
             results.append({
                 "Scenario": sc_name,
                 "Seed": seed,
-                "QGA_Cost": qga.best_cost,
-                "PSO_Cost": pso.gbest_cost,
-                "Gain_Percentage": (pso.gbest_cost - qga.best_cost) / pso.gbest_cost * 100
+                "QGA_Cost": qga_cost,
+                "PSO_Cost": pso_cost,
+                "Gain_Percentage": (pso_cost - qga_cost) / pso_cost * 100
             })
 
-    df = pd.DataFrame(results)
-    df.to_csv("results/experimental_results.csv", index=False)
-    
-    # Tính toán bảng tóm tắt
-    summary = df.groupby("Scenario")[["QGA_Cost", "PSO_Cost", "Gain_Percentage"]].agg(['mean', 'std'])
-    print("\n" + "="*60)
-    print("FINAL EXPERIMENT SUMMARY")
-    print("="*60)
-    print(summary)
-    print("="*60)
-    print("Results saved to results/experimental_results.csv")
+    import pandas as pd
+    summarize(pd.DataFrame(results))
+
+def run_padded_suite(unbiased=False):
+    """
+    Mọi kịch bản x seed trong một batch đệm [B, max_ue] (PaddedSAGINEnv): một vòng lặp QGA rồi một vòng lặp PSO
+    cho tất cả, lịch sử được tách lại theo kịch bản ở cuối. Mỗi env rút số ngẫu nhiên theo num_ue thật nên
+    kết quả khớp run_batched_suite tới sai số làm tròn của chi phí.
+    unbiased: QGA dùng quan sát không lệch (reject_11)
+    """
+    config = BaseConfig()
+    if not os.path.exists("results"):
+        os.makedirs("results")
+
+    env = PaddedSAGINEnv(config, seeds=SEEDS)
+    print(f"Evaluating {len(env.groups)} scenarios x {len(SEEDS)} seeds padded to {env.max_ue} UEs")
+    qga = PaddedQGAOptimizer(config, env=env, reject_11=unbiased)
+    qga_history = env.split(qga.run(max_iter=100, verbose=False))
+    pso = PaddedPSOOptimizer(config, env=env)
+    pso_history = env.split(pso.run(max_iter=100, verbose=False))
+
+    results = []
+    for sc_name, idx in env.groups.items():
+        for b, qga_hist, pso_hist in zip(idx, qga_history[sc_name], pso_history[sc_name]):
+            qga_cost, pso_cost = qga_hist[-1], pso_hist[-1]
+            results.append({
+                "Scenario": sc_name,
+                "Seed": env.labels[b][1],
+                "QGA_Cost": qga_cost,
+                "PSO_Cost": pso_cost,
+                "Gain_Percentage": (pso_cost - qga_cost) / pso_cost * 100
+            })
+
+    import pandas as pd
+    summarize(pd.DataFrame(results))
 
 if __name__ == "__main__":
-    run_suite()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--backend", choices=("process", "thread"), default="process")
+    parser.add_argument("--batched", action="store_true", help="Chạy tất cả seed của một kịch bản trong một batch")
+    parser.add_argument("--padded", action="store_true",
+                        help="Chạy mọi kịch bản và seed trong một batch đệm chiều UE tới max_ue")
+    parser.add_argument("--patience", type=int, default=None,
+                        help="Dừng sớm khi best cost không cải thiện trong số thế hệ này")
+    parser.add_argument("--unbiased-decisions", action="store_true",
+                        help="QGA quan sát loại trạng thái (1, 1): không lệch về LEO (mặc định giữ ánh xạ clamp gốc)")
+    args = parser.parse_args()
+    if args.padded:
+        run_padded_suite(unbiased=args.unbiased_decisions)
+    elif args.batched:
+        run_batched_suite(unbiased=args.unbiased_decisions)
+    else:
+        run_suite(workers=args.workers, backend=args.backend, patience=args.patience,
+                  unbiased=args.unbiased_decisions)
@@ -0,0 +1,80 @@
+import argparse
+import time
+import torch
+import pandas as pd
+from config import BaseConfig
+from core.env_cache import load_env
+from core.mobility import RandomWaypointMobility, GaussMarkovMobility, TaskArrivalProcess
+from core.online import OnlineSAGIN
+from models.qga_optimizer import QGAOptimizer
+
+def run_online(num_epochs=20, iters_per_epoch=30, uav_mobility=False, seed=42, num_leo=None, leo_planes=None):
+    """
+    Tái tối ưu trực tuyến qua các epoch: so sánh QGA warm-start (từ theta/best của epoch trước)
+    với QGA cold-start (theta = pi/4) trên cùng số thế hệ mỗi epoch.
+    num_leo: nếu đặt, dùng chòm num_leo vệ tinh trên leo_planes mặt phẳng quỹ đạo (mỗi epoch một bước ephemeris).
+    """
+    config = BaseConfig()
+    if num_leo is not None:
+        config.LEO_MODE = "constellation"
+        config.NUM_LEO = num_leo
+        config.LEO_PLANES = leo_planes
+        config.LEO_HORIZON = max(config.LEO_HORIZON, num_epochs + 1)
+    sc_name = "urban_iot"
+    env = load_env(config, sc_name, seed)
+
+    # Mobility / arrivals rút tiếp từ Generator của env: cả phiên tái lập được từ một seed
+    gen = env.generator
+    online = OnlineSAGIN(
+        env,
+        ue_mobility=RandomWaypointMobility(config.AREA_SIZE, move_prob=0.05, device=config.DEVICE, generator=gen),
+        uav_mobility=GaussMarkovMobility(config.AREA_SIZE, device=config.DEVICE, generator=gen) if uav_mobility else None,
+        arrivals=TaskArrivalProcess(device=config.DEVICE, generator=gen)
+    )
+
+    # Epoch 0: cold-start
+    prev = QGAOptimizer(config, num_ue=env.num_ue, env=env)
+    prev.run(max_iter=100, verbose=False)
+    print(f"Epoch 0: {env.num_ue} UEs, Best Cost = {prev.best_cost:.4f}")
+
+    results = []
+    for epoch in range(1, num_epochs + 1):
+        keep_idx, num_new = online.advance()
+
+        start = time.perf_counter()
+        warm = QGAOptimizer(config, num_ue=env.num_ue, env=env)
+        warm.warm_start(prev, keep_idx, num_new)
+        warm.run(max_iter=iters_per_epoch, verbose=False)
+        warm_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cold = QGAOptimizer(config, num_ue=env.num_ue, env=env)
+        cold.run(max_iter=iters_per_epoch, verbose=False)
+        cold_time = time.perf_counter() - start
+
+        results.append({
+            "Epoch": epoch,
+            "Num_UE": env.num_ue,
+            **{k.capitalize(): v for k, v in online.last_stats.items()},
+            "Warm_Cost": warm.best_cost,
+            "Cold_Cost": cold.best_cost,
+            "Warm_Time": warm_time,
+            "Cold_Time": cold_time
+        })
+        print(f"Epoch {epoch}: {env.num_ue} UEs, Warm = {warm.best_cost:.4f}, Cold = {cold.best_cost:.4f}")
+        prev = warm
+
+    df = pd.DataFrame(results)
+    df.to_csv("results/online_results.csv", index=False)
+    print(df[["Warm_Cost", "Cold_Cost"]].mean())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--iters", type=int, default=30, help="Số thế hệ mỗi epoch")
+    parser.add_argument("--uav-mobility", action="store_true")
+    parser.add_argument("--num-leo", type=int, default=None, help="Bật chế độ chòm vệ tinh với số vệ tinh này")
+    parser.add_argument("--leo-planes", type=int, default=36)
+    args = parser.parse_args()
+    run_online(num_epochs=args.epochs, iters_per_epoch=args.iters, uav_mobility=args.uav_mobility,
+               num_leo=args.num_leo, leo_planes=args.leo_planes)
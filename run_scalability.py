@@ -1,48 +1,74 @@
-import torch
-import time
-import pandas as pd
+import argparse
 from config import BaseConfig
-from core.sagin_env import SAGINEnv
+from core.env_cache import load_env
 from models.qga_optimizer import QGAOptimizer
 from models.pso_optimizer import PSOOptimizer
+from models.island_qga import IslandQGAOptimizer
+from models.reference import solve_reference, optimality_gap
+from utils.results_store import ResultsStore, SCALABILITY_STORE, load_scalability_results
+from utils.job_runner import run_jobs
+from utils.benchmark import timed
 
-def run_scalability():
-    config = BaseConfig()
-    ue_scales = [50, 100, 200, 500, 1000] # Tăng quy mô mạng
-    results = []
-    
-    for num_ue in ue_scales:
-        print(f"Testing scalability with {num_ue} UEs...")
-        
-        # Cập nhật config tạm thời
-        config.SCENARIOS["urban_iot"]["num_ue"] = num_ue
-        env = SAGINEnv(config, scenario_name="urban_iot", seed=42)
-        env.generate_tasks()
-        
-        # Đo thời gian QGA
-        start_qga = time.time()
-        qga = QGAOptimizer(config, num_ue=num_ue, env=env)
-        qga.run(max_iter=100, verbose=False)
-        time_qga = time.time() - start_qga
-        
-        # Đo thời gian PSO
-        start_pso = time.time()
-        pso = PSOOptimizer(config, num_ue=num_ue, env=env)
-        pso.run(max_iter=100, verbose=False)
-        time_pso = time.time() - start_pso
-        
-        results.append({
-            "Num_UE": num_ue,
-            "QGA_Time": time_qga,
-            "PSO_Time": time_pso,
-            "QGA_Cost": qga.best_cost,
-            "PSO_Cost": pso.gbest_cost
-        })
-
-    df = pd.DataFrame(results)
+UE_SCALES = [50, 100, 200, 500, 1000] # Tăng quy mô mạng
+OPTIMIZERS = {"QGA": QGAOptimizer, "PSO": PSOOptimizer}
+
+def run_job(num_ue, algorithm, islands=1):
+    """
+    Một job độc lập: (số UE, thuật toán) -> bản ghi kết quả
+    islands > 1 (chỉ với QGA): chạy QGA mô hình đảo trên islands process
+    """
+    # Bản sao kịch bản trên instance: không sửa SCENARIOS dùng chung của lớp
+    config = BaseConfig().override_scenario("urban_iot", num_ue=num_ue)
+    env = load_env(config, "urban_iot", seed=42)
+
+    if islands > 1:
+        # Pool đảo tạo một lần (khởi động process không tính vào thời gian đo) và được warmup như QGA tuần tự
+        with IslandQGAOptimizer(config, num_ue=num_ue, env=env, num_islands=islands) as optimizer:
+            optimizer.run(max_iter=2, verbose=False)
+            elapsed = timed(lambda: optimizer.run(max_iter=100, verbose=False), config.DEVICE)
+        algorithm = f"QGA-Island{islands}"
+        print(f"{algorithm} @ {num_ue} UEs: pool startup {optimizer.startup_time:.2f}s (excluded), run {elapsed:.2f}s")
+    else:
+        optimizer = OPTIMIZERS[algorithm](config, num_ue=num_ue, env=env)
+        # Warmup trên env/optimizer riêng (cùng seed) để lần đo không tính chi phí lần gọi đầu (cache bảng, cấp phát)
+        warm_env = load_env(config, "urban_iot", seed=42)
+        OPTIMIZERS[algorithm](config, num_ue=num_ue, env=warm_env).run(max_iter=2, verbose=False)
+        env.get_cost_table()
+        # Chỉ đo phần run (không tính khởi tạo), đồng bộ device trước và sau
+        elapsed = timed(lambda: optimizer.run(max_iter=100, verbose=False), config.DEVICE)
+
+    best_cost = optimizer.gbest_cost if algorithm == "PSO" else optimizer.best_cost
+    reference = solve_reference(env)
+
+    return {"Num_UE": num_ue, "Algorithm": algorithm, "Cost": float(best_cost), "Time": elapsed,
+            "Gap": optimality_gap(float(best_cost), reference), "Lower_Bound": reference["lower_bound"]}
+
+def run_scalability(workers=1, islands=1, store_dir=SCALABILITY_STORE):
+    """
+    Mặc định chạy tuần tự (workers=1) để số đo thời gian không bị các process khác chen vào.
+    islands > 1: thêm các job QGA mô hình đảo (tự tạo process con nên cần workers=1).
+    """
+    if islands > 1 and workers > 1:
+        raise ValueError("island jobs spawn their own processes; run them with workers=1")
+    print(f"Testing scalability with {UE_SCALES} UEs...")
+    jobs = [{"num_ue": num_ue, "algorithm": algo} for num_ue in UE_SCALES for algo in OPTIMIZERS]
+    if islands > 1:
+        jobs += [{"num_ue": num_ue, "algorithm": "QGA", "islands": islands} for num_ue in UE_SCALES]
+    run_jobs(run_job, jobs, ResultsStore(store_dir), workers=workers, desc="Scalability jobs")
+
+    df = load_scalability_results(store_dir)
     df.to_csv("results/scalability_results.csv", index=False)
     print("\nScalability Study Results:")
     print(df)
+    speedups = [c for c in df.columns if c.endswith("_Speedup")]
+    if speedups:
+        # Speedup = thời gian QGA tuần tự / thời gian QGA mô hình đảo (cùng 100 thế hệ, cùng tổng quần thể)
+        print("\nIsland speedup over serial QGA:")
+        print(df[["Num_UE"] + speedups].to_string(index=False))
 
 if __name__ == "__main__":
-    run_scalability()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--islands", type=int, default=1, help="Thêm QGA mô hình đảo với số process này")
+    args = parser.parse_args()
+    run_scalability(workers=args.workers, islands=args.islands)
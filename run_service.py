@@ -0,0 +1,31 @@
+import argparse
+import asyncio
+import os
+import torch
+from utils.decision_service import DecisionService
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dịch vụ quyết định offload cục bộ (JSON theo dòng)")
+    parser.add_argument("--socket", default=None, help="Đường dẫn Unix socket (mặc định: TCP --host/--port)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--scenario", default="urban_iot", help="Kịch bản gốc cho hằng số kênh / tài nguyên")
+    parser.add_argument("--iters", type=int, default=50, help="Số thế hệ mỗi lượt tối ưu")
+    parser.add_argument("--max-iters", type=int, default=1000, help="Giới hạn trên của iters mà một yêu cầu được đặt")
+    parser.add_argument("--relax", type=float, default=0.2, help="Mức kéo theta về pi/4 khi warm-start")
+    parser.add_argument("--window-ms", type=float, default=5.0, help="Cửa sổ gom yêu cầu thành một batch")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threads", type=int, default=None, help="Số luồng torch")
+    args = parser.parse_args()
+
+    if args.threads is not None:
+        torch.set_num_threads(args.threads)
+    if args.socket is not None and os.path.exists(args.socket):
+        os.remove(args.socket)
+    service = DecisionService(scenario=args.scenario, iters=args.iters, relax=args.relax,
+                              batch_window=args.window_ms / 1000, max_batch=args.max_batch, seed=args.seed, max_iters=args.max_iters)
+    try:
+        asyncio.run(service.serve(path=args.socket, host=args.host, port=args.port))
+    except KeyboardInterrupt:
+        pass
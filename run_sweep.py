@@ -0,0 +1,57 @@
+import argparse
+import numpy as np
+import pandas as pd
+from config import BaseConfig
+from core.env_cache import load_env
+from models.hyperparams import grid_settings, random_settings
+from models.sweep import SweepQGAOptimizer, SweepPSOOptimizer, rank_settings
+
+# Lưới mặc định quanh giá trị gốc (0.02*pi, 0.01) và (0.7, 1.5, 1.5)
+GRIDS = {
+    "QGA": {"base_step": [0.01 * np.pi, 0.02 * np.pi, 0.04 * np.pi, 0.08 * np.pi],
+            "mutation_rate": [0.0, 0.005, 0.01, 0.05]},
+    "PSO": {"w": [0.4, 0.7, 0.9], "c1": [1.0, 1.5, 2.0], "c2": [1.0, 1.5, 2.0]},
+}
+# Khoảng cho random search
+RANGES = {
+    "QGA": {"base_step": (0.005 * np.pi, 0.1 * np.pi), "mutation_rate": (0.0, 0.1)},
+    "PSO": {"w": (0.2, 1.0), "c1": (0.5, 2.5), "c2": (0.5, 2.5)},
+}
+SWEEPERS = {"QGA": SweepQGAOptimizer, "PSO": SweepPSOOptimizer}
+
+def run_sweep(algorithm, search="grid", samples=16, max_iter=100, scenario="urban_iot", seed=0, target=None,
+              unbiased=False):
+    """
+    Chạy toàn bộ các setting của algorithm trong một batch trên cùng một env,
+    ghi bảng xếp hạng ra results/sweep_<algorithm>.csv
+    unbiased: QGA dùng quan sát không lệch (reject_11)
+    """
+    config = BaseConfig()
+    settings = grid_settings(GRIDS[algorithm]) if search == "grid" else random_settings(RANGES[algorithm], samples, seed)
+    env = load_env(config, scenario, seed)
+
+    print(f"Sweeping {len(settings)} {algorithm} settings on {scenario} ({search} search)...")
+    kwargs = {"reject_11": True} if unbiased and algorithm == "QGA" else {}
+    optimizer = SWEEPERS[algorithm](config, num_ue=env.num_ue, env=env, settings=settings, **kwargs)
+    history = optimizer.run(max_iter=max_iter, verbose=False)
+
+    df = pd.DataFrame(rank_settings(optimizer, history, target=target)).set_index("rank")
+    df.to_csv(f"results/sweep_{algorithm.lower()}.csv")
+    print(df.head(10).to_string())
+    return df
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--algo", choices=["QGA", "PSO", "both"], default="both")
+    parser.add_argument("--search", choices=["grid", "random"], default="grid")
+    parser.add_argument("--samples", type=int, default=16, help="Số setting cho random search")
+    parser.add_argument("--iters", type=int, default=100)
+    parser.add_argument("--scenario", default="urban_iot")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--target", type=float, default=None,
+                        help="Ngưỡng chi phí cho time-to-target (mặc định: chi phí cuối tốt nhất + 5%%)")
+    parser.add_argument("--unbiased-decisions", action="store_true",
+                        help="QGA quan sát loại trạng thái (1, 1): không lệch về LEO (mặc định giữ ánh xạ clamp gốc)")
+    args = parser.parse_args()
+    for algo in (["QGA", "PSO"] if args.algo == "both" else [args.algo]):
+        run_sweep(algo, args.search, args.samples, args.iters, args.scenario, args.seed, args.target, args.unbiased_decisions)
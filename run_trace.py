@@ -0,0 +1,63 @@
+import argparse
+import os
+import time
+from config import BaseConfig
+from core.online import env_from_snapshot, sync_ues
+from core.traces import UETrace, synthesize_trace
+from models.qga_optimizer import QGAOptimizer
+
+def run_trace(path, iters_per_epoch=30, num_epochs=None, prefetch=True, relax=0.0, scenario="urban_iot", seed=42):
+    """
+    Tái tối ưu theo từng epoch của một trace UE thực (CSV hoặc thư mục đã chuyển bằng core.traces.convert_trace):
+    mỗi epoch chỉ các hàng UE thay đổi được tính lại, QGA warm-start từ epoch trước.
+    Epoch kế tiếp được đọc trước trên luồng nền trong lúc QGA chạy (prefetch).
+    UAV / LEO sinh từ seed như kịch bản scenario.
+    """
+    config = BaseConfig()
+    trace = UETrace.from_csv(path, device=config.DEVICE) if path.endswith(".csv") else UETrace(path, config.DEVICE)
+    print(f"Trace: {trace.num_records} records over {trace.num_epochs} epochs")
+
+    env, prev, results = None, None, []
+    start = time.perf_counter()
+    for record in trace.stream(stop=num_epochs, prefetch=prefetch):
+        if env is None:
+            env = env_from_snapshot(config, scenario, seed, record.positions, record.task_bits)
+            ue_ids = record.ue_ids
+        else:
+            ue_ids, keep_idx, num_new, _ = sync_ues(env, ue_ids, record.ue_ids, record.positions, record.task_bits)
+
+        opt_start = time.perf_counter()
+        optimizer = QGAOptimizer(config, num_ue=env.num_ue, env=env)
+        if prev is not None:
+            optimizer.warm_start(prev, keep_idx, num_new, relax=relax)
+        optimizer.run(max_iter=iters_per_epoch, verbose=False)
+        results.append({"Epoch": record.epoch, "Num_UE": env.num_ue, "Cost": optimizer.best_cost,
+                        "Time": time.perf_counter() - opt_start})
+        prev = optimizer
+    elapsed = time.perf_counter() - start
+
+    stats = trace.stats(elapsed)
+    print(f"Ingested {stats['records']} records / {stats['epochs']} epochs: "
+          f"{stats['records_per_sec']:,.0f} records/s read, {stats['end_to_end_records_per_sec']:,.0f} records/s end-to-end, "
+          f"optimizer waited {stats['wait_time']:.3f}s for data")
+
+    import pandas as pd
+    df = pd.DataFrame(results)
+    df.to_csv("results/trace_results.csv", index=False)
+    print(df[["Num_UE", "Cost", "Time"]].describe().loc[["mean", "min", "max"]])
+    return df, stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("trace", help="Trace CSV (epoch, ue_id, x, y, task_mb|task_bits) hoặc thư mục đã chuyển đổi")
+    parser.add_argument("--epochs", type=int, default=None, help="Chỉ chạy số epoch đầu này")
+    parser.add_argument("--iters", type=int, default=30, help="Số thế hệ mỗi epoch")
+    parser.add_argument("--relax", type=float, default=0.0)
+    parser.add_argument("--no-prefetch", action="store_true", help="Đọc epoch tuần tự, không dùng luồng nền")
+    parser.add_argument("--synthesize", nargs=2, type=int, metavar=("NUM_UE", "NUM_EPOCHS"),
+                        help="Ghi trace mẫu vào đường dẫn trace (nếu chưa có) trước khi chạy")
+    args = parser.parse_args()
+    if args.synthesize and not os.path.exists(args.trace):
+        synthesize_trace(args.trace, num_ue=args.synthesize[0], num_epochs=args.synthesize[1])
+    run_trace(args.trace, iters_per_epoch=args.iters, num_epochs=args.epochs, prefetch=not args.no_prefetch,
+              relax=args.relax)
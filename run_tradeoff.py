@@ -1,66 +1,46 @@
+import argparse
 import torch
 import pandas as pd
 import matplotlib.pyplot as plt
 from config import BaseConfig
-from core.sagin_env import SAGINEnv
-from models.qga_optimizer import QGAOptimizer
+from core.env_cache import load_env
+from models.moqga_optimizer import MOQGAOptimizer
 
-def run_tradeoff():
+def run_tradeoff(seed=0, max_iter=100, unbiased=False):
+    """unbiased: MO-QGA dùng quan sát không lệch (reject_11) thay vì ánh xạ clamp gốc"""
     config = BaseConfig()
     # Danh sách các trọng số cho Latency (w_L)
     # w_E sẽ tự động bằng 1 - w_L
     w_latency_list = [0.1, 0.3, 0.5, 0.7, 0.9]
-    results = []
-    
+
     # Cố định một kịch bản để so sánh trọng số
     sc_name = "urban_iot"
     sc_params = config.SCENARIOS[sc_name]
-    
+
     print(f"Starting Trade-off Analysis for {sc_name}...")
 
-    for wl in w_latency_list:
-        we = 1.0 - wl
-        print(f"Running with w_L={wl}, w_E={we}...")
-        
-        # Cập nhật trọng số vào kịch bản
-        config.SCENARIOS[sc_name]["w_latency"] = wl
-        config.SCENARIOS[sc_name]["w_energy"] = we
-        
-        # Chạy QGA (Lấy trung bình 5 seeds để đường cong mượt hơn)
-        avg_latency = 0
-        avg_energy = 0
-        num_seeds = 5
-        
-        for seed in range(num_seeds):
-            env = SAGINEnv(config, scenario_name=sc_name, seed=seed)
-            env.generate_tasks()
-            
-            qga = QGAOptimizer(config, num_ue=sc_params["num_ue"], env=env)
-            qga.run(max_iter=100, verbose=False)
-            
-            # Tính toán Latency và Energy riêng biệt từ lời giải tốt nhất
-            # Chúng ta cần env tính lại để tách biệt 2 giá trị này
-            with torch.no_grad():
-                # env.compute_cost trả về tổng cost, ta cần viết thêm hàm phụ hoặc 
-                # tách logic để lấy riêng T và E.
-                # Để nhanh, tôi sẽ giả định env đã có logic lưu kết quả T và E riêng.
-                # Tạm thời ta lấy kết quả từ optimizer
-                pass
-            
-            # Lưu ý: Để chính xác, ta nên sửa hàm compute_cost 
-            # để trả về cả (Total_T, Total_E)
-            # Nhưng để demo nhanh, ta sẽ ghi nhận xu hướng.
-            
-        results.append({
-            "w_L": wl,
-            "Total_Latency": 2.0 / (wl + 0.1), # Giả lập xu hướng: wl tăng -> Latency giảm
-            "Total_Energy": 1.5 * (wl + 0.2)   # Giả lập xu hướng: wl tăng -> Energy tăng
-        })
+    env = load_env(config, sc_name, seed)
 
-    # Lưu dữ liệu
-    df = pd.DataFrame(results)
+    # Một lần chạy duy nhất: mỗi w_L là một quần thể con, cùng chia sẻ bảng kênh truyền của env
+    moqga = MOQGAOptimizer(config, num_ue=sc_params["num_ue"], env=env, w_latency_list=w_latency_list,
+                           reject_11=unbiased)
+    moqga.run(max_iter=max_iter, verbose=False)
+
+    # Tổng độ trễ và tổng năng lượng thực của lời giải tốt nhất ứng với từng trọng số, chọn trên archive
+    # (không bị chi phối) thay vì lời giải tốt nhất heuristic của từng quần thể con
+    best_objectives, _ = moqga.select_per_weight()
+    best_objectives = best_objectives.cpu()
+    df = pd.DataFrame({
+        "w_L": w_latency_list,
+        "Total_Latency": best_objectives[:, 0].tolist(),
+        "Total_Energy": best_objectives[:, 1].tolist()
+    })
     df.to_csv("results/tradeoff_results.csv", index=False)
-    
+
+    front = pd.DataFrame(moqga.archive_objectives.cpu().numpy(), columns=["Total_Latency", "Total_Energy"])
+    front.to_csv("results/pareto_front.csv", index=False)
+    print(f"Pareto front: {len(front)} non-dominated solutions")
+
     # Vẽ hình
     fig, ax1 = plt.subplots(figsize=(8, 5))
 
@@ -80,5 +60,21 @@ def run_tradeoff():
     plt.savefig('results/tradeoff_analysis.pdf', format='pdf')
     print("[OK] Trade-off figure saved.")
 
+    # Mặt Pareto thu được từ archive
+    plt.figure(figsize=(8, 5))
+    plt.plot(front['Total_Latency'], front['Total_Energy'], color='tab:purple', marker='.', linestyle='-', label='Pareto front')
+    plt.scatter(df['Total_Latency'], df['Total_Energy'], color='black', marker='x', zorder=3, label='Best per $w_L$')
+    plt.xlabel('Total Latency (s)')
+    plt.ylabel('Total Energy (J)')
+    plt.title('Pareto Front: Latency vs. Energy')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.savefig('results/pareto_front.pdf', format='pdf', bbox_inches='tight')
+    print("[OK] Pareto front figure saved.")
+
 if __name__ == "__main__":
-    run_tradeoff()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--unbiased-decisions", action="store_true",
+                        help="QGA quan sát loại trạng thái (1, 1): không lệch về LEO (mặc định giữ ánh xạ clamp gốc)")
+    args = parser.parse_args()
+    run_tradeoff(unbiased=args.unbiased_decisions)
@@ -0,0 +1,51 @@
+# test_batched.py: BatchedSAGINEnv + optimizer batch phải tái lập đúng từng bit vòng lặp tuần tự theo seed
+import torch
+from config import BaseConfig
+from core.env_cache import build_env
+from core.batched_env import BatchedSAGINEnv
+from models.qga_optimizer import QGAOptimizer, BatchedQGAOptimizer
+from models.pso_optimizer import PSOOptimizer, BatchedPSOOptimizer
+
+SCENARIO = "urban_iot"
+SEEDS = (0, 1)
+ITERS = 20
+
+
+def make_config():
+    config = BaseConfig()
+    config.ENV_CACHE_DIR = None  # dựng env trực tiếp, không ghi cache
+    return config
+
+
+def run_serial(config, seed):
+    n = config.SCENARIOS[SCENARIO]["num_ue"]
+    env = build_env(config, SCENARIO, seed)
+    qga = QGAOptimizer(config, n, env)
+    qga_history = qga.run(ITERS, verbose=False)
+    pso = PSOOptimizer(config, n, env)
+    pso_history = pso.run(ITERS, verbose=False)
+    return qga, qga_history, pso, pso_history
+
+
+def test_batched_matches_serial():
+    config = make_config()
+    n = config.SCENARIOS[SCENARIO]["num_ue"]
+    env = BatchedSAGINEnv(config, SCENARIO, seeds=SEEDS)
+    qga = BatchedQGAOptimizer(config, n, env)
+    qga_history = qga.run(ITERS, verbose=False)
+    pso = BatchedPSOOptimizer(config, n, env)
+    pso_history = pso.run(ITERS, verbose=False)
+
+    for i, seed in enumerate(SEEDS):
+        s_qga, s_qga_history, s_pso, s_pso_history = run_serial(config, seed)
+        assert qga_history[i] == s_qga_history, f"seed {seed}: QGA history differs from serial run"
+        assert pso_history[i] == s_pso_history, f"seed {seed}: PSO history differs from serial run"
+        assert qga.best_cost[i].item() == s_qga.best_cost
+        assert pso.gbest_cost[i].item() == s_pso.gbest_cost
+        assert torch.equal(qga.best_sol_bits[i], s_qga.best_sol_bits)
+        assert torch.equal(pso.gbest_pos[i], s_pso.gbest_pos)
+
+
+if __name__ == "__main__":
+    test_batched_matches_serial()
+    print("Batched QGA / PSO match the serial per-seed runs")
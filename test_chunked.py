@@ -0,0 +1,57 @@
+# test_chunked.py: đường đánh giá / thế hệ chia khối phải khớp đường không chia khối
+import torch
+from config import BaseConfig
+from core.env_cache import build_env
+from models.qga_optimizer import QGAOptimizer
+
+SCENARIO = "urban_iot"
+SEED = 0
+
+
+def make_config():
+    config = BaseConfig()
+    config.ENV_CACHE_DIR = None
+    return config
+
+
+def random_decisions(num_ue, pop_size=16):
+    g = torch.Generator().manual_seed(0)
+    return torch.randint(0, 3, (pop_size, num_ue), generator=g)
+
+
+def check_chunked_cost(contention):
+    config = make_config()
+    env = build_env(config, SCENARIO, SEED, contention=contention)
+    # chunk_size không chia hết num_ue: khối cuối ngắn hơn
+    chunked = build_env(config, SCENARIO, SEED, contention=contention, chunk_size=37)
+    decisions = random_decisions(env.num_ue)
+    expected = env.compute_cost(decisions, return_objectives=True)
+    actual = chunked.compute_cost(decisions, return_objectives=True)
+    for name, a, b in zip(("cost", "latency", "energy"), actual, expected):
+        assert torch.allclose(a, b, rtol=1e-6), f"contention={contention}: chunked {name} differs"
+
+
+def test_chunked_cost():
+    check_chunked_cost(contention=False)
+
+
+def test_chunked_cost_contention():
+    check_chunked_cost(contention=True)
+
+
+def test_memory_budget_run():
+    config = make_config()
+    n = config.SCENARIOS[SCENARIO]["num_ue"]
+    history = QGAOptimizer(config, n, build_env(config, SCENARIO, SEED)).run(20, verbose=False)
+    # Ngân sách đủ cho 7 cá thể mỗi khối: quần thể không chia hết
+    budget = 7 * n * QGAOptimizer._BYTES_PER_UE
+    chunked = QGAOptimizer(config, n, build_env(config, SCENARIO, SEED), memory_budget=budget)
+    assert chunked._chunk_rows() == 7
+    assert torch.allclose(torch.tensor(chunked.run(20, verbose=False)), torch.tensor(history), rtol=1e-6)
+
+
+if __name__ == "__main__":
+    test_chunked_cost()
+    test_chunked_cost_contention()
+    test_memory_budget_run()
+    print("Chunked evaluation matches the unchunked path")
@@ -0,0 +1,39 @@
+# test_env_cache.py: env nạp từ snapshot cache phải giống hệt env dựng mới từ seed
+import os
+import tempfile
+import torch
+from config import BaseConfig
+from core.env_cache import build_env, load_env
+from models.qga_optimizer import QGAOptimizer
+
+SCENARIO = "urban_iot"
+SEED = 5
+TENSORS = ("ue_pos", "uav_pos", "leo_pos", "task_data_bits", "task_cycles", "latency_table", "energy_table")
+
+
+def check_same_env(cached, fresh):
+    for name in TENSORS:
+        assert torch.equal(getattr(cached, name), getattr(fresh, name)), f"{name} differs from fresh env"
+    assert torch.equal(cached.get_cost_table(), fresh.get_cost_table())
+    assert torch.equal(cached.generator.get_state(), fresh.generator.get_state())
+
+
+def test_cached_env_matches_fresh():
+    config = BaseConfig()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # Lần đầu: dựng và ghi snapshot; lần sau: nạp từ đĩa
+        written = load_env(config, SCENARIO, SEED, cache_dir=cache_dir)
+        assert len(os.listdir(cache_dir)) == 1
+        cached = load_env(config, SCENARIO, SEED, cache_dir=cache_dir)
+        fresh = build_env(config, SCENARIO, SEED)
+        check_same_env(written, fresh)
+        check_same_env(cached, fresh)
+
+        # Optimizer rút tiếp từ Generator đã nạp: cùng dãy số như env dựng mới
+        n = config.SCENARIOS[SCENARIO]["num_ue"]
+        assert QGAOptimizer(config, n, cached).run(10, verbose=False) == QGAOptimizer(config, n, fresh).run(10, verbose=False)
+
+
+if __name__ == "__main__":
+    test_cached_env_matches_fresh()
+    print("Cached env matches a freshly generated env")
@@ -0,0 +1,37 @@
+# test_padded.py: batch đệm nhiều kịch bản phải khớp batch từng kịch bản tới sai số làm tròn của chi phí
+import torch
+from config import BaseConfig
+from core.batched_env import BatchedSAGINEnv, PaddedSAGINEnv
+from models.qga_optimizer import BatchedQGAOptimizer, PaddedQGAOptimizer
+from models.pso_optimizer import BatchedPSOOptimizer, PaddedPSOOptimizer
+
+SEEDS = (0, 1)
+ITERS = 20
+
+
+def make_config():
+    config = BaseConfig()
+    config.ENV_CACHE_DIR = None
+    return config
+
+
+def test_padded_matches_batched():
+    config = make_config()
+    env = PaddedSAGINEnv(config, seeds=SEEDS)
+    qga_history = env.split(PaddedQGAOptimizer(config, env).run(ITERS, verbose=False))
+    pso_history = env.split(PaddedPSOOptimizer(config, env).run(ITERS, verbose=False))
+
+    for name in env.groups:
+        n = config.SCENARIOS[name]["num_ue"]
+        batched = BatchedSAGINEnv(config, name, seeds=SEEDS)
+        expected_qga = BatchedQGAOptimizer(config, n, batched).run(ITERS, verbose=False)
+        expected_pso = BatchedPSOOptimizer(config, n, batched).run(ITERS, verbose=False)
+        assert torch.allclose(torch.tensor(qga_history[name]), torch.tensor(expected_qga), rtol=2e-6), \
+            f"{name}: padded QGA differs from batched"
+        assert torch.allclose(torch.tensor(pso_history[name]), torch.tensor(expected_pso), rtol=2e-6), \
+            f"{name}: padded PSO differs from batched"
+
+
+if __name__ == "__main__":
+    test_padded_matches_batched()
+    print("Padded QGA / PSO match the per-scenario batched runs")
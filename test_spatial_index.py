@@ -0,0 +1,46 @@
+# test_spatial_index.py: UAVGridIndex phải khớp liên kết dày (argmin trên ma trận khoảng cách đầy đủ)
+import torch
+from core.spatial_index import UAVGridIndex
+
+
+def dense_knn(ue_xy, uav_xy, k):
+    """k UAV gần nhất tính trực tiếp (không dùng cdist: kém chính xác với tọa độ lớn)"""
+    d2 = ((ue_xy[:, None] - uav_xy[None]) ** 2).sum(dim=-1)
+    return torch.topk(d2, k, dim=1, largest=False).values
+
+
+def check(index, ue_xy, uav_xy, k):
+    _, d2 = index.query(ue_xy, k)
+    assert torch.allclose(d2, dense_knn(ue_xy, uav_xy, k), rtol=1e-5), f"k={k}: grid result differs from dense"
+
+
+def test_ues_far_outside_area():
+    # UE rải trên [-2A, 3A] x [-2A, 3A], xa ngoài vùng lưới [0, A]; ô lưới không chia hết A
+    g = torch.Generator().manual_seed(0)
+    area = 10000
+    for trial in range(20):
+        uav_xy = torch.rand((64, 2), generator=g) * area
+        ue_xy = (torch.rand((400, 2), generator=g) * 5 - 2) * area
+        index = UAVGridIndex(area, 700).build(uav_xy)
+        for k in (1, 3, 5):
+            check(index, ue_xy, uav_xy, k)
+
+
+def test_uavs_outside_area_after_update():
+    g = torch.Generator().manual_seed(1)
+    area = 5000
+    uav_xy = torch.rand((40, 2), generator=g) * area
+    index = UAVGridIndex(area, 400).build(uav_xy)
+    # Một phần UAV bay ra ngoài vùng: được gán vào ô biên
+    moved = torch.arange(0, 40, 3)
+    uav_xy[moved] = (torch.rand((moved.numel(), 2), generator=g) * 3 - 1) * area
+    index.update(moved, uav_xy[moved])
+    ue_xy = (torch.rand((300, 2), generator=g) * 4 - 1.5) * area
+    for k in (1, 3):
+        check(index, ue_xy, uav_xy, k)
+
+
+if __name__ == "__main__":
+    test_ues_far_outside_area()
+    test_uavs_outside_area_after_update()
+    print("UAVGridIndex matches dense association")
@@ -0,0 +1,232 @@
+import argparse
+import itertools
+import json
+import platform
+import time
+
+import numpy as np
+import torch
+
+from config import BaseConfig
+from core.sagin_env import SAGINEnv
+from models.qga_optimizer import QGAOptimizer
+from models.pso_optimizer import PSOOptimizer
+from models import fused
+
+DEFAULT_UE = (200, 1000)
+DEFAULT_POP = (100,)
+DEFAULT_THREADS = (1,)
+
+
+def synchronize(device):
+    """Chờ các kernel bất đồng bộ trên device chạy xong trước khi đọc đồng hồ"""
+    if torch.device(device).type == "cuda":
+        torch.cuda.synchronize(device)
+
+
+def timed(fn, device):
+    """Thời gian (giây) của một lần gọi fn, có đồng bộ device trước và sau"""
+    synchronize(device)
+    start = time.perf_counter()
+    fn()
+    synchronize(device)
+    return time.perf_counter() - start
+
+
+def measure(fn, device, warmup=3, repeats=20, evals_per_call=1):
+    """
+    Chạy fn warmup lần (bỏ qua) rồi repeats lần có đo giờ.
+    Trả về: median / IQR (ms) và số lượt đánh giá mỗi giây theo median.
+    """
+    for _ in range(warmup):
+        fn()
+    samples = np.array([timed(fn, device) for _ in range(repeats)]) * 1e3
+    q25, median, q75 = np.percentile(samples, [25, 50, 75])
+    return {
+        "median_ms": float(median),
+        "iqr_ms": float(q75 - q25),
+        "min_ms": float(samples.min()),
+        "evals_per_sec": float(evals_per_call / (median / 1e3)) if median > 0 else 0.0
+    }
+
+
+def _setup(num_ue, pop_size, seed=0):
+    config = BaseConfig().override_scenario("urban_iot", num_ue=num_ue)
+    config.POPULATION_SIZE = pop_size
+    env = SAGINEnv(config, scenario_name="urban_iot", seed=seed)
+    env.generate_tasks()
+    return config, env
+
+
+def fused_cases(config, env, num_ue, pop_size):
+    """
+    Một thế hệ đầy đủ của QGA / PSO: đường eager (observe -> compute_cost -> evolve / update)
+    so với kernel gộp torch.compile của models.fused (tính cả phần rút số ngẫu nhiên vào bộ đệm).
+    """
+    qga = QGAOptimizer(config, num_ue=num_ue, env=env)
+    pso = PSOOptimizer(config, num_ue=num_ue, env=env)
+    qga_step = fused.compiled(fused.qga_generation)
+    pso_step = fused.compiled(fused.pso_generation)
+
+    def qga_eager():
+        codes = qga.observe()
+        qga.evolve(codes, env.compute_cost(codes, lut=qga.lut), 0, 100)
+
+    packed = env.get_packed_cost_table(qga.lut)
+    qga_offsets = torch.arange(num_ue, device=config.DEVICE) * 4
+    qga_bufs = [torch.empty(qga.theta.shape, device=config.DEVICE) for _ in range(3)]
+    qga_state = [torch.zeros(num_ue, dtype=torch.uint8, device=config.DEVICE),
+                 torch.tensor(float('inf'), device=config.DEVICE)]
+    step_size = torch.tensor(0.02 * np.pi, device=config.DEVICE)
+    mutation_rate = torch.tensor(0.01, device=config.DEVICE)
+
+    def qga_fused():
+        for buf in qga_bufs:
+            torch.rand(buf.shape, generator=qga.generator, device=config.DEVICE, out=buf)
+        qga.theta, qga_state[0], qga_state[1] = qga_step(qga.theta, *qga_bufs, packed, qga_offsets,
+                                                         *qga_state, step_size, mutation_rate)
+
+    def pso_eager():
+        pso.update(env.compute_cost(pso.decisions()))
+
+    cost_table = env.get_cost_table()
+    pso_offsets = torch.arange(num_ue, device=config.DEVICE) * 3
+    r = torch.empty((2, pop_size, num_ue), device=config.DEVICE)
+    coefficients = [torch.tensor(v, device=config.DEVICE) for v in (pso.w, pso.c1, pso.c2)]
+    # Bản sao riêng: bước eager cập nhật pso.pos tại chỗ
+    pso_state = [t.clone() for t in (pso.pos, pso.vel, pso.pbest_pos, pso.pbest_cost)]
+    pso_state += [torch.zeros_like(pso.pos[0]), torch.tensor(float('inf'), device=config.DEVICE)]
+
+    def pso_fused():
+        torch.rand(r.shape, generator=pso.generator, device=config.DEVICE, out=r)
+        pso_state[:] = pso_step(*pso_state, r, cost_table, pso_offsets, *coefficients)
+
+    return {
+        "qga_generation_eager": qga_eager,
+        "qga_generation_compiled": qga_fused,
+        "pso_generation_eager": pso_eager,
+        "pso_generation_compiled": pso_fused,
+    }
+
+
+def bench_case(num_ue, pop_size, threads, warmup=3, repeats=20, compiled=False):
+    """
+    Đo riêng compute_cost, observe, evolve của QGA và bước cập nhật PSO cho một cấu hình.
+    compiled=True: thêm so sánh một thế hệ đầy đủ eager với kernel gộp torch.compile.
+    """
+    torch.set_num_threads(threads)
+    config, env = _setup(num_ue, pop_size)
+    device = config.DEVICE
+    qga = QGAOptimizer(config, num_ue=num_ue, env=env)
+    pso = PSOOptimizer(config, num_ue=num_ue, env=env)
+
+    codes = qga.observe()
+    costs = env.compute_cost(codes, lut=qga.lut)
+    decisions = qga.decode(codes)
+    pso_costs = env.compute_cost(pso.decisions())
+
+    cases = {
+        "compute_cost": lambda: env.compute_cost(decisions),
+        "compute_cost_packed": lambda: env.compute_cost(codes, lut=qga.lut),
+        "qga_observe": qga.observe,
+        "qga_evolve": lambda: qga.evolve(codes, costs, 0, 100),
+        "pso_update": lambda: pso.update(pso_costs),
+    }
+    if compiled:
+        cases.update(fused_cases(config, env, num_ue, pop_size))
+    results = []
+    for name, fn in cases.items():
+        evals = pop_size if name.startswith("compute_cost") or "_generation_" in name else 0
+        stats = measure(fn, device, warmup=warmup, repeats=repeats, evals_per_call=max(evals, 1))
+        if not evals:
+            stats.pop("evals_per_sec")
+        results.append({"name": name, "num_ue": num_ue, "pop_size": pop_size, "threads": threads, **stats})
+    return results
+
+
+def run_benchmarks(ue_counts=DEFAULT_UE, pop_sizes=DEFAULT_POP, thread_counts=DEFAULT_THREADS, warmup=3, repeats=20,
+                   compiled=False):
+    results = []
+    for num_ue, pop_size, threads in itertools.product(ue_counts, pop_sizes, thread_counts):
+        results += bench_case(num_ue, pop_size, threads, warmup=warmup, repeats=repeats, compiled=compiled)
+    return {
+        "meta": {
+            "torch": torch.__version__,
+            "device": BaseConfig.DEVICE,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "warmup": warmup,
+            "repeats": repeats,
+            "compiled": compiled
+        },
+        "results": results
+    }
+
+
+def case_key(result):
+    return f"{result['name']}/ue={result['num_ue']}/pop={result['pop_size']}/threads={result['threads']}"
+
+
+def save_baseline(report, path):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def compare(report, baseline, threshold=0.10):
+    """
+    So sánh median với baseline theo từng case chung.
+    Trả về list (key, baseline_ms, current_ms, ratio, regressed), regressed khi chậm hơn quá threshold.
+    """
+    base = {case_key(r): r for r in baseline["results"]}
+    rows = []
+    for r in report["results"]:
+        key = case_key(r)
+        if key not in base:
+            continue
+        ratio = r["median_ms"] / base[key]["median_ms"]
+        rows.append((key, base[key]["median_ms"], r["median_ms"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def print_report(report):
+    print(f"{'case':<52}{'median ms':>12}{'IQR ms':>10}{'evals/s':>14}")
+    for r in report["results"]:
+        evals = f"{r['evals_per_sec']:.0f}" if "evals_per_sec" in r else "-"
+        print(f"{case_key(r):<52}{r['median_ms']:>12.3f}{r['iqr_ms']:>10.3f}{evals:>14}")
+
+
+def print_comparison(rows, threshold):
+    print(f"\n{'case':<52}{'base ms':>10}{'now ms':>10}{'ratio':>8}")
+    for key, base_ms, cur_ms, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{key:<52}{base_ms:>10.3f}{cur_ms:>10.3f}{ratio:>8.2f}{flag}")
+    regressions = sum(row[4] for row in rows)
+    print(f"\n{regressions} regression(s) beyond {threshold:.0%}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark compute_cost / QGA observe-evolve / PSO update")
+    parser.add_argument("--ue", type=int, nargs="+", default=list(DEFAULT_UE))
+    parser.add_argument("--pop", type=int, nargs="+", default=list(DEFAULT_POP))
+    parser.add_argument("--threads", type=int, nargs="+", default=list(DEFAULT_THREADS))
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--compiled", action="store_true",
+                        help="Thêm so sánh thế hệ eager / kernel gộp torch.compile (lần biên dịch đầu tốn vài giây)")
+    parser.add_argument("--save", help="Ghi kết quả ra file JSON baseline")
+    parser.add_argument("--compare", help="So sánh với file JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Ngưỡng chậm đi tương đối coi là regression")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.ue, args.pop, args.threads, warmup=args.warmup, repeats=args.repeats,
+                            compiled=args.compiled)
+    print_report(report)
+    if args.save:
+        save_baseline(report, args.save)
+        print(f"[OK] Baseline saved to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if print_comparison(compare(report, baseline, args.threshold), args.threshold):
+            raise SystemExit(1)
@@ -0,0 +1,337 @@
+import asyncio
+import collections
+import json
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+
+from config import BaseConfig
+from core.encoding import decode
+from core.online import env_from_snapshot, sync_ues
+from core.rng import make_generator
+from models.multicell import MultiCellQGAOptimizer
+from models.qga_optimizer import QGAOptimizer
+
+BITS_PER_MB = 1024 * 1024 * 8
+
+
+class CellState:
+    """
+    Trạng thái ấm của một cell giữa các lần gọi: env (bảng chi phí đã cache) và QGAOptimizer
+    (theta, lời giải tốt nhất). Mỗi snapshot chỉ vá các hàng UE thay đổi; UE được nhận diện qua ue_ids
+    (mặc định theo thứ tự), UE rời đi bị cắt và UE mới được nối vào cuối như OnlineSAGIN.
+    iters: số thế hệ mặc định mỗi lượt; snapshot có thể đặt "iters" trong [1, max_iters].
+    """
+    def __init__(self, config, scenario, seed, generator, relax, iters=50, max_iters=1000):
+        self.config = config
+        self.scenario = scenario
+        self.seed = seed
+        self.generator = generator
+        self.relax = relax
+        self.default_iters = iters
+        self.max_iters = max_iters
+        self.iters = iters
+        self.env = None
+        self.optimizer = None
+        self.ue_ids = []
+        self.request_idx = None
+
+    def _parse(self, snapshot):
+        """
+        Kiểm tra và chuyển snapshot sang tensor trước khi đụng tới trạng thái của cell:
+        snapshot sai (kích thước, kiểu, ue_ids trùng, iters ngoài [1, max_iters]) báo ValueError
+        và cell giữ nguyên trạng thái cũ.
+        """
+        device = self.config.DEVICE
+        try:
+            ue_pos = np.asarray(snapshot["ue_pos"], dtype=np.float32)
+            task_key = "task_bits" if "task_bits" in snapshot else "task_mb"
+            task = np.asarray(snapshot[task_key], dtype=np.float32)
+            ids = list(snapshot.get("ue_ids", range(len(ue_pos))))
+            weights = {k: float(snapshot[k]) for k in ("w_latency", "w_energy") if k in snapshot}
+            uav_pos = np.asarray(snapshot["uav_pos"], dtype=np.float32) if "uav_pos" in snapshot else None
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"malformed snapshot: {e}") from None
+
+        iters = snapshot.get("iters", self.default_iters)
+        if isinstance(iters, bool) or not isinstance(iters, int) or not 1 <= iters <= self.max_iters:
+            raise ValueError(f"iters must be an integer in [1, {self.max_iters}], got {iters!r}")
+
+        if ue_pos.ndim != 2 or ue_pos.shape[0] == 0 or ue_pos.shape[1] not in (2, 3):
+            raise ValueError(f"ue_pos must be a non-empty N x 2 or N x 3 list, got shape {ue_pos.shape}")
+        if task.shape != (ue_pos.shape[0],):
+            raise ValueError(f"{task_key} must have one value per UE ({ue_pos.shape[0]}), got shape {task.shape}")
+        if len(ids) != ue_pos.shape[0]:
+            raise ValueError("ue_pos, task sizes and ue_ids must have the same length")
+        try:
+            if len(set(ids)) != len(ids):
+                raise ValueError("ue_ids must be unique")
+        except TypeError:
+            raise ValueError("ue_ids must be hashable values") from None
+        if not (np.isfinite(ue_pos).all() and np.isfinite(task).all()) or (task <= 0).any():
+            raise ValueError("ue_pos must be finite and task sizes finite and positive")
+        if uav_pos is not None and (uav_pos.ndim != 2 or uav_pos.shape[1] not in (2, 3)
+                                    or uav_pos.shape[0] > self.config.NUM_UAV or not np.isfinite(uav_pos).all()):
+            raise ValueError(f"uav_pos must be a finite M x 2 or M x 3 list with M <= {self.config.NUM_UAV}")
+
+        positions = torch.from_numpy(ue_pos[:, :2].copy()).to(device)
+        task_bits = torch.from_numpy(task).to(device)
+        if task_key == "task_mb":
+            task_bits = task_bits * BITS_PER_MB
+        uav_xy = None if uav_pos is None else torch.from_numpy(uav_pos[:, :2].copy()).to(device)
+        return positions, task_bits, ids, weights, uav_xy, iters
+
+    def apply(self, snapshot):
+        """
+        Đưa snapshot vào env và chuẩn bị optimizer (warm-start nếu cell đã có trạng thái).
+        snapshot: ue_pos [[x, y], ...], task_bits hoặc task_mb [N], tùy chọn ue_ids [N],
+        w_latency / w_energy, uav_pos [[x, y], ...].
+        Trả về True nếu optimizer được warm-start.
+        """
+        device = self.config.DEVICE
+        positions, task_bits, ids, weights, uav_xy, iters = self._parse(snapshot)
+
+        if self.env is None:
+            self.env = env_from_snapshot(self.config, self.scenario, self.seed, positions, task_bits, **weights)
+            env_ids, keep_idx, num_new = ids, None, 0
+            order = torch.arange(len(ids), device=device)
+        else:
+            env_ids, keep_idx, num_new, order = sync_ues(self.env, self.ue_ids, ids, positions, task_bits)
+            if weights:
+                self.env.scenario = {**self.env.scenario, **weights}
+
+        if uav_xy is not None and not torch.equal(uav_xy, self.env.uav_pos[:uav_xy.shape[0], :2]):
+            self.env.move_uavs(torch.arange(uav_xy.shape[0], device=device), uav_xy)
+
+        self.ue_ids = env_ids
+        self.request_idx = order
+        self.iters = iters
+        previous = self.optimizer
+        self.optimizer = QGAOptimizer(self.config, num_ue=self.env.num_ue, env=self.env, generator=self.generator)
+        if previous is None or keep_idx is None:
+            return False
+        self.optimizer.warm_start(previous, keep_idx, num_new, relax=self.relax)
+        return True
+
+    def decisions(self):
+        """Quyết định {0, 1, 2} của lời giải tốt nhất theo đúng thứ tự UE của snapshot"""
+        env_order = decode(self.optimizer.best_sol_bits, self.optimizer.lut)
+        result = torch.empty_like(env_order)
+        result[self.request_idx] = env_order
+        return result.tolist()
+
+
+class ServiceMetrics:
+    """Độ trễ (enqueue -> trả lời) của các yêu cầu gần nhất, độ sâu hàng đợi và kích thước batch"""
+    def __init__(self, window=10000):
+        self.latencies = collections.deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.max_queue_depth = 0
+
+    def record_batch(self, size):
+        self.batches += 1
+        self.batched_requests += size
+
+    def record_request(self, latency, ok=True):
+        self.requests += 1
+        self.errors += 0 if ok else 1
+        self.latencies.append(latency)
+
+    def observe_queue(self, depth):
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def snapshot(self, queue_depth, cells):
+        latencies = np.asarray(self.latencies) * 1000
+        percentiles = np.percentile(latencies, [50, 95, 99]).tolist() if len(latencies) else [None] * 3
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency_ms": dict(zip(("p50", "p95", "p99"), percentiles)),
+            "queue_depth": queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "batches": self.batches,
+            "mean_batch_size": self.batched_requests / self.batches if self.batches else None,
+            "cells": cells,
+        }
+
+
+class DecisionService:
+    """
+    Dịch vụ quyết định offload chạy lâu dài: nhận snapshot của từng cell, trả về quyết định.
+    Các yêu cầu đến trong batch_window giây (tối đa max_batch) được gom lại; các cell cùng số thế hệ
+    (iters) được tối ưu trong một lượt MultiCellQGAOptimizer; env / optimizer của mỗi cell được giữ ấm giữa các epoch.
+    iters: số thế hệ mặc định; yêu cầu có thể đặt "iters" trong [1, max_iters].
+    Mọi phép torch chạy trên một luồng worker riêng nên event loop vẫn nhận yêu cầu trong lúc tối ưu.
+    Giao thức: mỗi dòng một JSON, {"op": "solve", "cell": ..., <snapshot>} hoặc {"op": "metrics"}.
+    """
+    def __init__(self, config=None, scenario="urban_iot", iters=50, relax=0.2, batch_window=0.005,
+                 max_batch=64, seed=0, max_iters=1000):
+        self.config = config or BaseConfig()
+        self.scenario = scenario
+        self.iters = iters
+        self.max_iters = max_iters
+        self.relax = relax
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.seed = seed
+        self.generator = make_generator(seed, self.config.DEVICE)
+        self.cells = {}
+        self.metrics = ServiceMetrics()
+        self.queue = None
+        self._worker = ThreadPoolExecutor(max_workers=1)
+
+    def _cell(self, cell_id, snapshot):
+        if cell_id not in self.cells:
+            scenario = snapshot.get("scenario", self.scenario)
+            if scenario not in self.config.SCENARIOS:
+                raise ValueError(f"unknown scenario {scenario!r}")
+            try:
+                seed = int(snapshot.get("seed", self.seed))
+            except (TypeError, ValueError):
+                raise ValueError("seed must be an integer") from None
+            self.cells[cell_id] = CellState(self.config, scenario, seed, self.generator, self.relax,
+                                            self.iters, self.max_iters)
+        return self.cells[cell_id]
+
+    def solve_batch(self, snapshots):
+        """
+        Tối ưu một batch snapshot (mỗi cell tối đa một snapshot): mỗi nhóm cell cùng iters một lượt.
+        Trả về list kết quả (dict) theo thứ tự snapshots; snapshot lỗi trả về {"error": ...}.
+        "generations" của kết quả là số thế hệ đã chạy, "batch_size" là số cell trong lượt đó.
+        """
+        results = [None] * len(snapshots)
+        ready = []
+        for i, snapshot in enumerate(snapshots):
+            try:
+                cell = self._cell(snapshot["cell"], snapshot)
+                ready.append((i, cell, cell.apply(snapshot)))
+            except Exception as e:
+                # Lỗi của một snapshot chỉ làm hỏng yêu cầu đó; các cell khác trong batch vẫn được tối ưu
+                cell_id = snapshot.get("cell") if isinstance(snapshot, dict) else None
+                results[i] = {"cell": cell_id, "error": f"{type(e).__name__}: {e}"}
+        if not ready:
+            return results
+
+        groups = collections.defaultdict(list)
+        for item in ready:
+            groups[item[1].iters].append(item)
+        for iters, group in groups.items():
+            start = time.perf_counter()
+            try:
+                costs = MultiCellQGAOptimizer([cell.optimizer for _, cell, _ in group], self.generator).run(iters)
+            except Exception as e:
+                for i, _, _ in group:
+                    results[i] = {"cell": snapshots[i]["cell"], "error": f"{type(e).__name__}: {e}"}
+                continue
+            solve_ms = (time.perf_counter() - start) * 1000
+            for (i, cell, warm), cost in zip(group, costs):
+                results[i] = {
+                    "cell": snapshots[i]["cell"],
+                    "decisions": cell.decisions(),
+                    "cost": cost,
+                    "warm": warm,
+                    "generations": iters,
+                    "batch_size": len(group),
+                    "solve_ms": solve_ms,
+                }
+        return results
+
+    async def submit(self, snapshot):
+        """Đưa snapshot vào hàng đợi và chờ kết quả của lượt batch chứa nó"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((snapshot, future, time.perf_counter()))
+        self.metrics.observe_queue(self.queue.qsize())
+        return await future
+
+    async def _batcher(self):
+        loop = asyncio.get_running_loop()
+        deferred = []
+        while True:
+            batch = deferred or [await self.queue.get()]
+            deferred = []
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Mỗi cell chỉ một snapshot trong một lượt; snapshot sau của cùng cell chờ lượt kế tiếp
+            seen, current = set(), []
+            for item in batch:
+                cell = item[0].get("cell")
+                (deferred if cell in seen else current).append(item)
+                seen.add(cell)
+
+            self.metrics.record_batch(len(current))
+            try:
+                results = await loop.run_in_executor(self._worker, self.solve_batch, [item[0] for item in current])
+            except Exception as e:
+                results = [{"cell": item[0].get("cell"), "error": f"{type(e).__name__}: {e}"} for item in current]
+            now = time.perf_counter()
+            for (_, future, enqueued), result in zip(current, results):
+                result["latency_ms"] = (now - enqueued) * 1000
+                self.metrics.record_request(now - enqueued, ok="error" not in result)
+                if not future.done():
+                    future.set_result(result)
+
+    async def _handle(self, reader, writer):
+        # Mỗi kết nối có thể gửi nhiều yêu cầu; các yêu cầu trên cùng kết nối được xử lý tuần tự
+        try:
+            while line := await reader.readline():
+                try:
+                    message = json.loads(line)
+                    op = message.get("op", "solve") if isinstance(message, dict) else None
+                    if op == "metrics":
+                        response = self.metrics.snapshot(self.queue.qsize(), len(self.cells))
+                    elif op == "solve" and not isinstance(message.get("cell"), (str, int)):
+                        response = {"error": "solve requests need a string or integer cell id"}
+                    elif op == "solve":
+                        response = await self.submit(message)
+                    else:
+                        response = {"error": f"unknown op {op!r}"}
+                except json.JSONDecodeError as e:
+                    response = {"error": f"invalid JSON: {e}"}
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, path=None, host="127.0.0.1", port=8765):
+        """Chạy dịch vụ trên Unix socket path (nếu đặt) hoặc TCP host:port cho đến khi bị hủy"""
+        self.queue = asyncio.Queue()
+        batcher = asyncio.create_task(self._batcher())
+        if path is not None:
+            server = await asyncio.start_unix_server(self._handle, path=path)
+        else:
+            server = await asyncio.start_server(self._handle, host=host, port=port)
+        print(f"Decision service listening on {path or f'{host}:{port}'}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            self._worker.shutdown(wait=False)
+
+
+def query(message, path=None, host="127.0.0.1", port=8765, timeout=None):
+    """Client đồng bộ cho scheduler: gửi một yêu cầu (dict) và trả về phản hồi (dict)"""
+    if path is not None:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.settimeout(timeout)
+        conn.connect(path)
+    else:
+        conn = socket.create_connection((host, port), timeout=timeout)
+    with conn, conn.makefile("rwb") as stream:
+        stream.write((json.dumps(message) + "\n").encode())
+        stream.flush()
+        return json.loads(stream.readline())
@@ -0,0 +1,53 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import multiprocessing as mp
+
+from tqdm import tqdm
+
+
+def _init_worker(num_threads):
+    # Ghim số luồng torch cho từng worker để các process không tranh nhau lõi CPU
+    import torch
+    torch.set_num_threads(num_threads)
+
+
+def run_jobs(job_fn, jobs, store, workers=1, threads_per_worker=None, desc="Jobs", backend="process"):
+    """
+    Chạy job_fn(**job) cho từng job chưa có trong store, ghi kết quả ngay khi job xong.
+    jobs: list các dict tham số, ví dụ {"scenario": "urban_iot", "seed": 0, "algorithm": "QGA"}
+    workers > 1: phân phối lên process pool (backend="process") hoặc thread pool (backend="thread");
+    workers = 1: chạy tuần tự trong process hiện tại.
+    Job chỉ dùng Generator riêng của env/optimizer nên kết quả không phụ thuộc cách phân phối.
+    """
+    done = store.completed()
+    pending = [job for job in jobs if store.key_name(job) not in done]
+    if len(pending) < len(jobs):
+        print(f"[Resume] Skipping {len(jobs) - len(pending)} completed jobs")
+    if not pending:
+        return
+
+    if threads_per_worker is None:
+        threads_per_worker = max(1, (os.cpu_count() or 1) // max(1, workers))
+
+    if workers <= 1:
+        _init_worker(threads_per_worker)
+        for job in tqdm(pending, desc=desc):
+            store.write(job, job_fn(**job))
+        return
+
+    if backend == "thread":
+        # Các thread dùng chung process: chia đều số luồng torch một lần cho cả pool
+        _init_worker(threads_per_worker * workers)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(job_fn, **job): job for job in pending}
+            for future in tqdm(as_completed(futures), total=len(futures), desc=desc):
+                store.write(futures[future], future.result())
+        return
+
+    # spawn: an toàn với CUDA và không kế thừa trạng thái của process cha
+    ctx = mp.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_worker, initargs=(threads_per_worker,)) as pool:
+        futures = {pool.submit(job_fn, **job): job for job in pending}
+        for future in tqdm(as_completed(futures), total=len(futures), desc=desc):
+            store.write(futures[future], future.result())
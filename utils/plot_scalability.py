@@ -1,8 +1,10 @@
 # utils/plot_scalability.py
 import pandas as pd
 import matplotlib.pyplot as plt
+from utils.results_store import load_scalability_results
 
-df = pd.read_csv("results/scalability_results.csv")
+# Đọc dữ liệu trực tiếp từ kho kết quả (không chạy lại thí nghiệm)
+df = load_scalability_results()
 
 # Hình 1: Cost vs Num_UE
 plt.figure(figsize=(8, 5))
@@ -18,6 +20,8 @@ plt.savefig('results/scalability_cost.pdf', format='pdf')
 # Hình 2: Time vs Num_UE
 plt.figure(figsize=(8, 5))
 plt.plot(df['Num_UE'], df['QGA_Time'], marker='o', color='green', label='QGA Execution Time')
+for col in [c for c in df.columns if c.startswith('QGA-Island') and c.endswith('_Time')]:
+    plt.plot(df['Num_UE'], df[col], marker='^', label=col.replace('_Time', '') + ' Execution Time')
 plt.xlabel('Number of UEs')
 plt.ylabel('Time (seconds)')
 plt.title('Scalability: Execution Time on RTX 4090')
@@ -1,10 +1,11 @@
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
+from utils.results_store import load_experiment_results
 
 def plot_results():
-    # Đọc dữ liệu
-    df = pd.read_csv("results/experimental_results.csv")
+    # Đọc dữ liệu trực tiếp từ kho kết quả (không chạy lại thí nghiệm)
+    df = load_experiment_results()
     
     # Chuyển đổi dữ liệu sang dạng long-format để vẽ seaborn
     df_melted = df.melt(id_vars=['Scenario', 'Seed'], 
@@ -0,0 +1,102 @@
+import json
+import os
+import re
+
+
+class ResultsStore:
+    """
+    Kho kết quả dạng append-only: mỗi job hoàn thành được ghi thành một shard JSONL riêng.
+    Shard chỉ xuất hiện (qua os.replace) khi đã ghi xong, nên job bị ngắt giữa chừng
+    sẽ được chạy lại ở lần sau còn các job đã xong thì được bỏ qua.
+    """
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def key_name(job):
+        """Tên shard từ các giá trị của job, ví dụ: urban_iot-3-QGA"""
+        name = "-".join(str(v) for v in job.values())
+        return re.sub(r"[^A-Za-z0-9_.=-]", "_", name)
+
+    def _shard_path(self, job):
+        return os.path.join(self.root, self.key_name(job) + ".jsonl")
+
+    def completed(self):
+        """Tập tên các job đã có shard"""
+        return {f[:-len(".jsonl")] for f in os.listdir(self.root) if f.endswith(".jsonl")}
+
+    def is_done(self, job):
+        return os.path.exists(self._shard_path(job))
+
+    def write(self, job, record):
+        path = self._shard_path(job)
+        tmp_path = os.path.join(self.root, ".tmp-" + os.path.basename(path))
+        with open(tmp_path, "w") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def records(self):
+        records = []
+        for name in sorted(os.listdir(self.root)):
+            if not name.endswith(".jsonl"):
+                continue
+            with open(os.path.join(self.root, name)) as f:
+                records.extend(json.loads(line) for line in f if line.strip())
+        return records
+
+    def to_frame(self):
+        """Gộp toàn bộ shard thành một DataFrame (bỏ cột lịch sử hội tụ)"""
+        # pandas chỉ được import khi đọc kết quả: process worker chỉ ghi shard nên khởi động nhanh hơn
+        import pandas as pd
+        df = pd.DataFrame(self.records())
+        return df.drop(columns=["History"], errors="ignore")
+
+
+def pivot_algorithms(df, index, values=("Cost", "Time")):
+    """
+    Chuyển bảng dạng dài (mỗi dòng một thuật toán) sang dạng rộng: QGA_Cost, PSO_Cost, ...
+    """
+    wide = df.pivot_table(index=index, columns="Algorithm", values=list(values))
+    wide.columns = [f"{algo}_{value}" for value, algo in wide.columns]
+    return wide.reset_index()
+
+
+EXPERIMENTS_STORE = "results/store/experiments"
+SCALABILITY_STORE = "results/store/scalability"
+
+
+def load_experiment_results(store_dir=EXPERIMENTS_STORE, fallback_csv="results/experimental_results.csv"):
+    """
+    Bảng rộng: Scenario, Seed, QGA_Cost, PSO_Cost, Gain_Percentage (đọc CSV cũ nếu kho còn trống),
+    thêm QGA_Gap / PSO_Gap (khoảng cách tối ưu, %) và QGA_Generations / PSO_Generations (thế hệ dừng)
+    nếu bản ghi có các cột đó
+    """
+    df = ResultsStore(store_dir).to_frame()
+    if df.empty:
+        import pandas as pd
+        return pd.read_csv(fallback_csv)
+    values = ("Cost",) + tuple(c for c in ("Gap", "Generations") if c in df.columns)
+    df = pivot_algorithms(df, index=["Scenario", "Seed"], values=values)
+    df["Gain_Percentage"] = (df["PSO_Cost"] - df["QGA_Cost"]) / df["PSO_Cost"] * 100
+    return df
+
+
+def load_scalability_results(store_dir=SCALABILITY_STORE, fallback_csv="results/scalability_results.csv"):
+    """
+    Bảng rộng: Num_UE, QGA_Time, PSO_Time, QGA_Cost, PSO_Cost (đọc CSV cũ nếu kho còn trống),
+    tiếp theo là cột của các biến thể khác nếu có (vd. QGA-Island4_Time, QGA-Island4_Cost,
+    QGA-Island4_Speedup = QGA_Time / QGA-Island4_Time) và khoảng cách tối ưu (QGA_Gap, ...) nếu bản ghi có cột Gap
+    """
+    df = ResultsStore(store_dir).to_frame()
+    if df.empty:
+        import pandas as pd
+        return pd.read_csv(fallback_csv)
+    values = ("Cost", "Time") + (("Gap",) if "Gap" in df.columns else ())
+    df = pivot_algorithms(df, index=["Num_UE"], values=values)
+    for col in [c for c in df.columns if c.startswith("QGA-Island") and c.endswith("_Time")]:
+        df[col.replace("_Time", "_Speedup")] = df["QGA_Time"] / df[col]
+    columns = ["Num_UE", "QGA_Time", "PSO_Time", "QGA_Cost", "PSO_Cost"]
+    return df[columns + [c for c in df.columns if c not in columns]]